@@ -0,0 +1,200 @@
+# Streaming statistics of scan results over regions of millions of chunks.
+#
+# Each stage is a generator over the one before: region_chunks() yields chunk
+# coordinates, bodies() the planets and moons of each chunk with their scan
+# seeds, scans() the generatePlanetData() card of each body. RegionStats then
+# folds the cards into totals, a temperature histogram and the most populous
+# bodies, none of which grows with the region. A region is cut into square
+# tasks that a process pool works through a few at a time. Their partial
+# results are merged in task order, and the running total is checkpointed,
+# so an interrupted run picks up at the first task it had not merged.
+import collections
+import concurrent.futures
+import heapq
+import json
+import math
+import os
+import time
+
+import galaxy
+import seeds
+
+TASK_SIDE = 16  # chunks per side of one pool task; a task is ~23,000 bodies
+TEMPERATURE_MIN = -160  # °C; generatePlanetData() stays within ±150
+TEMPERATURE_BIN = 10
+TEMPERATURE_BINS = 32
+TOP_K = 10
+CHECKPOINT_SECONDS = 10.0
+PLANETS_PER_CHUNK = math.ceil(galaxy.PLANET_COUNT)
+
+
+def region_chunks(x0, y0, x1, y1):
+    """Chunk coordinates of [x0, x1) x [y0, y1), row by row."""
+    for cy in range(y0, y1):
+        for cx in range(x0, x1):
+            yield cx, cy
+
+
+def bodies(chunks):
+    """(cx, cy, i, m, scan seed) for every planet (m None) and moon of each chunk.
+
+    Only the draws planet_descriptor() makes up to the moon count are taken,
+    and scan seeds come from the integer seed layer instead of formatted IDs.
+    """
+    for cx, cy in chunks:
+        planet_ids = seeds.body_id_prefix('planet', cx, cy)
+        moon_ids = seeds.body_id_prefix('moon', cx, cy)
+        for i in range(PLANETS_PER_CHUNK):
+            rand = galaxy.Mulberry32(seeds.planet_seed(cx, cy, i))
+            rand()  # x
+            rand()  # y
+            rand()  # size
+            moons = math.floor(rand() * 3) + 1 if rand() > 0.6 else 0
+            yield cx, cy, i, None, seeds.planet_id_seed(planet_ids, i)
+            for m in range(moons):
+                yield cx, cy, i, m, seeds.moon_id_seed(moon_ids, i, m)
+
+
+def scans(stream):
+    """(body, card) with the scan card the page shows for each body from bodies()."""
+    for body in stream:
+        yield body, galaxy.generate_planet_data(body[4], body[3] is not None)
+
+
+def body_id(body):
+    cx, cy, i, m, _ = body
+    return f"planet-{cx}-{cy}-{i}" if m is None else f"moon-{cx}-{cy}-{i}-{m}"
+
+
+class RegionStats:
+    """Totals, temperature histogram and top-k by population over a stream of scan cards."""
+
+    def __init__(self, top=TOP_K):
+        self.top = top
+        self.chunks = 0
+        self.planets = 0
+        self.moons = 0
+        self.life = 0
+        self.population = 0
+        self.temperatures = [0] * TEMPERATURE_BINS
+        self.populous = []  # min-heap of (population, body id), at most `top` long
+
+    def add(self, body, card):
+        if body[3] is None:
+            self.planets += 1
+        else:
+            self.moons += 1
+        temperature = int(card['temperature'][:-2])  # '-12°C'
+        bin_index = (temperature - TEMPERATURE_MIN) // TEMPERATURE_BIN
+        self.temperatures[min(max(bin_index, 0), TEMPERATURE_BINS - 1)] += 1
+        if card['lifeForm'] == 'Yes':
+            self.life += 1
+            population = int(card['population'].replace(',', ''))
+            self.population += population
+            if len(self.populous) < self.top:
+                heapq.heappush(self.populous, (population, body_id(body)))
+            elif population > self.populous[0][0]:
+                heapq.heapreplace(self.populous, (population, body_id(body)))
+
+    def consume(self, stream):
+        for body, card in stream:
+            self.add(body, card)
+        return self
+
+    def merge(self, other):
+        self.chunks += other.chunks
+        self.planets += other.planets
+        self.moons += other.moons
+        self.life += other.life
+        self.population += other.population
+        self.temperatures = [a + b for a, b in zip(self.temperatures, other.temperatures)]
+        for entry in other.populous:
+            if len(self.populous) < self.top:
+                heapq.heappush(self.populous, entry)
+            elif entry > self.populous[0]:
+                heapq.heapreplace(self.populous, entry)
+        return self
+
+    def to_json(self):
+        return {'chunks': self.chunks, 'planets': self.planets, 'moons': self.moons, 'life': self.life,
+                'population': self.population, 'temperatures': self.temperatures,
+                'populous': sorted(self.populous, reverse=True)}
+
+    @classmethod
+    def from_json(cls, data, top=TOP_K):
+        stats = cls(top)
+        for field in ('chunks', 'planets', 'moons', 'life', 'population', 'temperatures'):
+            setattr(stats, field, data[field])
+        stats.populous = [tuple(entry) for entry in data['populous']][:top]
+        heapq.heapify(stats.populous)
+        return stats
+
+
+def task_count(x0, y0, x1, y1, side=TASK_SIDE):
+    return math.ceil((x1 - x0) / side) * math.ceil((y1 - y0) / side)
+
+
+def task_region(x0, y0, x1, y1, index, side=TASK_SIDE):
+    """Chunk rectangle of task `index`; tasks tile the region row by row."""
+    columns = math.ceil((x1 - x0) / side)
+    tx0 = x0 + index % columns * side
+    ty0 = y0 + index // columns * side
+    return tx0, ty0, min(tx0 + side, x1), min(ty0 + side, y1)
+
+
+def run_task(x0, y0, x1, y1, top=TOP_K):
+    """The whole pipeline over one task's rectangle, as a JSON-able partial result."""
+    stats = RegionStats(top).consume(scans(bodies(region_chunks(x0, y0, x1, y1))))
+    stats.chunks = (x1 - x0) * (y1 - y0)
+    return stats.to_json()
+
+
+def load_checkpoint(path, region, side, top):
+    """(next task, stats) saved for the same region and task size, or (0, empty stats)."""
+    try:
+        with open(path) as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        return 0, RegionStats(top)
+    if saved.get('region') != list(region) or saved.get('side') != side or saved.get('top') != top:
+        return 0, RegionStats(top)
+    return saved['next'], RegionStats.from_json(saved['stats'], top)
+
+
+def save_checkpoint(path, region, side, top, next_task, stats):
+    # Written beside the checkpoint and renamed over it, so a kill mid-write leaves the last good one
+    temporary = f"{path}.tmp"
+    with open(temporary, 'w') as f:
+        json.dump({'region': list(region), 'side': side, 'top': top, 'next': next_task, 'stats': stats.to_json()}, f)
+    os.replace(temporary, path)
+
+
+def analyze(region, workers=os.cpu_count() or 1, checkpoint=None, side=TASK_SIDE, top=TOP_K, progress=None):
+    """RegionStats over region (x0, y0, x1, y1) in chunks, end exclusive.
+
+    At most 2 x `workers` tasks are in flight, and finished ones wait only
+    until the tasks before them are merged, so memory stays flat whatever the
+    region size. With `checkpoint` the merged total is saved to that path
+    every CHECKPOINT_SECONDS and at the end, and a run resumes from it.
+    progress(done, total, stats) is called after each merge.
+    """
+    total = task_count(*region, side)
+    next_task, stats = load_checkpoint(checkpoint, region, side, top) if checkpoint else (0, RegionStats(top))
+    saved_at = time.monotonic()
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        pending = collections.deque()
+        submitted = next_task
+        while next_task < total:
+            while submitted < total and len(pending) < 2 * workers:
+                pending.append(executor.submit(run_task, *task_region(*region, submitted, side), top))
+                submitted += 1
+            stats.merge(RegionStats.from_json(pending.popleft().result(), top))
+            next_task += 1
+            if progress:
+                progress(next_task, total, stats)
+            if checkpoint and time.monotonic() - saved_at >= CHECKPOINT_SECONDS:
+                save_checkpoint(checkpoint, region, side, top, next_task, stats)
+                saved_at = time.monotonic()
+    if checkpoint:
+        save_checkpoint(checkpoint, region, side, top, next_task, stats)
+    return stats
@@ -0,0 +1,91 @@
+# Autopilot route planning: the flight from where the Code button was pressed to the seeded planet.
+#
+# The page flies the straight line between the two points, easing in and out
+# with smoothstep over flight_ms(distance) instead of teleporting. plan()
+# samples that flight finely enough that no chunk is stepped over and lists
+# every chunk generateWorld() loads on the way, the 3x3 block around the
+# ship, with the time it is first needed. /route streams them in that order,
+# so each one lands before the ship does.
+import math
+
+import seeds
+from galaxy import CHUNK_SIZE
+
+ROUTE_SPEED = 1.5  # mean world units per ms; smoothstep peaks at 1.5x this mid-flight
+ROUTE_MIN_MS = 1000
+ROUTE_MAX_CHUNKS = 160  # a flight of about 50 chunks
+SAMPLE_STEP = CHUNK_SIZE / 4
+
+
+def flight_ms(distance):
+    """How long the autopilot takes to fly `distance` world units."""
+    return max(ROUTE_MIN_MS, distance / ROUTE_SPEED)
+
+
+def progress(t):
+    """Share of the distance covered once a share t of the flight time has passed."""
+    t = min(max(t, 0.0), 1.0)
+    return t * t * (3 - 2 * t)
+
+
+def position(x0, y0, x1, y1, duration, elapsed):
+    p = progress(elapsed / duration)
+    return x0 + (x1 - x0) * p, y0 + (y1 - y0) * p
+
+
+def block_in_range(x, y):
+    """Whether the 3x3 chunk block around world point (x, y) lies inside the 32-bit chunk range."""
+    if not (math.isfinite(x) and math.isfinite(y)):
+        return False
+    cx = math.floor(x / CHUNK_SIZE)
+    cy = math.floor(y / CHUNK_SIZE)
+    return seeds.valid_coordinates(cx - 1, cy - 1) and seeds.valid_coordinates(cx + 1, cy + 1)
+
+
+def plan(x0, y0, x1, y1):
+    """(duration ms, [(cx, cy, eta ms)]) for the flight from (x0, y0) to (x1, y1), in order of arrival.
+
+    The block around the start is left out, since the ship already has it.
+    """
+    distance = math.hypot(x1 - x0, y1 - y0)
+    duration = flight_ms(distance)
+    # At 1.5x the mean speed this many steps still move at most SAMPLE_STEP each
+    steps = max(1, math.ceil(1.5 * distance / SAMPLE_STEP))
+    start_x = math.floor(x0 / CHUNK_SIZE)
+    start_y = math.floor(y0 / CHUNK_SIZE)
+    seen = {(start_x + dx, start_y + dy) for dy in (-1, 0, 1) for dx in (-1, 0, 1)}
+    chunks = []
+    last_x, last_y, last = x0, y0, (start_x, start_y)
+    for k in range(steps + 1):
+        eta = duration * k / steps
+        x, y = position(x0, y0, x1, y1, duration, eta)
+        chunk_x = math.floor(x / CHUNK_SIZE)
+        chunk_y = math.floor(y / CHUNK_SIZE)
+        passed = [(chunk_x, chunk_y)]
+        if chunk_x != last[0] and chunk_y != last[1]:
+            # Both edges were crossed since the last sample; the chunk between them is flown through too
+            corner = passed_corner(last_x, last_y, x, y, last, (chunk_x, chunk_y))
+            if corner is not None:
+                passed.insert(0, corner)
+        for centre_x, centre_y in passed:
+            for dy in (-1, 0, 1):
+                for dx in (-1, 0, 1):
+                    key = (centre_x + dx, centre_y + dy)
+                    if key not in seen:
+                        seen.add(key)
+                        chunks.append((key[0], key[1], eta))
+        last_x, last_y, last = x, y, (chunk_x, chunk_y)
+    return duration, chunks
+
+
+def passed_corner(x0, y0, x1, y1, start, end):
+    """The chunk the segment crosses between diagonal neighbours start and end, or None through the corner point."""
+    edge_x = max(start[0], end[0]) * CHUNK_SIZE
+    edge_y = max(start[1], end[1]) * CHUNK_SIZE
+    at_x = (edge_x - x0) / (x1 - x0)  # share of the segment flown when each edge is crossed
+    at_y = (edge_y - y0) / (y1 - y0)
+    if at_x < at_y:
+        return end[0], start[1]
+    if at_y < at_x:
+        return start[0], end[1]
+    return None
@@ -0,0 +1,679 @@
+# Benchmarks and checks behind the xeil.py subcommands of the same names.
+#
+# Most of them start xeil.py servers on free localhost ports as subprocesses
+# and drive them over HTTP, so they measure the server as it is deployed; the
+# rest time the generators, seeds and compression in this process. Each
+# returns its numbers, and a print_ function next to it formats them.
+import collections
+import concurrent.futures
+import gzip
+import http.client
+import json
+import math
+import os
+import queue
+import random
+import shutil
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+
+import chunks
+import cluster
+import compression
+import galaxy
+import seeds
+
+XEIL = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'xeil.py')
+READY_WAIT_SECONDS = 120  # as long as a supervisor waits for its server
+
+
+def memory_usage(pid):
+    """(RSS, PSS) bytes of a process from /proc; PSS splits shared pages between their users."""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            name, _, rest = line.partition(':')
+            if name in ('Rss', 'Pss'):
+                values[name] = int(rest.split()[0]) * 1024
+    return values.get('Rss', 0), values.get('Pss', 0)
+
+
+def worker_pids(pid):
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(child) for child in f.read().split()]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, attempts=100):
+    for _ in range(attempts):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"nothing listening on port {port}")
+
+
+def load(port, keys, clients):
+    """GET every chunk in `keys` through the server on `port`; returns (requests/s, hit rate)."""
+    def get(key):
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+        try:
+            connection.request("GET", f"/chunk?x={key[0]}&y={key[1]}&patterns=0")
+            response = connection.getresponse()
+            response.read()
+            return response.getheader("X-Cache") == "hit"
+        finally:
+            connection.close()
+
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(clients) as pool:
+        hits = sum(pool.map(get, keys))
+    wall = time.perf_counter() - start
+    return len(keys) / wall, hits / len(keys)
+
+
+# Chunk requests for the cache benchmark: players clustered around a few hot
+# spots, so most requests repeat a small set of chunks as on a busy server
+BENCH_HOT_SPOTS = ((0, 0), (40, -12), (-25, 30))
+BENCH_SPREAD = 1.5  # chunks
+
+
+def bench_keys(count, seed=0):
+    rng = random.Random(seed)
+    keys = []
+    for _ in range(count):
+        hx, hy = rng.choice(BENCH_HOT_SPOTS)
+        keys.append((hx + round(rng.gauss(0, BENCH_SPREAD)), hy + round(rng.gauss(0, BENCH_SPREAD))))
+    return keys
+
+
+def cache_bench(workers, requests=1000, clients=8, shared_cache=True):
+    """Serve with `workers` processes, replay a hot-spot chunk load and report hit rate and memory."""
+    port = free_port()
+    command = [sys.executable, XEIL, 'serve', '--port', str(port), '--workers', str(workers)]
+    if not shared_cache:
+        command.append('--private-cache')
+    server = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    try:
+        wait_for_port(port)
+        keys = bench_keys(requests)
+        rate, hit_rate = load(port, keys, clients)
+        pids = worker_pids(server.pid) if workers > 1 else [server.pid]
+        usage = [memory_usage(pid) for pid in pids]
+    finally:
+        server.terminate()
+        server.wait()
+    return {
+        'workers': workers,
+        'cache': 'shared' if shared_cache and workers > 1 else 'private',
+        'requests': requests,
+        'distinct': len(set(keys)),
+        'hit_rate': hit_rate,
+        'requests_per_second': rate,
+        'rss': sum(rss for rss, _ in usage),
+        'pss': sum(pss for _, pss in usage),
+    }
+
+
+# Chunks the restart benchmark keeps requesting while the server is replaced,
+# away from the working set so they do not warm it for the new server
+RESTART_PROBE_KEYS = [(5000 + k, 5000) for k in range(4)]
+
+
+def restart_bench(requests=300, clients=4, probes=2):
+    """Restart a supervised server under load, once starting cold and once from a cache snapshot.
+
+    The working set is the distinct hot-spot chunks of bench_keys(requests).
+    `probes` clients keep requesting RESTART_PROBE_KEYS through the restart
+    and count failed requests; then the working set is requested again, so
+    its latency and hit rate show what the new server had to regenerate.
+    """
+    keys = sorted(set(bench_keys(requests)))
+
+    def get(key):
+        """(seconds, hit) for one full chunk."""
+        start = time.perf_counter()
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+        try:
+            connection.request("GET", f"/chunk?x={key[0]}&y={key[1]}")
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                raise http.client.HTTPException(f"status {response.status}")
+            return time.perf_counter() - start, response.getheader("X-Cache") == "hit"
+        finally:
+            connection.close()
+
+    def working_set():
+        start = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(clients) as pool:
+            timings = list(pool.map(get, keys))
+        latencies = sorted(seconds for seconds, _ in timings)
+        return {'seconds': time.perf_counter() - start, 'p99': latencies[int(0.99 * (len(latencies) - 1))],
+                'hit_rate': sum(hit for _, hit in timings) / len(timings)}
+
+    def probe(stop, counts):
+        while not stop.is_set():
+            try:
+                get(random.choice(RESTART_PROBE_KEYS))
+                counts[0] += 1
+            except (OSError, http.client.HTTPException):
+                counts[1] += 1
+
+    results = {}
+    for mode in ('cold', 'snapshot'):
+        port = free_port()
+        directory = tempfile.mkdtemp(prefix='xeil-restart-bench-')  # mode 0700
+        path = os.path.join(directory, 'cache.snapshot')
+        command = [sys.executable, '-u', XEIL, 'serve', '--supervise', '--port', str(port)]
+        command += ['--snapshot', path] if mode == 'snapshot' else ['--no-snapshot']
+        supervisor = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+        lines = queue.Queue()
+        threading.Thread(target=lambda: [lines.put(line) for line in supervisor.stdout], daemon=True).start()
+
+        def wait_for(text):
+            while True:
+                line = lines.get(timeout=READY_WAIT_SECONDS)
+                if text in line:
+                    return line
+
+        try:
+            wait_for("ready on port")
+            before = working_set()
+            working_set()  # the old server's caches are warm from here on
+            stop = threading.Event()
+            counts = [0, 0]  # served, failed
+            probers = [threading.Thread(target=probe, args=(stop, counts)) for _ in range(probes)]
+            for thread in probers:
+                thread.start()
+            time.sleep(0.5)
+            supervisor.send_signal(signal.SIGHUP)
+            restarted = wait_for("Restarted")
+            time.sleep(0.5)
+            stop.set()
+            for thread in probers:
+                thread.join()
+            after = working_set()
+        finally:
+            supervisor.terminate()
+            supervisor.wait()
+            shutil.rmtree(directory, ignore_errors=True)
+        results[mode] = {'before': before, 'after': after, 'served': counts[0], 'failed': counts[1],
+                         'ready_seconds': float(restarted.split("ready in ")[1].split("s")[0])}
+    return len(keys), results
+
+
+def cluster_bench(max_nodes=4, requests=200, clients=8):
+    """Start `max_nodes` nodes and a router on localhost, joining the nodes one at a time.
+
+    At each size a batch of unseen chunks measures cold throughput, and a pass
+    over every chunk requested so far measures how much cache the join cost.
+    A final leave shows the departed node's keys falling back to their old owners.
+    """
+    ports = [free_port() for _ in range(max_nodes)]
+    nodes = [f"http://127.0.0.1:{port}" for port in ports]
+    processes = [subprocess.Popen([sys.executable, XEIL, 'serve', '--port', str(port)],
+                                  stdout=subprocess.DEVNULL) for port in ports]
+    router_port = free_port()
+    processes.append(subprocess.Popen([sys.executable, XEIL, 'route', '--port', str(router_port), nodes[0]],
+                                      stdout=subprocess.DEVNULL))
+
+    def change(action, node):
+        """The router's ring after a join or leave, rebuilt here from its node list."""
+        connection = http.client.HTTPConnection("127.0.0.1", router_port)
+        connection.request("POST", f"/cluster/{action}?node={node}", headers={"Content-Length": "0"})
+        state = json.loads(connection.getresponse().read())
+        connection.close()
+        return cluster.HashRing(state['nodes'])
+
+    rng = random.Random(1)
+    sample = [(rng.randrange(-10**6, 10**6), rng.randrange(-10**6, 10**6)) for _ in range(20000)]
+    seen = []
+    results = []
+    ring = cluster.HashRing(nodes[:1])
+    try:
+        for port in ports + [router_port]:
+            wait_for_port(port)
+        for size in range(1, max_nodes + 1):
+            before = ring
+            if size > 1:
+                ring = change('join', nodes[size - 1])
+            moved = cluster.moved_fraction(before, ring, sample)
+            revisit_hits = load(router_port, seen, clients)[1] if seen else None
+            fresh = [(rng.randrange(-10**6, 10**6), rng.randrange(-10**6, 10**6)) for _ in range(requests)]
+            cold_rate, _ = load(router_port, fresh, clients)
+            seen += fresh
+            results.append({'event': f"join -> {size}", 'moved': moved, 'ideal': 1 / size if size > 1 else 0.0,
+                            'revisit_hits': revisit_hits, 'cold_rate': cold_rate})
+        if max_nodes > 1:
+            before = ring
+            ring = change('leave', nodes[-1])
+            moved = cluster.moved_fraction(before, ring, sample)
+            _, revisit_hits = load(router_port, seen, clients)
+            results.append({'event': f"leave -> {max_nodes - 1}", 'moved': moved, 'ideal': 1 / max_nodes,
+                            'revisit_hits': revisit_hits, 'cold_rate': None})
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+    return results
+
+
+def print_cluster_bench(result):
+    cold = f"{result['cold_rate']:7.1f} req/s cold" if result['cold_rate'] is not None else " " * 18
+    revisit = f"revisit hit rate {result['revisit_hits']:6.1%}" if result['revisit_hits'] is not None else ""
+    print(f"{result['event']:<11} | {cold} | keys moved {result['moved']:6.1%} (ideal {result['ideal']:5.1%}) | {revisit}")
+
+
+def star_bench(chunk_count=20, processes=4, window=(80, 24), seed=0):
+    """Time full-chunk star generation against jump-ahead window queries and a split chunk.
+
+    Every variant is checked against the sequential stars before it is timed.
+    """
+    rng = random.Random(seed)
+    keys = [(rng.randrange(-10**5, 10**5), rng.randrange(-10**5, 10**5)) for _ in range(chunk_count)]
+    results = {}
+
+    start = time.perf_counter()
+    reference = {}
+    for cx, cy in keys:
+        chunk = galaxy.Chunk(cx, cy)
+        galaxy.generate_stars(chunk)
+        reference[(cx, cy)] = chunk
+    results['sequential chunk'] = (time.perf_counter() - start) / chunk_count
+
+    # Windows placed inside one chunk, so they are compared with exactly that chunk's stars
+    windows = [(cx * galaxy.CHUNK_SIZE + rng.uniform(0, galaxy.CHUNK_SIZE - window[0]),
+                cy * galaxy.CHUNK_SIZE + rng.uniform(0, galaxy.CHUNK_SIZE - window[1])) for cx, cy in keys]
+    start = time.perf_counter()
+    found = [galaxy.stars_in_window(left, top, *window) for left, top in windows]
+    results[f'{window[0]}x{window[1]} window'] = (time.perf_counter() - start) / chunk_count
+    for (left, top), stars in zip(windows, found):
+        chunk = reference[(stars[0][0], stars[0][1])] if stars else None
+        expected = [] if chunk is None else [i for i in range(len(chunk)) if left <= chunk.x[i] < left + window[0]
+                                             and top <= chunk.y[i] < top + window[1]]
+        if [star[2] for star in stars] != expected:
+            raise AssertionError(f"window at {left:.0f},{top:.0f} does not match the sequential chunk")
+
+    picks = [(cx, cy, rng.randrange(galaxy.STAR_TOTAL)) for cx, cy in keys for _ in range(50)]
+    start = time.perf_counter()
+    stars = [galaxy.star_at(*pick) for pick in picks]
+    results['one star'] = (time.perf_counter() - start) / len(picks)
+    for (cx, cy, i), star in zip(picks, stars):
+        chunk = reference[(cx, cy)]
+        if star != (chunk.x[i], chunk.y[i], chunk.brightness[i], chunk.chars[i], chunk.blink_speed[i], chunk.blink_offset[i]):
+            raise AssertionError(f"star_at({cx}, {cy}, {i}) does not match")
+
+    with concurrent.futures.ProcessPoolExecutor(processes) as executor:
+        galaxy.generate_stars_parallel(0, 0, executor, processes)  # start the workers
+        start = time.perf_counter()
+        split = [galaxy.generate_stars_parallel(cx, cy, executor, processes) for cx, cy in keys]
+        results[f'chunk split {processes} ways'] = (time.perf_counter() - start) / chunk_count
+    for chunk in split:
+        expected = reference[(chunk.cx, chunk.cy)]
+        if chunk.x != expected.x or chunk.chars != expected.chars or chunk.blink_offset != expected.blink_offset:
+            raise AssertionError(f"split chunk {chunk.cx},{chunk.cy} does not match")
+    return results
+
+
+def print_star_bench(results):
+    baseline = results['sequential chunk']
+    for name, seconds in results.items():
+        print(f"{name:<20} {seconds * 1000:9.3f} ms  speedup {baseline / seconds:7.1f}x")
+
+
+# Coordinates where a digit is added or the sign flips, plus the int32 limits
+SEED_EDGES = sorted({0, seeds.INT32_MIN, seeds.INT32_MIN + 1, seeds.INT32_MAX - 1, seeds.INT32_MAX} |
+                    {sign * (10 ** k + d) for k in range(10) for d in (-1, 0) for sign in (1, -1)})
+
+
+def check_seeds(grid=300, samples=200000, seed=0):
+    """Compare the integer seed layer with hash_string() of the formatted keys.
+
+    Covers every chunk in [-grid, grid]^2, the cross product of SEED_EDGES,
+    and `samples` random coordinates over the whole int32 range; planet and
+    moon seeds are checked on every edge pair and sampled elsewhere. Returns
+    (keys checked, first few mismatches).
+    """
+    rng = random.Random(seed)
+    checked = 0
+    mismatches = []
+
+    def check(cx, cy, planet=None, moon=None):
+        nonlocal checked
+        checked += 1
+        got = seeds.chunk_seed(cx, cy)
+        if got != galaxy.hash_string(f"{cx},{cy}"):
+            mismatches.append(('chunk', cx, cy, got))
+        if planet is not None:
+            planet_seed = seeds.planet_seed(cx, cy, planet)
+            if planet_seed != galaxy.hash_string(f"{cx},{cy},{planet}"):
+                mismatches.append(('planet', cx, cy, planet, planet_seed))
+            if moon is not None and seeds.moon_seed(planet_seed, moon) != galaxy.hash_string(f"{planet_seed}-{moon}"):
+                mismatches.append(('moon', planet_seed, moon))
+        if seeds.unpack_key(seeds.pack_key(cx, cy)) != (cx, cy):
+            mismatches.append(('key', cx, cy))
+
+    for cy in range(-grid, grid + 1):
+        for cx in range(-grid, grid + 1):
+            check(cx, cy)
+            if len(mismatches) > 10:
+                return checked, mismatches
+    for cx in SEED_EDGES:
+        for cy in SEED_EDGES:
+            check(cx, cy, rng.randrange(int(galaxy.PLANET_COUNT)), rng.randrange(3))
+    for _ in range(samples):
+        check(rng.randint(seeds.INT32_MIN, seeds.INT32_MAX), rng.randint(seeds.INT32_MIN, seeds.INT32_MAX),
+              rng.randrange(int(galaxy.PLANET_COUNT)), rng.randrange(3))
+        if len(mismatches) > 10:
+            break
+    return checked, mismatches
+
+
+def print_check_seeds(checked, mismatches):
+    """Print the result of check_seeds(); True when nothing mismatched."""
+    for mismatch in mismatches:
+        print("mismatch:", *mismatch)
+    print(f"{checked} coordinates checked, {'no' if not mismatches else len(mismatches)} mismatches")
+    return not mismatches
+
+
+def seed_bench(count=100000, seed=0):
+    """Seconds per operation for string-formatted against integer seeds and keys, and bytes per key."""
+    rng = random.Random(seed)
+    coords = [(rng.randrange(-10**5, 10**5), rng.randrange(-10**5, 10**5)) for _ in range(count)]
+    string_keys = {f"{cx},{cy}": None for cx, cy in coords}
+    tuple_keys = dict.fromkeys(coords)
+    packed_keys = {seeds.pack_key(cx, cy): None for cx, cy in coords}
+    hash_string, chunk_seed, planet_seed, pack_key = galaxy.hash_string, seeds.chunk_seed, seeds.planet_seed, seeds.pack_key
+
+    cases = {
+        'chunk seed, string': lambda: [hash_string(f"{cx},{cy}") for cx, cy in coords],
+        'chunk seed, integer': lambda: [chunk_seed(cx, cy) for cx, cy in coords],
+        'planet seed, string': lambda: [hash_string(f"{cx},{cy},{i}") for (cx, cy), i in zip(coords, range(count))],
+        'planet seed, integer': lambda: [planet_seed(cx, cy, i) for (cx, cy), i in zip(coords, range(count))],
+        'lookup, string key': lambda: [f"{cx},{cy}" in string_keys for cx, cy in coords],
+        'lookup, tuple key': lambda: [(cx, cy) in tuple_keys for cx, cy in coords],
+        'lookup, packed key': lambda: [pack_key(cx, cy) in packed_keys for cx, cy in coords],
+    }
+    results = {}
+    for name, case in cases.items():
+        start = time.perf_counter()
+        case()
+        results[name] = (time.perf_counter() - start) / count
+
+    sizes = {
+        'string key': sum(sys.getsizeof(key) for key in string_keys) / len(string_keys),
+        'tuple key': sum(sys.getsizeof(key) + sys.getsizeof(key[0]) + sys.getsizeof(key[1]) for key in tuple_keys) / len(tuple_keys),
+        'packed key': sum(sys.getsizeof(key) for key in packed_keys) / len(packed_keys),
+    }
+    return results, sizes
+
+
+def print_seed_bench(results, sizes):
+    for name, seconds in results.items():
+        print(f"{name:<22} {seconds * 1e9:8.0f} ns")
+    for name, size in sizes.items():
+        print(f"{name:<22} {size:8.1f} bytes")
+
+
+class LatencyProxy:
+    """TCP relay on localhost that delays every segment by half of `rtt` seconds each way, like a slow port-forward."""
+
+    def __init__(self, port, rtt):
+        self.target = port
+        self.delay = rtt / 2
+        self.listener = socket.create_server(("127.0.0.1", 0))
+        self.port = self.listener.getsockname()[1]
+        threading.Thread(target=self.accept, daemon=True).start()
+
+    def accept(self):
+        while True:
+            try:
+                client, _ = self.listener.accept()
+            except OSError:
+                return
+            upstream = socket.create_connection(("127.0.0.1", self.target))
+            for sock in (client, upstream):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            for source, sink in ((client, upstream), (upstream, client)):
+                queue = collections.deque()
+                ready = threading.Condition()
+                threading.Thread(target=self.read, args=(source, queue, ready), daemon=True).start()
+                threading.Thread(target=self.write, args=(sink, queue, ready), daemon=True).start()
+
+    def read(self, source, queue, ready):
+        while True:
+            try:
+                data = source.recv(65536)
+            except OSError:
+                data = b''
+            with ready:
+                queue.append((time.monotonic() + self.delay, data))
+                ready.notify()
+            if not data:
+                return
+
+    def write(self, sink, queue, ready):
+        while True:
+            with ready:
+                while not queue:
+                    ready.wait()
+                due, data = queue.popleft()
+            time.sleep(max(0.0, due - time.monotonic()))
+            try:
+                if not data:
+                    sink.shutdown(socket.SHUT_WR)
+                    return
+                sink.sendall(data)
+            except OSError:
+                return
+
+    def close(self):
+        self.listener.close()
+
+
+def batch_bench(rtt=0.05, teleports=5, seed=0):
+    """Fetch the 3x3 block around a teleport target as nine keep-alive /chunk GETs and as one /chunks batch.
+
+    The server runs behind a LatencyProxy adding `rtt` seconds per round trip.
+    Each block is generated once first, so both ways time transfer rather than
+    generation. Returns median (time to first chunk, time to all nine) per way.
+    """
+    port = free_port()
+    server = subprocess.Popen([sys.executable, XEIL, 'serve', '--port', str(port)],
+                              stdout=subprocess.DEVNULL)
+    rng = random.Random(seed)
+    timings = {'sequential': [], 'batch': []}
+    proxy = None
+    try:
+        wait_for_port(port)
+        proxy = LatencyProxy(port, rtt)
+        for _ in range(teleports):
+            cx, cy = rng.randrange(-10**6, 10**6), rng.randrange(-10**6, 10**6)
+            block = sorted(((cx + dx, cy + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)),
+                           key=lambda key: (key[0] - cx) ** 2 + (key[1] - cy) ** 2)
+            keys = ';'.join(f"{x},{y}" for x, y in block)
+            direct = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+            direct.request("GET", f"/chunks?keys={keys}&patterns=0")
+            direct.getresponse().read()
+            direct.close()
+
+            connection = http.client.HTTPConnection("127.0.0.1", proxy.port, timeout=120)
+            start = time.perf_counter()
+            first = None
+            for x, y in block:
+                connection.request("GET", f"/chunk?x={x}&y={y}&patterns=0")
+                connection.getresponse().read()
+                first = first or time.perf_counter() - start
+            timings['sequential'].append((first, time.perf_counter() - start))
+            connection.close()
+
+            connection = http.client.HTTPConnection("127.0.0.1", proxy.port, timeout=120)
+            start = time.perf_counter()
+            connection.request("GET", f"/chunks?keys={keys}&patterns=0")
+            response = connection.getresponse()
+            response.readline()
+            first = time.perf_counter() - start
+            response.read()
+            timings['batch'].append((first, time.perf_counter() - start))
+            connection.close()
+    finally:
+        if proxy:
+            proxy.close()
+        server.terminate()
+        server.wait()
+    return {name: (statistics.median(f for f, _ in runs), statistics.median(t for _, t in runs))
+            for name, runs in timings.items()}
+
+
+def print_batch_bench(results):
+    for name, (first, total) in results.items():
+        print(f"{name:<11} first chunk {first * 1000:8.1f} ms  all nine {total * 1000:8.1f} ms")
+
+
+def route_bench(rtt=0.05, flights=5, distance=9600, seed=0):
+    """Stall at the destination of a Code button jump: the old teleport against the /route flight.
+
+    A teleport fetches the destination's 3x3 block as one /chunks batch once the
+    ship is already there, so the whole fetch is the stall. A flight of
+    `distance` world units streams its chunks from /route while the ship
+    travels; its stall is how far the last destination chunk lands after the
+    flight ends. Every jump goes to fresh coordinates, so generation is timed
+    too, behind a LatencyProxy adding `rtt` seconds per round trip. Returns
+    {way: (median stall seconds, chunks that landed after their ETA, chunks)}.
+    """
+    port = free_port()
+    server = subprocess.Popen([sys.executable, XEIL, 'serve', '--port', str(port)],
+                              stdout=subprocess.DEVNULL)
+    rng = random.Random(seed)
+    stalls = {'teleport': [], 'route': []}
+    late = {'teleport': 0, 'route': 0}
+    counts = {'teleport': 0, 'route': 0}
+    proxy = None
+    try:
+        wait_for_port(port)
+        proxy = LatencyProxy(port, rtt)
+        for flight in range(flights):
+            x0, y0 = rng.uniform(-1e8, 1e8), rng.uniform(-1e8, 1e8)
+            angle = rng.random() * 2 * math.pi
+            x1, y1 = x0 + distance * math.cos(angle), y0 + distance * math.sin(angle)
+            cx, cy = math.floor(x1 / galaxy.CHUNK_SIZE), math.floor(y1 / galaxy.CHUNK_SIZE)
+            block = [(cx + dx, cy + dy) for dy in (-1, 0, 1) for dx in (-1, 0, 1)]
+
+            keys = ';'.join(f"{x},{y}" for x, y in block)
+            connection = http.client.HTTPConnection("127.0.0.1", proxy.port, timeout=120)
+            start = time.perf_counter()
+            connection.request("GET", f"/chunks?keys={keys}&patterns=0")
+            connection.getresponse().read()
+            stalls['teleport'].append(time.perf_counter() - start)
+            late['teleport'] += len(block)
+            counts['teleport'] += len(block)
+            connection.close()
+
+            # The route flies the same way from a start shifted clear of the teleport's chunks
+            shift = 4 * galaxy.CHUNK_SIZE
+            x0, y0, x1, y1 = x0 + shift, y0 + shift, x1 + shift, y1 + shift
+            cx, cy = math.floor(x1 / galaxy.CHUNK_SIZE), math.floor(y1 / galaxy.CHUNK_SIZE)
+            block = {(cx + dx, cy + dy) for dy in (-1, 0, 1) for dx in (-1, 0, 1)}
+            connection = http.client.HTTPConnection("127.0.0.1", proxy.port, timeout=120)
+            start = time.perf_counter()
+            connection.request("GET", f"/route?from={x0},{y0}&to={x1},{y1}&id=bench-{flight}&patterns=0")
+            response = connection.getresponse()
+            plan = json.loads(response.readline())
+            etas = {(x, y): eta / 1000 for x, y, eta in plan['chunks']}
+            last = 0.0
+            for line in response:
+                chunk = json.loads(line)
+                if 'stars' not in chunk:
+                    continue
+                landed = time.perf_counter() - start
+                key = (chunk['cx'], chunk['cy'])
+                counts['route'] += 1
+                late['route'] += landed > etas[key]
+                if key in block:
+                    last = max(last, landed)
+            stalls['route'].append(max(0.0, last - plan['duration'] / 1000))
+            connection.close()
+    finally:
+        if proxy:
+            proxy.close()
+        server.terminate()
+        server.wait()
+    return {way: (statistics.median(stalls[way]), late[way], counts[way]) for way in stalls}
+
+
+def print_route_bench(results):
+    for way, (stall, late, count) in results.items():
+        print(f"{way:<9} stall at destination {stall * 1000:8.1f} ms  {late}/{count} chunks after their ETA")
+
+
+def dict_bench(chunk_count=4, pattern_chunks=8, seed=1):
+    """Compression ratio and per-payload encode/decode time, with and without the preset dictionary.
+
+    Payloads come from coordinates the dictionary was not built from. Returns
+    {(kind, encoding): (mean raw bytes, ratio, encode seconds, decode seconds)}.
+    """
+    dictionary = compression.Dictionary.build()
+    rng = random.Random(seed)
+    payloads = {
+        'pattern': compression.sample_payloads(pattern_chunks, seed),
+        'chunk': [chunks.encode_chunk(galaxy.generate_chunk(rng.randrange(-10**6, 10**6), rng.randrange(-10**6, 10**6)))
+                  for _ in range(chunk_count)],
+    }
+    codecs = {
+        'gzip': (lambda data: gzip.compress(data, compression.LEVEL), gzip.decompress),
+        'zlib': (lambda data: zlib.compress(data, compression.LEVEL), zlib.decompress),
+        compression.ENCODING: (dictionary.compress, dictionary.decompress),
+    }
+    results = {}
+    for kind, samples in payloads.items():
+        raw = sum(len(payload) for payload in samples)
+        for name, (compress, decompress) in codecs.items():
+            start = time.perf_counter()
+            packed = [compress(payload) for payload in samples]
+            encode_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            for data in packed:
+                decompress(data)
+            decode_seconds = time.perf_counter() - start
+            results[kind, name] = (raw / len(samples), sum(len(data) for data in packed) / raw,
+                                   encode_seconds / len(samples), decode_seconds / len(samples))
+    return dictionary, results
+
+
+def print_dict_bench(dictionary, results):
+    print(f"dictionary {dictionary.version}: {len(dictionary.data)} bytes from {dictionary.samples} patterns")
+    for (kind, name), (size, ratio, encode_seconds, decode_seconds) in results.items():
+        print(f"{kind:<8} {name:<8} {size:9.0f} bytes  ratio {ratio:6.1%}  "
+              f"encode {encode_seconds * 1e6:9.1f} us  decode {decode_seconds * 1e6:8.1f} us")
+
+
+def print_restart_bench(chunk_count, results):
+    print(f"{chunk_count} distinct chunks in the working set")
+    for mode, result in results.items():
+        before, after = result['before'], result['after']
+        print(f"{mode:<9} new server ready in {result['ready_seconds']:5.2f}s | {result['failed']}/"
+              f"{result['served'] + result['failed']} requests failed during the restart | working set "
+              f"{before['seconds']:6.2f}s cold start, {after['seconds']:6.2f}s after restart "
+              f"(p99 {after['p99'] * 1000:7.1f} ms, hit rate {after['hit_rate']:6.1%})")
+
+
+def print_cache_bench(result):
+    print(f"{result['workers']:>3} workers {result['cache']:<8} | {result['requests']} requests, "
+          f"{result['distinct']} distinct chunks | hit rate {result['hit_rate']:6.1%} | "
+          f"{result['requests_per_second']:7.1f} req/s | RSS {result['rss'] / 2**20:7.1f} MiB, "
+          f"PSS {result['pss'] / 2**20:7.1f} MiB")
@@ -0,0 +1,170 @@
+# Chunk payloads served by xeil.py: JSON encoding of galaxy.Chunk and an LRU cache of encoded chunks.
+import collections
+import json
+import math
+import threading
+import time
+
+import galaxy
+import metrics
+from seeds import pack_key, unpack_key
+
+CACHE_CHUNKS = 256  # ~256 encoded chunks is on the order of 150 MB
+PATTERN_CACHE_BODIES = 20000
+SCAN_CARD_CHUNKS = 1024  # a chunk's cards encode to ~12 KB
+REDUCED_CACHE_CHUNKS = 64  # per density below full, for the page's low quality tiers
+
+# An export.Region set by `serve --data`; chunks it covers are read from its files instead of generated
+SOURCE = None
+
+
+def encode_chunk(chunk):
+    """Columnar JSON for one chunk; blink offsets are relative to the client's clock."""
+    return json.dumps({
+        'cx': chunk.cx,
+        'cy': chunk.cy,
+        'stars': {
+            'x': chunk.x.tolist(),
+            'y': chunk.y.tolist(),
+            'brightness': chunk.brightness.tolist(),
+            'chars': chunk.chars,
+            'blinkSpeed': chunk.blink_speed.tolist(),
+            'blinkOffset': chunk.blink_offset.tolist(),
+        },
+        'planets': chunk.planets,
+    }, separators=(',', ':')).encode('utf-8')
+
+
+def build_chunk(cx, cy, patterns=True, density=1.0):
+    """galaxy.generate_chunk() (or only the descriptors), from SOURCE when it covers the chunk."""
+    chunk = SOURCE.chunk(cx, cy, density) if SOURCE is not None else None
+    if chunk is None:
+        if patterns:
+            return galaxy.generate_chunk(cx, cy, density)
+        return galaxy.generate_chunk_descriptors(cx, cy, density)
+    if patterns:
+        for planet in chunk.planets:
+            for moon in planet['moons']:
+                galaxy.ensure_pattern(moon)
+            galaxy.ensure_pattern(planet)
+    return chunk
+
+
+class LRUCache:
+    """Thread-safe mapping that evicts the least recently used entry past `capacity`."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+
+    def items(self):
+        """(key, value) pairs from least to most recently used, for a snapshot."""
+        with self.lock:
+            return list(self.entries.items())
+
+    def restore(self, items):
+        for key, value in items:
+            self.put(key, value)
+
+
+class ChunkCache(LRUCache):
+    """Encoded chunk payloads keyed by the packed (cx, cy).
+
+    With patterns=False the payload only carries planet/moon descriptors
+    (position, size, moons, pattern RNG state); clients fetch patterns from
+    PatternCache when a body first comes into view. A density below 1 keeps
+    only that share of each chunk's stars.
+    """
+
+    def __init__(self, capacity=CACHE_CHUNKS, patterns=True, density=1.0):
+        super().__init__(capacity)
+        self.patterns = patterns
+        self.density = density
+
+    def fetch(self, cx, cy):
+        """(payload, hit) for a chunk, generating and caching it on a miss."""
+        key = pack_key(cx, cy)
+        payload = self.get(key)
+        if payload is not None:
+            metrics.chunk_cache_hits.inc()
+            return payload, True
+
+        metrics.chunk_cache_misses.inc()
+        start = time.perf_counter()
+        chunk = build_chunk(cx, cy, self.patterns, self.density)
+        payload = encode_chunk(chunk)
+        metrics.chunk_generation_seconds.observe(time.perf_counter() - start)
+        self.put(key, payload)
+        return payload, False
+
+    # Snapshots key chunks by (cx, cy), like shmcache.SharedChunkCache, so either kind restores into the other
+    def items(self):
+        return [(unpack_key(key), payload) for key, payload in super().items()]
+
+    def restore(self, items):
+        for (cx, cy), payload in items:
+            self.put(pack_key(cx, cy), payload)
+
+
+class PatternCache(LRUCache):
+    """Encoded planet/moon patterns keyed by body ID, generated on first request."""
+
+    def __init__(self, capacity=PATTERN_CACHE_BODIES):
+        super().__init__(capacity)
+
+    def fetch(self, body_id):
+        """A body's encoded pattern, generating and caching it on a miss; None for an unknown ID."""
+        payload = self.get(body_id)
+        if payload is None:
+            body = galaxy.descriptor_for_id(body_id)
+            if body is None:
+                return None
+            payload = json.dumps(galaxy.ensure_pattern(body), separators=(',', ':')).encode('utf-8')
+            self.put(body_id, payload)
+        return payload
+
+
+class ScanCardCache(LRUCache):
+    """Encoded scan details of every planet and moon in a chunk, keyed by the packed (cx, cy).
+
+    A card is generatePlanetData() for the body's ID, so the page can show a
+    chunk's scans from one request instead of generating them body by body.
+    """
+
+    def __init__(self, capacity=SCAN_CARD_CHUNKS):
+        super().__init__(capacity)
+
+    def fetch(self, cx, cy):
+        """A chunk's encoded cards, generating and caching them on a miss."""
+        key = pack_key(cx, cy)
+        payload = self.get(key)
+        if payload is None:
+            cards = SOURCE.cards(cx, cy) if SOURCE is not None else None
+            if cards is None:
+                cards = {}
+                for i in range(math.ceil(galaxy.PLANET_COUNT)):
+                    planet = galaxy.planet_descriptor(cx, cy, i)
+                    cards[planet['id']] = galaxy.generate_planet_data(galaxy.hash_string(planet['id']))
+                    for moon in planet['moons']:
+                        cards[moon['id']] = galaxy.generate_planet_data(galaxy.hash_string(moon['id']), True)
+            payload = json.dumps({'cx': cx, 'cy': cy, 'cards': cards}, separators=(',', ':')).encode('utf-8')
+            self.put(key, payload)
+        return payload
@@ -0,0 +1,107 @@
+# Consistent-hash ring that assigns chunk coordinates to xeil.py nodes.
+#
+# Each node is placed on a 64-bit ring at VNODES points; a chunk belongs to the
+# node owning the first point at or after the hash of its key. Adding or
+# removing a node only moves the keys on the arcs next to its points, about
+# 1/N of the galaxy, so every other node keeps its cache.
+import bisect
+import hashlib
+import ipaddress
+import threading
+import urllib.parse
+
+from seeds import pack_key
+
+VNODES = 128
+RING_SIZE = 1 << 64
+# Nodes are xeil.py processes on this machine; the router forwards requests
+# to them and returns their answers as its own, so nothing else may join
+LOCAL_HOSTS = ('localhost', '127.0.0.1', '::1')
+
+
+def parse_node(node):
+    """'http://host:port' for a node on this machine; ValueError for any other URL."""
+    url = urllib.parse.urlsplit(node.rstrip('/'))
+    if url.scheme != 'http' or url.hostname not in LOCAL_HOSTS or url.port is None or \
+            url.path or url.query or url.username or url.password:
+        raise ValueError(f"expected http://localhost:PORT or http://127.0.0.1:PORT, not {node!r}")
+    return f"http://{url.netloc}"
+
+
+def is_loopback(address):
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    mapped = getattr(ip, 'ipv4_mapped', None)
+    return (mapped or ip).is_loopback
+
+
+def ring_hash(data):
+    return int.from_bytes(hashlib.md5(data).digest()[:8], 'big')
+
+
+class HashRing:
+    """Lookups read an immutable (points, owners) snapshot, so they never wait for a join or leave."""
+
+    def __init__(self, nodes=(), vnodes=VNODES):
+        self.vnodes = vnodes
+        self.snapshot = ((), ())
+        self.lock = threading.Lock()
+        for node in nodes:
+            self.add(node)
+
+    @property
+    def nodes(self):
+        return sorted(set(self.snapshot[1]))
+
+    def __len__(self):
+        return len(set(self.snapshot[1]))
+
+    def _rebuild(self, nodes):
+        points = sorted((ring_hash(f"{node}#{i}".encode('utf-8')), node) for node in nodes for i in range(self.vnodes))
+        self.snapshot = (tuple(point for point, _ in points), tuple(node for _, node in points))
+
+    def add(self, node):
+        with self.lock:
+            nodes = set(self.snapshot[1])
+            if node in nodes:
+                return False
+            self._rebuild(nodes | {node})
+            return True
+
+    def remove(self, node):
+        with self.lock:
+            nodes = set(self.snapshot[1])
+            if node not in nodes:
+                return False
+            self._rebuild(nodes - {node})
+            return True
+
+    def node_for_hash(self, h):
+        points, owners = self.snapshot
+        if not points:
+            raise LookupError("the ring has no nodes")
+        return owners[bisect.bisect_left(points, h) % len(points)]
+
+    def node_for(self, cx, cy):
+        return self.node_for_hash(ring_hash(pack_key(cx, cy).to_bytes(8, 'big')))
+
+    def node_for_key(self, key):
+        """Owner of a key that is not a chunk, such as a seeded planet's ID."""
+        return self.node_for_hash(ring_hash(key.encode('utf-8')))
+
+    def shares(self):
+        """Fraction of the ring each node owns."""
+        points, owners = self.snapshot
+        shares = dict.fromkeys(owners, 0.0)
+        for i, point in enumerate(points):
+            previous = points[i - 1] if i else points[-1] - RING_SIZE
+            shares[owners[i]] += (point - previous) / RING_SIZE
+        return shares
+
+
+def moved_fraction(before, after, keys):
+    """Share of `keys` ((cx, cy) pairs) that map to a different node in `after` than in `before`."""
+    moved = sum(before.node_for(cx, cy) != after.node_for(cx, cy) for cx, cy in keys)
+    return moved / len(keys)
@@ -0,0 +1,142 @@
+# Preset-dictionary compression for chunk and pattern payloads served by xeil.py.
+#
+# A small payload gives zlib almost no history to match against, so most of
+# its glyph, colour and key strings are sent literally. A zlib `zdict` primes
+# the window with the strings payloads share. The dictionary is built from
+# bodies generated at fixed sample coordinates, so every worker and node
+# builds the same bytes and therefore the same version.
+#
+# Negotiation follows HTTP compression dictionary transport: a client that
+# holds /dict/<version> sends `Available-Dictionary: <version>` and lists
+# x-zdict in Accept-Encoding. Anyone else gets gzip or identity, plus a Link
+# header pointing at the current dictionary.
+import collections
+import hashlib
+import json
+import random
+import time
+import zlib
+
+import galaxy
+import metrics
+from chunks import LRUCache
+
+ENCODING = 'x-zdict'
+DICT_BYTES = 32 * 1024  # zlib only looks back 32 KB, so a longer dictionary is never used
+DICT_SAMPLE_CHUNKS = 8
+DICT_NGRAM = 32
+DICT_MIN_DOCUMENTS = 3  # a string must recur across payloads to earn a place
+LEVEL = 6
+COMPRESSED_CACHE_ENTRIES = 64  # compressed full chunks are ~190 KB
+
+
+def sample_payloads(chunk_count=DICT_SAMPLE_CHUNKS, seed=0):
+    """Pattern payloads of every body in `chunk_count` chunks at seeded coordinates."""
+    rng = random.Random(seed)
+    payloads = []
+    for _ in range(chunk_count):
+        chunk = galaxy.generate_chunk_descriptors(rng.randrange(-10**6, 10**6), rng.randrange(-10**6, 10**6))
+        for planet in chunk.planets:
+            for body in [planet] + planet['moons']:
+                pattern = galaxy.ensure_pattern(galaxy.descriptor_for_id(body['id']))
+                payloads.append(json.dumps(pattern, separators=(',', ':')).encode('utf-8'))
+    return payloads
+
+
+def build_dictionary(samples, size=DICT_BYTES, ngram=DICT_NGRAM):
+    """The `ngram`-byte strings found in the most samples, packed into `size` bytes.
+
+    zlib codes nearer matches more cheaply, so the most common strings go last,
+    next to where the payload starts.
+    """
+    documents = collections.Counter()
+    for payload in samples:
+        documents.update({payload[i:i + ngram] for i in range(len(payload) - ngram + 1)})
+    common = [(-count, text) for text, count in documents.items() if count >= DICT_MIN_DOCUMENTS]
+    picked = []
+    total = 0
+    # Ties are broken on the bytes so every process picks the same strings whatever its hash seed
+    for _, text in sorted(common):
+        if total >= size:
+            break
+        picked.append(text)
+        total += len(text)
+    return b''.join(reversed(picked))[-size:]
+
+
+class Dictionary:
+    """A preset dictionary and its version, the first 12 hex digits of its SHA-1."""
+
+    def __init__(self, data, samples=0):
+        self.data = data
+        self.samples = samples
+        self.version = hashlib.sha1(data).hexdigest()[:12]
+
+    @classmethod
+    def build(cls, chunk_count=DICT_SAMPLE_CHUNKS, seed=0):
+        samples = sample_payloads(chunk_count, seed)
+        return cls(build_dictionary(samples), len(samples))
+
+    def compress(self, payload, level=LEVEL):
+        compressor = zlib.compressobj(level, zdict=self.data)
+        return compressor.compress(payload) + compressor.flush()
+
+    def decompress(self, data):
+        decompressor = zlib.decompressobj(zdict=self.data)
+        return decompressor.decompress(data) + decompressor.flush()
+
+
+def _accepted_encodings(accept_encoding):
+    """The codings an Accept-Encoding header accepts; q=0, or a q that does not parse, refuses one."""
+    accepted = set()
+    for token in (accept_encoding or '').split(','):
+        coding, *params = [part.strip().lower() for part in token.split(';')]
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding and 0 < q <= 1:
+            accepted.add(coding)
+    return accepted
+
+
+def negotiate(accept_encoding, available_dictionary, dictionary):
+    """The Content-Encoding to answer with, or None for identity."""
+    accepted = _accepted_encodings(accept_encoding)
+    if dictionary is not None and ENCODING in accepted and available_dictionary == dictionary.version:
+        return ENCODING
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+def encode(payload, encoding, dictionary):
+    start = time.perf_counter()
+    if encoding == ENCODING:
+        body = dictionary.compress(payload)
+    else:
+        compressor = zlib.compressobj(LEVEL, zlib.DEFLATED, 31)  # wbits 31 writes a gzip header
+        body = compressor.compress(payload) + compressor.flush()
+    metrics.compression_seconds.observe(time.perf_counter() - start, encoding)
+    metrics.compression_input_bytes.inc(encoding, amount=len(payload))
+    metrics.compression_output_bytes.inc(encoding, amount=len(body))
+    return body
+
+
+class CompressedCache(LRUCache):
+    """Compressed bodies keyed by (payload key, encoding), so a cached chunk is compressed once."""
+
+    def __init__(self, capacity=COMPRESSED_CACHE_ENTRIES):
+        super().__init__(capacity)
+
+    def fetch(self, key, payload, encoding, dictionary):
+        """payload compressed with encoding, compressing and caching it on a miss."""
+        body = self.get((key, encoding))
+        if body is None:
+            body = encode(payload, encoding, dictionary)
+            self.put((key, encoding), body)
+        return body
@@ -0,0 +1,291 @@
+# Columnar export of generated regions as .npy files, and a read-only data source over them.
+#
+# A region of chunks is written one chunk row at a time into three tables,
+# each a directory of 1-d .npy columns:
+#   stars/    STAR_TOTAL rows per chunk, in chunk order
+#   planets/  PLANETS_PER_CHUNK rows per chunk, descriptor and scan columns
+#   moons/    every moon in planet order, found through planets/moon_start
+# Chunks are ordered row by row over the region, so chunk k's stars and
+# planets are plain slices and nothing needs an index. The .npy header is
+# written with room for any row count and filled in when the column closes,
+# so a column is appended to without knowing its length. numpy readers can
+# np.load(path, mmap_mode='r'). Region maps the same files with mmap and
+# serves chunks and scan cards from them, which `serve --data` uses instead
+# of generating.
+import ast
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+import galaxy
+import seeds
+
+FORMAT = 1
+MAGIC = b'\x93NUMPY'
+HEADER_BYTES = 128  # magic, version, length and header dict, space-padded so any row count fits
+PLANETS_PER_CHUNK = math.ceil(galaxy.PLANET_COUNT)
+NAME_BYTES = 16  # 'Celestia-999'
+SPECIES_BYTES = 48  # the longest descriptor + subcategory + category is 44
+
+# array typecode -> .npy descr; strings are stored as fixed-width bytes, NUL padded
+DESCRS = {'b': '|i1', 'B': '|u1', 'h': '<i2', 'i': '<i4', 'I': '<u4', 'q': '<i8', 'd': '<f8'}
+STAR_COLUMNS = (('x', 'd'), ('y', 'd'), ('brightness', 'b'), ('char', 'B'), ('blink_speed', 'd'), ('blink_offset', 'd'))
+SCAN_COLUMNS = (('life', 'B'), ('population', 'q'), ('temperature', 'h'), ('age', 'd'),
+                ('name', f'S{NAME_BYTES}'), ('species', f'S{SPECIES_BYTES}'))
+PLANET_COLUMNS = (('cx', 'i'), ('cy', 'i'), ('index', 'B'), ('x', 'd'), ('y', 'd'), ('size', 'B'),
+                  ('pattern_state', 'I'), ('moon_start', 'q'), ('moon_count', 'B')) + SCAN_COLUMNS
+MOON_COLUMNS = (('planet', 'q'), ('index', 'B'), ('size', 'B'), ('orbit_radius', 'd'), ('orbit_angle', 'd'),
+                ('ephemeris_phase', 'd'), ('pattern_state', 'I')) + SCAN_COLUMNS
+TABLES = {'stars': STAR_COLUMNS, 'planets': PLANET_COLUMNS, 'moons': MOON_COLUMNS}
+
+
+def npy_header(descr, rows):
+    text = "{'descr': %r, 'fortran_order': False, 'shape': (%d,), }" % (descr, rows)
+    text = text.ljust(HEADER_BYTES - 10 - 1) + '\n'
+    return MAGIC + b'\x01\x00' + struct.pack('<H', len(text)) + text.encode('latin1')
+
+
+def column_descr(kind):
+    return f'|{kind}' if kind.startswith('S') else DESCRS[kind]
+
+
+class NpyWriter:
+    """A 1-d .npy column written in appends; close() fills in the row count."""
+
+    def __init__(self, path, kind):
+        self.kind = kind
+        self.rows = 0
+        self.file = open(path, 'wb')
+        self.file.write(npy_header(column_descr(kind), 0))
+
+    def append(self, values):
+        if self.kind.startswith('S'):
+            width = int(self.kind[1:])
+            data = b''.join(value.encode('ascii').ljust(width, b'\0') for value in values)
+            if len(data) != width * len(values):
+                raise ValueError(f"a value is longer than {width} bytes")
+        else:
+            column = array(self.kind, values)
+            if sys.byteorder == 'big':
+                column.byteswap()
+            data = column.tobytes()
+        self.file.write(data)
+        self.rows += len(values)
+
+    def close(self):
+        self.file.seek(0)
+        self.file.write(npy_header(column_descr(self.kind), self.rows))
+        self.file.close()
+
+
+def open_npy(path):
+    """(descr, rows, read-only mmap, offset of the first row) of a 1-d .npy file."""
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if mapped[:6] != MAGIC:
+        raise ValueError(f"{path} is not a .npy file")
+    if mapped[6] == 1:
+        (length,), start = struct.unpack_from('<H', mapped, 8), 10
+    else:
+        (length,), start = struct.unpack_from('<I', mapped, 8), 12
+    header = ast.literal_eval(mapped[start:start + length].decode('latin1'))
+    if header['fortran_order'] or len(header['shape']) != 1:
+        raise ValueError(f"{path} is not a 1-d column")
+    return header['descr'], header['shape'][0], mapped, start + length
+
+
+class Column:
+    """A mapped .npy column; slice() copies rows out without parsing anything."""
+
+    def __init__(self, path, kind):
+        descr, self.rows, self.map, self.offset = open_npy(path)
+        if descr != column_descr(kind):
+            raise ValueError(f"{path} holds {descr}, expected {column_descr(kind)}")
+        self.kind = kind
+        self.width = int(kind[1:]) if kind.startswith('S') else array(kind).itemsize
+
+    def slice(self, start, stop):
+        data = self.map[self.offset + start * self.width:self.offset + stop * self.width]
+        if self.kind.startswith('S'):
+            return [data[i:i + self.width].rstrip(b'\0').decode('ascii') for i in range(0, len(data), self.width)]
+        values = array(self.kind)
+        values.frombytes(data)
+        if sys.byteorder == 'big':
+            values.byteswap()
+        return values
+
+
+def scan_row(card):
+    """A generatePlanetData() card as the values of SCAN_COLUMNS."""
+    return (card['lifeForm'] == 'Yes', int(card['population'].replace(',', '')), int(card['temperature'][:-2]),
+            float(card['age'].split()[0]), card['name'], card['species'])
+
+
+def scan_card(life, population, temperature, age, name, species):
+    return {
+        'name': name,
+        'lifeForm': "Yes" if life else "No",
+        'population': f"{population:,}",
+        'temperature': f"{temperature}°C",
+        'age': f"{galaxy.to_fixed(age, 2)} billion years",
+        'species': species,
+    }
+
+
+def export(region, out, progress=None):
+    """Write chunks [x0, x1) x [y0, y1) of region under `out`, one chunk row at a time.
+
+    The manifest is rewritten after each row, so a reader can tell how far an
+    unfinished export got; 'complete' is only set once every column is closed.
+    progress(rows done, rows) is called after each row.
+    """
+    x0, y0, x1, y1 = region
+    for table in TABLES:
+        os.makedirs(os.path.join(out, table), exist_ok=True)
+    writers = {table: {name: NpyWriter(os.path.join(out, table, f"{name}.npy"), kind) for name, kind in columns}
+               for table, columns in TABLES.items()}
+    planets_written = 0
+    moons_written = 0
+    for cy in range(y0, y1):
+        for cx in range(x0, x1):
+            chunk = galaxy.generate_chunk_descriptors(cx, cy)
+            stars = writers['stars']
+            stars['x'].append(chunk.x)
+            stars['y'].append(chunk.y)
+            stars['brightness'].append(chunk.brightness)
+            stars['char'].append(chunk.chars.encode('ascii'))
+            stars['blink_speed'].append(chunk.blink_speed)
+            stars['blink_offset'].append(chunk.blink_offset)
+
+            planet_ids = seeds.body_id_prefix('planet', cx, cy)
+            moon_ids = seeds.body_id_prefix('moon', cx, cy)
+            planet_rows = []
+            moon_rows = []
+            for i, planet in enumerate(chunk.planets):
+                card = galaxy.generate_planet_data(seeds.planet_id_seed(planet_ids, i))
+                planet_rows.append((cx, cy, i, planet['x'], planet['y'], planet['size'], planet['patternState'],
+                                    moons_written + len(moon_rows), len(planet['moons'])) + scan_row(card))
+                for m, moon in enumerate(planet['moons']):
+                    card = galaxy.generate_planet_data(seeds.moon_id_seed(moon_ids, i, m), True)
+                    moon_rows.append((planets_written + i, m, moon['size'], moon['orbitRadius'], moon['orbitAngle'],
+                                      moon['ephemerisPhase'], moon['patternState']) + scan_row(card))
+            for table, rows in (('planets', planet_rows), ('moons', moon_rows)):
+                for (name, _), values in zip(TABLES[table], zip(*rows) if rows else [()] * len(TABLES[table])):
+                    writers[table][name].append(values)
+            planets_written += len(planet_rows)
+            moons_written += len(moon_rows)
+        write_manifest(out, region, writers, (cy - y0 + 1) * (x1 - x0), complete=False)
+        if progress:
+            progress(cy - y0 + 1, y1 - y0)
+    for columns in writers.values():
+        for writer in columns.values():
+            writer.close()
+    write_manifest(out, region, writers, (x1 - x0) * (y1 - y0), complete=True)
+
+
+def write_manifest(out, region, writers, chunks_written, complete):
+    manifest = {
+        'format': FORMAT,
+        'region': list(region),
+        'chunkOrder': 'row-major',
+        'chunkSize': galaxy.CHUNK_SIZE,
+        'starsPerChunk': galaxy.STAR_TOTAL,
+        'planetsPerChunk': PLANETS_PER_CHUNK,
+        'chunksWritten': chunks_written,
+        'complete': complete,
+        'tables': {table: {'rows': next(iter(columns.values())).rows,
+                           'columns': {name: {'file': f"{table}/{name}.npy", 'dtype': column_descr(writer.kind)}
+                                       for name, writer in columns.items()}}
+                   for table, columns in writers.items()},
+    }
+    temporary = os.path.join(out, 'manifest.json.tmp')
+    with open(temporary, 'w') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(temporary, os.path.join(out, 'manifest.json'))
+
+
+class Region:
+    """A finished export, mapped read-only; chunk() and cards() answer for the chunks it covers, else None."""
+
+    def __init__(self, directory):
+        with open(os.path.join(directory, 'manifest.json')) as f:
+            manifest = json.load(f)
+        if manifest.get('format') != FORMAT or not manifest.get('complete'):
+            raise ValueError(f"{directory} is not a complete format {FORMAT} export")
+        if (manifest['chunkSize'], manifest['starsPerChunk'], manifest['planetsPerChunk']) != \
+                (galaxy.CHUNK_SIZE, galaxy.STAR_TOTAL, PLANETS_PER_CHUNK):
+            raise ValueError(f"{directory} was exported by a different generator")
+        self.x0, self.y0, self.x1, self.y1 = manifest['region']
+        self.tables = {table: {name: Column(os.path.join(directory, table, f"{name}.npy"), kind)
+                               for name, kind in columns}
+                       for table, columns in TABLES.items()}
+
+    def index(self, cx, cy):
+        if self.x0 <= cx < self.x1 and self.y0 <= cy < self.y1:
+            return (cy - self.y0) * (self.x1 - self.x0) + (cx - self.x0)
+        return None
+
+    def _rows(self, table, start, stop):
+        columns = self.tables[table]
+        return zip(*(columns[name].slice(start, stop) for name, _ in TABLES[table]))
+
+    def _bodies(self, k):
+        """(planet rows, moon rows) of chunk k."""
+        planets = list(self._rows('planets', k * PLANETS_PER_CHUNK, (k + 1) * PLANETS_PER_CHUNK))
+        first = planets[0][7]
+        last = planets[-1][7] + planets[-1][8]
+        return planets, list(self._rows('moons', first, last))
+
+    def chunk(self, cx, cy, density=1.0):
+        """The galaxy.Chunk generate_chunk_descriptors(cx, cy, density) would build."""
+        k = self.index(cx, cy)
+        if k is None:
+            return None
+        chunk = galaxy.Chunk(cx, cy)
+        start = k * galaxy.STAR_TOTAL
+        stop = start + galaxy.star_count(density)
+        stars = self.tables['stars']
+        chunk.x = stars['x'].slice(start, stop)
+        chunk.y = stars['y'].slice(start, stop)
+        chunk.brightness = stars['brightness'].slice(start, stop)
+        chunk.chars = stars['char'].slice(start, stop).tobytes().decode('ascii')
+        chunk.blink_speed = stars['blink_speed'].slice(start, stop)
+        chunk.blink_offset = stars['blink_offset'].slice(start, stop)
+        planets, moons = self._bodies(k)
+        for _, _, i, x, y, size, pattern_state, moon_start, moon_count, *_ in planets:
+            chunk.planets.append({
+                'id': f"planet-{cx}-{cy}-{i}",
+                'x': x,
+                'y': y,
+                'size': size,
+                'patternState': pattern_state,
+                'moons': [{
+                    'id': f"moon-{cx}-{cy}-{i}-{m}",
+                    'size': moon_size,
+                    'orbitRadius': orbit_radius,
+                    'orbitAngle': orbit_angle,
+                    'ephemerisPhase': ephemeris_phase,
+                    'patternState': moon_state,
+                } for _, m, moon_size, orbit_radius, orbit_angle, ephemeris_phase, moon_state, *_
+                    in moons[moon_start - planets[0][7]:moon_start - planets[0][7] + moon_count]],
+            })
+        return chunk
+
+    def cards(self, cx, cy):
+        """Scan cards by body ID, as chunks.ScanCardCache builds them."""
+        k = self.index(cx, cy)
+        if k is None:
+            return None
+        planets, moons = self._bodies(k)
+        first = planets[0][7]
+        cards = {}
+        for row in planets:
+            i, moon_start, moon_count = row[2], row[7], row[8]
+            cards[f"planet-{cx}-{cy}-{i}"] = scan_card(*row[9:])
+            for moon in moons[moon_start - first:moon_start - first + moon_count]:
+                cards[f"moon-{cx}-{cy}-{i}-{moon[1]}"] = scan_card(*moon[7:])
+        return cards
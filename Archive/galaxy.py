@@ -0,0 +1,549 @@
+# Python port of the procedural generator from the page in xeil.py.
+# Everything here mirrors the JavaScript draw-for-draw, so a chunk generated
+# here is the same chunk the browser builds for the same coordinates.
+import math
+import random
+import re
+from array import array
+from decimal import Decimal, ROUND_HALF_UP
+
+from seeds import chunk_seed, moon_seed, planet_seed
+
+CHUNK_SIZE = 1000
+STAR_DENSITY = 0.005
+PLANET_DENSITY = 0.00005
+
+MASK32 = 0xFFFFFFFF
+MULBERRY_INCREMENT = 0x6D2B79F5
+
+STAR_COUNT = CHUNK_SIZE * CHUNK_SIZE * STAR_DENSITY
+PLANET_COUNT = CHUNK_SIZE * CHUNK_SIZE * PLANET_DENSITY
+STAR_DRAWS = 6  # chunkRand() calls per star in generateChunk
+STAR_TOTAL = math.ceil(STAR_COUNT)
+# Shares of a chunk's stars the page's quality tiers draw; must match QUALITY_TIERS.
+# Stars are independent draws, so the first ones of a chunk are an even thinning.
+DENSITY_TIERS = (0.25, 0.5, 1.0)
+BODY_ID = re.compile(r'^(planet|moon)-(-?\d+)-(-?\d+)-(\d+)(?:-(\d+))?$')
+
+# Every moon orbits at MOON_ORBIT_SPEED, so one table of the unit circle serves
+# them all; a moon's ephemerisPhase is its starting angle in table entries.
+MOON_ORBIT_SPEED = 0.0005  # radians per ms
+EPHEMERIS_SAMPLES = 1024  # table entries per orbit; the widest orbits interpolate to within 2e-4 cells
+EPHEMERIS_RATE = MOON_ORBIT_SPEED * EPHEMERIS_SAMPLES / (2 * math.pi)  # table entries per ms
+# One extra entry so interpolating from the last sample needs no wrap
+EPHEMERIS_COS = array('d', (math.cos(2 * math.pi * k / EPHEMERIS_SAMPLES) for k in range(EPHEMERIS_SAMPLES + 1)))
+EPHEMERIS_SIN = array('d', (math.sin(2 * math.pi * k / EPHEMERIS_SAMPLES) for k in range(EPHEMERIS_SAMPLES + 1)))
+
+PLANET_CHARS = ['@', '░', '%', '&', '*', '+', '=', '-', '~', ':', '.']
+COMMON_COLORS = [
+    '#FF5733', '#33FF57', '#3357FF', '#F3FF33', '#FF33F3',
+    '#33FFF3', '#8A2BE2', '#FF6347', '#7CFC00', '#FFD700',
+    '#FF8C00', '#E6E6FA', '#40E0D0', '#F08080', '#90EE90'
+]
+WHITE_PINK_COLORS = [
+    '#FFFFFF', '#F8F8F8', '#F0F0F0',
+    '#FFC0CB', '#FFB6C1', '#FFD1DC'
+]
+PLANET_NAMES = ["Xylos", "Aelon", "Veridian", "Obsidian", "Celestia", "Aethel", "Solara", "Lunara", "Titanus", "Zephyr", "Astra", "Cosmos", "Orion", "Lyra", " Lilith", "Nebula", "Terra", "Yeawn", " Eudes", "Xia", " Caleb", "Sylus", " Zayne", "Rafayel", " Xavier", "Calypso", "Aether", " Lumine"]
+MOON_NAMES = ["Lune", "Phobos", "Elxi", "Miranda", "Tsuko", "Io", "Callisto", "Triton", "Elxi", "Oberon", "Hae", "Elxi", "Umbriel", "Paimon", "Ariel", "Rhea", "Iapetus", "Daiso"]
+SPECIES_CATEGORIES = ['Flora', 'Fauna', 'Fungi', 'Microbial', 'Sentient']
+SPECIES_SUBCATEGORIES = {
+    'Flora': ['Photosynthetic', 'Chemosynthetic', 'Carnivorous', 'Arboreal', 'Aquatic'],
+    'Fauna': ['Mammalian', 'Reptilian', 'Avian', 'Insectoid', 'Aquatic', 'Amphibious'],
+    'Fungi': ['Mycorrhizal', 'Saprophytic', 'Parasitic', 'Symbiotic'],
+    'Microbial': ['Bacterial', 'Viral', 'Archaeal', 'Protist'],
+    'Sentient': ['Bipedal', 'Quadrupedal', 'Avianoid', 'Aquatic-Intelligent']
+}
+SPECIES_DESCRIPTORS = ['Bio-luminescent', 'Cryo-tolerant', 'Hydrophilic', 'Xenomorphic', 'Symbiotic', 'Silicate-based', 'Carbon-based', 'Silicon-based']
+
+
+class Mulberry32:
+    """Seeded PRNG, same output as mulberry32() in the page."""
+    __slots__ = ('state',)
+
+    def __init__(self, seed):
+        self.state = seed & MASK32
+
+    def __call__(self):
+        a = self.state = (self.state + MULBERRY_INCREMENT) & MASK32
+        t = ((a ^ (a >> 15)) * (a | 1)) & MASK32
+        t ^= t >> 13
+        return t / 4294967296
+
+    @classmethod
+    def jumped(cls, seed, draws):
+        """The generator Mulberry32(seed) becomes after `draws` calls, in O(1)."""
+        return cls(seed + draws * MULBERRY_INCREMENT)
+
+
+def mulberry32_at(seed, k):
+    """The k-th (0-based) output of Mulberry32(seed) without drawing the ones before it.
+
+    The state only ever grows by MULBERRY_INCREMENT, so the state for draw k
+    is seed + (k + 1) * MULBERRY_INCREMENT; the rest is the output mix.
+    """
+    a = (seed + (k + 1) * MULBERRY_INCREMENT) & MASK32
+    t = ((a ^ (a >> 15)) * (a | 1)) & MASK32
+    return (t ^ (t >> 13)) / 4294967296
+
+
+def js_round(value):
+    """Math.round(): halves round up, not to even."""
+    return math.floor(value + 0.5)
+
+
+def to_fixed(value, digits):
+    """Number.prototype.toFixed() for the non-negative values we format."""
+    return str(Decimal(value).quantize(Decimal(1).scaleb(-digits), rounding=ROUND_HALF_UP))
+
+
+def hash_string(s):
+    """hashString() from the page: Java-style string hash over UTF-16 code units."""
+    h = 0
+    data = s.encode('utf-16-le')
+    for i in range(0, len(data), 2):
+        h = ((h << 5) - h + (data[i] | data[i + 1] << 8)) & MASK32
+    if h & 0x80000000:
+        h -= 0x100000000
+    return abs(h)
+
+
+def generate_species(rand, planet_name=None):
+    if planet_name and planet_name.lower() == 'ollivia':
+        return "Aesthetiflora (Luminescent, Harmonious Ecosystem)"
+
+    category = SPECIES_CATEGORIES[math.floor(rand() * len(SPECIES_CATEGORIES))]
+    subs = SPECIES_SUBCATEGORIES[category]
+    sub_category = subs[math.floor(rand() * len(subs))]
+    descriptor = SPECIES_DESCRIPTORS[math.floor(rand() * len(SPECIES_DESCRIPTORS))]
+    return f"{descriptor} {sub_category} {category}"
+
+
+def generate_planet_data(seed, is_moon=False, specific_name=None):
+    """Scan results for a planet or moon, as shown in the scan overlay."""
+    rand = Mulberry32(seed)
+
+    has_life = rand() > 0.65
+    population = math.floor(rand() * 10000000000) if has_life else 0
+
+    temp_base = -100 + rand() * 200
+    if is_moon:
+        temp_base += (rand() - 0.5) * 50
+    temp_variation = rand() * 50 - 25
+    temperature = js_round(temp_base + temp_variation)
+
+    age_billion_years = (rand() * 10) + 1
+    age_string = f"{to_fixed(age_billion_years, 2)} billion years"
+
+    if specific_name:
+        name = specific_name
+    elif is_moon:
+        name = MOON_NAMES[math.floor(rand() * len(MOON_NAMES))] + "-" + str(math.floor(rand() * 9))
+    else:
+        name = PLANET_NAMES[math.floor(rand() * len(PLANET_NAMES))] + "-" + str(math.floor(rand() * 999))
+
+    if name.lower() == 'ollivia':
+        has_life = True
+        if population == 0:
+            population = math.floor(rand() * 5000000000) + 100000000
+        rand()  # tempBase is re-rolled in the page but never used again
+
+    species = generate_species(rand, name) if has_life else "None"
+
+    return {
+        'name': name,
+        'lifeForm': "Yes" if has_life else "No",
+        'population': f"{population:,}",
+        'temperature': f"{temperature}°C",
+        'age': age_string,
+        'species': species
+    }
+
+
+def mix_colors(color1, color2, weight):
+    r1, g1, b1 = int(color1[1:3], 16), int(color1[3:5], 16), int(color1[5:7], 16)
+    r2, g2, b2 = int(color2[1:3], 16), int(color2[3:5], 16), int(color2[5:7], 16)
+    r = js_round(r1 * weight + r2 * (1 - weight))
+    g = js_round(g1 * weight + g2 * (1 - weight))
+    b = js_round(b1 * weight + b2 * (1 - weight))
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+
+def get_random_planet_char(rand):
+    return PLANET_CHARS[math.floor(rand() * len(PLANET_CHARS))]
+
+
+def get_random_color(rand):
+    if rand() < 0.35:
+        return WHITE_PINK_COLORS[math.floor(rand() * len(WHITE_PINK_COLORS))]
+    return COMMON_COLORS[math.floor(rand() * len(COMMON_COLORS))]
+
+
+def generate_planet_pattern(size, is_moon=False, specific_name=None, rand=None):
+    """ASCII pattern rows for a body, each {'line': chars, 'colors': 'c1|c2|...|'}."""
+    if rand is None:
+        rand = random.random
+
+    pattern = []
+    center = size / 2
+    max_dist = center * center
+
+    has_rings = not is_moon and rand() > 0.7
+    is_gas_giant = rand() > 0.5
+    crater_count = math.floor(rand() * 5) + 1
+
+    if specific_name and specific_name.lower() == 'ollivia':
+        base_color, secondary_color, highlight_color = '#FFC0CB', '#FFFFFF', '#F0F0F0'
+    else:
+        base_color = get_random_color(rand)
+        secondary_color = get_random_color(rand)
+        highlight_color = get_random_color(rand)
+
+    craters = []
+    for _ in range(crater_count):
+        craters.append((
+            rand() * size - center,
+            rand() * size - center,
+            rand() * (size / 4) + 1
+        ))
+
+    # Mixed colours only depend on the palette, so work them out once per body
+    peak_color = mix_colors(base_color, '#ffffff', 0.7)
+    ridge_color = mix_colors(base_color, secondary_color, 0.5)
+    basin_color = mix_colors(base_color, '#000000', 0.3)
+
+    y = -center
+    while y < center:
+        line = []
+        colors = []
+        x = -center
+        while x < center:
+            dist = x * x + y * y
+
+            if dist > max_dist:
+                if has_rings and abs(y) < 2 and dist < max_dist * 1.5 and dist > max_dist * 0.8:
+                    ring_char = '=' if rand() > 0.7 else '+' if rand() > 0.7 else '-'
+                    line.append(ring_char)
+                    colors.append(highlight_color + '|')
+                else:
+                    line.append(' ')
+                    colors.append('|')
+            elif is_gas_giant:
+                rand()  # noise draw; both branches in the page pick a random char
+                angle = math.atan2(y, x)
+                dist_factor = dist / max_dist
+
+                if math.sin(angle * 5 + dist_factor * 10) > 0.7:
+                    color = highlight_color
+                elif math.sin(angle * 3 + dist_factor * 15) > 0.5:
+                    color = secondary_color
+                else:
+                    color = base_color
+
+                line.append(get_random_planet_char(rand))
+                colors.append(color + '|')
+            else:
+                in_crater = False
+                for crater_x, crater_y, crater_size in craters:
+                    crater_dist = (x - crater_x) * (x - crater_x) + (y - crater_y) * (y - crater_y)
+                    if crater_dist < crater_size * crater_size:
+                        in_crater = True
+                        break
+
+                altitude = 1 - (dist / max_dist)
+
+                if in_crater:
+                    char = 'o' if rand() > 0.7 else 'O'
+                    color = '#888'
+                elif altitude > 0.9:
+                    char = '^' if rand() > 0.7 else '*'
+                    color = peak_color
+                elif altitude > 0.7:
+                    char = '#' if rand() > 0.7 else '%'
+                    color = ridge_color
+                elif altitude > 0.4:
+                    char = '@' if rand() > 0.7 else '&'
+                    color = base_color
+                else:
+                    char = '~' if rand() > 0.7 else ':'
+                    color = basin_color
+
+                line.append(char)
+                colors.append(color + '|')
+            x += 1
+        pattern.append({'line': ''.join(line), 'colors': ''.join(colors)})
+        y += 1
+
+    return pattern
+
+
+class Chunk:
+    """One generated chunk: stars as parallel columns plus a list of planets.
+
+    Star blink timing is stored as an offset (the page adds Date.now() to it),
+    so the same chunk can be reused at any simulated time.
+    """
+    __slots__ = ('cx', 'cy', 'x', 'y', 'brightness', 'chars', 'blink_speed', 'blink_offset', 'planets')
+
+    def __init__(self, cx, cy):
+        self.cx = cx
+        self.cy = cy
+        self.x = array('d')
+        self.y = array('d')
+        self.brightness = array('b')
+        self.chars = ''
+        self.blink_speed = array('d')
+        self.blink_offset = array('d')
+        self.planets = []
+
+    def __len__(self):
+        return len(self.x)
+
+
+def generate_moon(seed, planet_size, moon_id, pattern_name=None):
+    """Moon descriptor; its pattern is generated later by ensure_pattern()."""
+    moon_rand = Mulberry32(seed)
+    moon_size = math.floor(moon_rand() * 5) + 3
+    orbit_radius = planet_size / 2 + moon_size + moon_rand() * 10
+    orbit_angle = moon_rand() * math.pi * 2
+    moon = {
+        'id': moon_id,
+        'size': moon_size,
+        'orbitRadius': orbit_radius,
+        'orbitAngle': orbit_angle,
+        'ephemerisPhase': orbit_angle * EPHEMERIS_SAMPLES / (2 * math.pi),
+        'patternState': moon_rand.state,
+    }
+    if pattern_name:
+        moon['patternName'] = pattern_name
+    return moon
+
+
+def moon_position(planet, moon, t):
+    """moonPosition(): where a moon is at time t (ms), from the ephemeris table."""
+    p = (moon['ephemerisPhase'] + t * EPHEMERIS_RATE) % EPHEMERIS_SAMPLES
+    i = int(p)
+    f = p - i
+    i %= EPHEMERIS_SAMPLES  # float % gives EPHEMERIS_SAMPLES itself for a tiny negative dividend
+    r = moon['orbitRadius']
+    return (planet['x'] + r * (EPHEMERIS_COS[i] + (EPHEMERIS_COS[i + 1] - EPHEMERIS_COS[i]) * f),
+            planet['y'] + r * (EPHEMERIS_SIN[i] + (EPHEMERIS_SIN[i + 1] - EPHEMERIS_SIN[i]) * f))
+
+
+def system_ephemeris(planet, times):
+    """x and y arrays for each moon of a planet at every time in `times`.
+
+    The table position of each time is found once and shared by every moon,
+    which only adds its own phase.
+    """
+    steps = [t * EPHEMERIS_RATE for t in times]
+    cos, sin = EPHEMERIS_COS, EPHEMERIS_SIN
+    px, py = planet['x'], planet['y']
+    orbits = []
+    for moon in planet['moons']:
+        r = moon['orbitRadius']
+        phase = moon['ephemerisPhase']
+        xs = array('d')
+        ys = array('d')
+        for step in steps:
+            p = (phase + step) % EPHEMERIS_SAMPLES
+            i = int(p)
+            f = p - i
+            i %= EPHEMERIS_SAMPLES  # as in moon_position()
+            xs.append(px + r * (cos[i] + (cos[i + 1] - cos[i]) * f))
+            ys.append(py + r * (sin[i] + (sin[i + 1] - sin[i]) * f))
+        orbits.append((moon, xs, ys))
+    return orbits
+
+
+def planet_descriptor(cx, cy, i):
+    """Position, size, moons and pattern RNG state of planet i in a chunk, without its pattern."""
+    seed = planet_seed(cx, cy, i)
+    planet_rand = Mulberry32(seed)
+
+    x = cx * CHUNK_SIZE + planet_rand() * CHUNK_SIZE
+    y = cy * CHUNK_SIZE + planet_rand() * CHUNK_SIZE
+    size = math.floor(planet_rand() * 20) + 10
+
+    moons = []
+    if planet_rand() > 0.6:
+        num_moons = math.floor(planet_rand() * 3) + 1
+        for m in range(num_moons):
+            moons.append(generate_moon(moon_seed(seed, m), size, f"moon-{cx}-{cy}-{i}-{m}"))
+
+    return {
+        'id': f"planet-{cx}-{cy}-{i}",
+        'x': x,
+        'y': y,
+        'size': size,
+        'patternState': planet_rand.state,
+        'moons': moons
+    }
+
+
+def ensure_pattern(body):
+    """Generate a body's pattern on first use, resuming its RNG where the descriptor pass stopped."""
+    pattern = body.get('pattern')
+    if pattern is None:
+        is_moon = 'orbitRadius' in body
+        pattern = body['pattern'] = generate_planet_pattern(
+            body['size'], is_moon, body.get('patternName'), Mulberry32(body['patternState']))
+    return pattern
+
+
+def descriptor_for_id(body_id):
+    """Rebuild the descriptor for a 'planet-cx-cy-i' or 'moon-cx-cy-i-m' ID, or None."""
+    match = BODY_ID.match(body_id)
+    if not match:
+        return None
+    kind, cx, cy, i, m = match.groups()
+    i = int(i)
+    if i >= PLANET_COUNT:
+        return None
+    planet = planet_descriptor(int(cx), int(cy), i)
+    if kind == 'planet':
+        return planet if m is None else None
+    if m is None or int(m) >= len(planet['moons']):
+        return None
+    return planet['moons'][int(m)]
+
+
+def generate_stars(chunk, start=0, stop=STAR_TOTAL):
+    """Append stars start..stop-1 of the chunk; the RNG jumps straight to star `start`."""
+    chunk_start_x = chunk.cx * CHUNK_SIZE
+    chunk_start_y = chunk.cy * CHUNK_SIZE
+    chunk_rand = Mulberry32.jumped(chunk_seed(chunk.cx, chunk.cy), start * STAR_DRAWS)
+    xs, ys, brightness = chunk.x, chunk.y, chunk.brightness
+    blink_speed, blink_offset = chunk.blink_speed, chunk.blink_offset
+    chars = []
+    i = start
+    while i < stop:
+        xs.append(chunk_start_x + chunk_rand() * CHUNK_SIZE)
+        ys.append(chunk_start_y + chunk_rand() * CHUNK_SIZE)
+        brightness.append(math.floor(chunk_rand() * 4) + 1)
+        chars.append('.' if chunk_rand() > 0.5 else '*')
+        speed = chunk_rand() * 5000 + 2000
+        blink_speed.append(speed)
+        blink_offset.append(chunk_rand() * speed)
+        i += 1
+    chunk.chars += ''.join(chars)
+
+
+def star_at(cx, cy, i):
+    """Star i of chunk (cx, cy) as (x, y, brightness, char, blink speed, blink offset)."""
+    seed = chunk_seed(cx, cy)
+    k = i * STAR_DRAWS
+    speed = mulberry32_at(seed, k + 4) * 5000 + 2000
+    return (cx * CHUNK_SIZE + mulberry32_at(seed, k) * CHUNK_SIZE,
+            cy * CHUNK_SIZE + mulberry32_at(seed, k + 1) * CHUNK_SIZE,
+            math.floor(mulberry32_at(seed, k + 2) * 4) + 1,
+            '.' if mulberry32_at(seed, k + 3) > 0.5 else '*',
+            speed,
+            mulberry32_at(seed, k + 5) * speed)
+
+
+def generate_star_range(cx, cy, start, stop):
+    """A Chunk holding only stars start..stop-1 (no planets)."""
+    chunk = Chunk(cx, cy)
+    generate_stars(chunk, start, stop)
+    return chunk
+
+
+def stars_in_window(left, top, width, height):
+    """Every star inside the world rectangle, as (cx, cy, i, star) with star as from star_at().
+
+    Only each star's x is computed up front (one draw instead of six), its y
+    only when x is inside, and the rest only for stars that land in the
+    window, so a viewport-sized query skips most of the chunk's draws.
+    """
+    right = left + width
+    bottom = top + height
+    found = []
+    for cy in range(math.floor(top / CHUNK_SIZE), math.floor(bottom / CHUNK_SIZE) + 1):
+        for cx in range(math.floor(left / CHUNK_SIZE), math.floor(right / CHUNK_SIZE) + 1):
+            seed = chunk_seed(cx, cy)
+            start_x = cx * CHUNK_SIZE
+            start_y = cy * CHUNK_SIZE
+            for i in range(STAR_TOTAL):
+                k = i * STAR_DRAWS
+                x = start_x + mulberry32_at(seed, k) * CHUNK_SIZE
+                if left <= x < right:
+                    y = start_y + mulberry32_at(seed, k + 1) * CHUNK_SIZE
+                    if top <= y < bottom:
+                        found.append((cx, cy, i, star_at(cx, cy, i)))
+    return found
+
+
+def _star_columns(cx, cy, start, stop):
+    chunk = generate_star_range(cx, cy, start, stop)
+    return chunk.x, chunk.y, chunk.brightness, chunk.chars, chunk.blink_speed, chunk.blink_offset
+
+
+def generate_stars_parallel(cx, cy, executor, parts):
+    """All of a chunk's stars, generated as `parts` independent index ranges on `executor`."""
+    bounds = [STAR_TOTAL * n // parts for n in range(parts + 1)]
+    chunk = Chunk(cx, cy)
+    for x, y, brightness, chars, blink_speed, blink_offset in executor.map(
+            _star_columns, [cx] * parts, [cy] * parts, bounds[:-1], bounds[1:]):
+        chunk.x.extend(x)
+        chunk.y.extend(y)
+        chunk.brightness.extend(brightness)
+        chunk.chars += chars
+        chunk.blink_speed.extend(blink_speed)
+        chunk.blink_offset.extend(blink_offset)
+    return chunk
+
+
+def star_count(density):
+    """How many stars a chunk carries at `density`, one of DENSITY_TIERS."""
+    return math.ceil(STAR_TOTAL * density)
+
+
+def generate_chunk_descriptors(cx, cy, density=1.0):
+    """The cheap pass of generateChunk(): the stars, and planet/moon descriptors without patterns."""
+    chunk = Chunk(cx, cy)
+    generate_stars(chunk, 0, star_count(density))
+    i = 0
+    while i < PLANET_COUNT:
+        chunk.planets.append(planet_descriptor(cx, cy, i))
+        i += 1
+    return chunk
+
+
+def generate_chunk(cx, cy, density=1.0):
+    """generateChunk(): 5,000 stars and 50 planets (with moons and patterns) for one chunk."""
+    chunk = generate_chunk_descriptors(cx, cy, density)
+    for planet in chunk.planets:
+        for moon in planet['moons']:
+            ensure_pattern(moon)
+        ensure_pattern(planet)
+    return chunk
+
+
+def generate_seeded_planet(name, x, y):
+    """The named planet startAutopilot() places at the autopilot target (descriptor only)."""
+    main_seed = hash_string(name)
+    main_rand = Mulberry32(main_seed)
+    size = math.floor(main_rand() * 20) + 10
+    is_ollivia = name.lower() == 'ollivia'
+
+    has_moons = main_rand() > 0.6
+    if is_ollivia:
+        has_moons = True
+
+    moons = []
+    if has_moons:
+        num_moons = math.floor(main_rand() * 3) + 1
+        for m in range(num_moons):
+            moons.append(generate_moon(moon_seed(main_seed, m), size, f"moon-specific-{name}-{m}",
+                                       'ollivia' if is_ollivia else None))
+
+    return {
+        'id': f"planet-{name}",
+        'x': x,
+        'y': y,
+        'size': size,
+        'patternState': main_rand.state,
+        'patternName': name,
+        'moons': moons
+    }
@@ -0,0 +1,172 @@
+# In-process metrics for the xeil.py server, exposed in the Prometheus text format,
+# and a sampling profiler for /debug/profile.
+import bisect
+import collections
+import sys
+import threading
+import time
+
+# Seconds; covers a cached chunk (sub-ms) up to a cold chunk on a slow box
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _format_value(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{value}"' for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.values = collections.defaultdict(float)
+        self.lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self.lock:
+            self.values[label_values] += amount
+
+    def total(self):
+        return sum(self.values.values())
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            items = sorted(self.values.items())
+        for label_values, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}")
+        return lines
+
+
+class Gauge:
+    """A value computed when scraped, e.g. a ratio of two counters."""
+
+    def __init__(self, name, help_text, read):
+        self.name = name
+        self.help = help_text
+        self.read = read
+
+    def expose(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge", f"{self.name} {_format_value(self.read())}"]
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self.series = {}  # label values -> [bucket counts..., +Inf count, sum]
+        self.lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(label_values)
+            if series is None:
+                series = self.series[label_values] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            items = sorted((key, list(series)) for key, series in self.series.items())
+        for label_values, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), series):
+                cumulative += count
+                labels = _format_labels(self.labels + ('le',), label_values + (bound,))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self.register(Counter(name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, help_text, labels, buckets))
+
+    def gauge(self, name, help_text, read):
+        return self.register(Gauge(name, help_text, read))
+
+    def expose(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.expose())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+requests_total = REGISTRY.counter('xeil_http_requests_total', "HTTP requests handled.", ('path', 'code'))
+request_seconds = REGISTRY.histogram('xeil_http_request_duration_seconds', "Time to handle a request.", ('path',))
+response_bytes = REGISTRY.counter('xeil_http_response_bytes_total', "Response body bytes sent.", ('path',))
+chunk_cache_hits = REGISTRY.counter('xeil_chunk_cache_hits_total', "Chunk requests served from the cache.")
+chunk_cache_misses = REGISTRY.counter('xeil_chunk_cache_misses_total', "Chunk requests that had to generate the chunk.")
+forward_errors = REGISTRY.counter('xeil_router_forward_errors_total', "Requests the router could not forward, by node.", ('node',))
+chunk_generation_seconds = REGISTRY.histogram('xeil_chunk_generation_seconds', "Time to generate and encode one chunk.")
+compression_seconds = REGISTRY.histogram('xeil_compression_seconds', "Time to compress one response body.", ('encoding',))
+compression_input_bytes = REGISTRY.counter('xeil_compression_input_bytes_total', "Payload bytes before compression.", ('encoding',))
+compression_output_bytes = REGISTRY.counter('xeil_compression_output_bytes_total', "Payload bytes after compression.", ('encoding',))
+
+
+def _hit_ratio():
+    hits = chunk_cache_hits.total()
+    lookups = hits + chunk_cache_misses.total()
+    return hits / lookups if lookups else 0.0
+
+
+REGISTRY.gauge('xeil_chunk_cache_hit_ratio', "Share of chunk lookups served from the cache.", _hit_ratio)
+
+
+def _dictionary_ratio():
+    raw = compression_input_bytes.values.get(('x-zdict',), 0)
+    return compression_output_bytes.values.get(('x-zdict',), 0) / raw if raw else 0.0
+
+
+REGISTRY.gauge('xeil_compression_dictionary_ratio', "Compressed over raw bytes for dictionary-compressed responses.", _dictionary_ratio)
+
+
+def sample_profile(seconds, interval=0.005):
+    """Sample every other thread's stack for `seconds` and return collapsed stacks.
+
+    The output is one 'outer;inner;leaf count' line per distinct stack, the
+    format flamegraph.pl and speedscope read directly.
+    """
+    me = threading.get_ident()
+    stacks = collections.Counter()
+    deadline = time.monotonic() + seconds
+    samples = 0
+    while time.monotonic() < deadline:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == me:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+                frame = frame.f_back
+            stacks[';'.join(reversed(names))] += 1
+        samples += 1
+        time.sleep(interval)
+    lines = [f"{stack} {count}" for stack, count in stacks.most_common()]
+    return f"# {samples} samples over {seconds}s\n" + '\n'.join(lines) + '\n'
@@ -0,0 +1,181 @@
+# Poster renderer: any rectangle of the galaxy as an ASCII or PPM image, one character or pixel per cell.
+#
+# A cell covers `scale` x `scale` world units; at scale 1 it is the page's
+# character cell and the image is what render() would draw with every star
+# lit. Stars and bodies come from the game's generators (chunk stars, planet
+# descriptors and generatePlanetPattern()), moons at time `now`. The image is
+# cut into tiles that line up with chunk edges, so no chunk's stars are
+# generated twice. A process pool renders a few tiles at a time, and each
+# tile is written straight into its place in the pre-sized output file, so
+# memory is a handful of tiles whatever the size of the poster.
+import collections
+import concurrent.futures
+import math
+import os
+
+import galaxy
+import seeds
+
+CHUNK_SIZE = galaxy.CHUNK_SIZE
+PLANETS_PER_CHUNK = math.ceil(galaxy.PLANET_COUNT)
+TILE_CELLS = 1024  # preferred tile side; rounded to whole chunks
+TILE_MAX_CHUNKS = 16  # tile side cap in chunks, for scales where a cell spans chunks
+BODY_REACH = 40  # world units a planet or its moons can extend past the planet's centre
+FORMATS = ('ascii', 'ppm')
+ASCII_FALLBACK = {'░': '#'}  # the one pattern character outside ASCII
+# The page draws stars in white at brightness/5 opacity, on black
+STAR_RGB = [bytes((round(255 * brightness / 5),) * 3) for brightness in range(5)]
+COLORS = {}  # '#rgb' or '#rrggbb' -> 3 bytes
+
+
+def check_scale(scale):
+    """ValueError unless cells tile chunks exactly: scale divides CHUNK_SIZE or is a multiple of it."""
+    if scale < 1 or (CHUNK_SIZE % scale and scale % CHUNK_SIZE):
+        raise ValueError(f"scale must divide {CHUNK_SIZE} or be a multiple of it, not {scale}")
+
+
+def tile_cells(scale):
+    """Cells per tile side: about TILE_CELLS, spanning a whole number of chunks and cells."""
+    unit = max(scale, CHUNK_SIZE)  # world units that are both whole chunks and whole cells
+    side = min(max(TILE_CELLS * scale, CHUNK_SIZE), TILE_MAX_CHUNKS * CHUNK_SIZE)
+    return max(1, round(side / unit)) * unit // scale
+
+
+def cell_region(region, scale):
+    """World rectangle (x0, y0, x1, y1) as the cell rectangle that covers it."""
+    x0, y0, x1, y1 = region
+    return x0 // scale, y0 // scale, -(-x1 // scale), -(-y1 // scale)
+
+
+def tiles(cells, scale):
+    """Cell rectangles of the tiles covering `cells`, row by row; tiles align with chunk edges."""
+    c0, r0, c1, r1 = cells
+    side = tile_cells(scale)
+    for ty in range(r0 // side, -(-r1 // side)):
+        for tx in range(c0 // side, -(-c1 // side)):
+            yield max(tx * side, c0), max(ty * side, r0), min((tx + 1) * side, c1), min((ty + 1) * side, r1)
+
+
+def color(hex_color):
+    rgb = COLORS.get(hex_color)
+    if rgb is None:
+        digits = hex_color[1:] or 'fff'
+        if len(digits) == 3:
+            digits = ''.join(d * 2 for d in digits)
+        rgb = COLORS[hex_color] = bytes.fromhex(digits)
+    return rgb
+
+
+def near_bodies(cx, cy, left, top, right, bottom):
+    """Descriptors of a chunk's planets that could reach into the world rectangle, without the full pass."""
+    planets = []
+    for i in range(PLANETS_PER_CHUNK):
+        rand = galaxy.Mulberry32(seeds.planet_seed(cx, cy, i))
+        x = cx * CHUNK_SIZE + rand() * CHUNK_SIZE
+        y = cy * CHUNK_SIZE + rand() * CHUNK_SIZE
+        if left - BODY_REACH <= x < right + BODY_REACH and top - BODY_REACH <= y < bottom + BODY_REACH:
+            planets.append(galaxy.planet_descriptor(cx, cy, i))
+    return planets
+
+
+def render_tile(left, top, right, bottom, scale, fmt='ascii', now=0.0):
+    """Cells [left, right) x [top, bottom) as bytes, row by row: one byte a cell for ASCII, three for PPM."""
+    width = right - left
+    height = bottom - top
+    ppm = fmt == 'ppm'
+    depth = 3 if ppm else 1
+    grid = bytearray(width * height * depth) if ppm else bytearray(b' ' * (width * height))
+    world_left, world_top = left * scale, top * scale
+    world_right, world_bottom = right * scale, bottom * scale
+
+    def plot(wx, wy, char, rgb):
+        col = math.floor(wx / scale) - left
+        row = math.floor(wy / scale) - top
+        if 0 <= col < width and 0 <= row < height:
+            k = (row * width + col) * depth
+            if ppm:
+                grid[k:k + 3] = rgb
+            else:
+                grid[k] = ord(ASCII_FALLBACK.get(char, char))
+
+    def blit(pattern, screen_left, screen_top):
+        for v, row in enumerate(pattern):
+            colors = row['colors'].split('|')
+            for u, char in enumerate(row['line']):
+                if char != ' ':
+                    plot(screen_left + u, screen_top + v, char, color(colors[u]) if ppm else None)
+
+    # Stars first, from the chunks under the tile, as render() draws them beneath bodies
+    first_cx, last_cx = world_left // CHUNK_SIZE, (world_right - 1) // CHUNK_SIZE
+    first_cy, last_cy = world_top // CHUNK_SIZE, (world_bottom - 1) // CHUNK_SIZE
+    generated = {}
+    for cy in range(first_cy, last_cy + 1):
+        for cx in range(first_cx, last_cx + 1):
+            chunk = generated[cx, cy] = galaxy.generate_chunk_descriptors(cx, cy)
+            for x, y, brightness, char in zip(chunk.x, chunk.y, chunk.brightness, chunk.chars):
+                plot(x, y, char, STAR_RGB[brightness])
+
+    # Then bodies in chunk order, including those of neighbouring chunks that reach in
+    reach_x = math.floor((world_left - BODY_REACH) / CHUNK_SIZE), math.floor((world_right + BODY_REACH) / CHUNK_SIZE)
+    reach_y = math.floor((world_top - BODY_REACH) / CHUNK_SIZE), math.floor((world_bottom + BODY_REACH) / CHUNK_SIZE)
+    for cy in range(reach_y[0], reach_y[1] + 1):
+        for cx in range(reach_x[0], reach_x[1] + 1):
+            chunk = generated.get((cx, cy))
+            planets = chunk.planets if chunk else near_bodies(cx, cy, world_left, world_top, world_right, world_bottom)
+            for planet in planets:
+                half = planet['size'] / 2
+                px, py = planet['x'], planet['y']
+                if world_left - BODY_REACH <= px < world_right + BODY_REACH and \
+                        world_top - BODY_REACH <= py < world_bottom + BODY_REACH:
+                    blit(galaxy.ensure_pattern(planet), px - half, py - half)
+                    for moon in planet['moons']:
+                        moon_half = moon['size'] / 2
+                        mx, my = galaxy.moon_position(planet, moon, now)
+                        blit(galaxy.ensure_pattern(moon), mx - moon_half, my - moon_half)
+    return bytes(grid)
+
+
+def header(fmt, width, height):
+    return f"P6\n{width} {height}\n255\n".encode('ascii') if fmt == 'ppm' else b''
+
+
+def render(region, scale, out, fmt='ascii', now=0.0, workers=os.cpu_count() or 1, progress=None):
+    """Render world rectangle `region` to the file `out`; returns (width, height) in cells.
+
+    The file is sized up front and every tile is written at its own offset,
+    with at most 2 x `workers` tiles rendered or waiting at a time.
+    progress(done, total) is called after each tile.
+    """
+    check_scale(scale)
+    cells = cell_region(region, scale)
+    c0, r0, c1, r1 = cells
+    width, height = c1 - c0, r1 - r0
+    depth = 3 if fmt == 'ppm' else 1
+    row_bytes = width * depth + (0 if fmt == 'ppm' else 1)
+    head = header(fmt, width, height)
+    work = list(tiles(cells, scale))
+    with open(out, 'wb') as f:
+        f.write(head)
+        if fmt == 'ascii':
+            newline = b'\n'
+            for row in range(height):
+                f.seek(len(head) + row * row_bytes + width * depth)
+                f.write(newline)
+        f.truncate(len(head) + height * row_bytes)
+        with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+            pending = collections.deque()
+            submitted = 0
+            for done in range(1, len(work) + 1):
+                while submitted < len(work) and len(pending) < 2 * workers:
+                    tile = work[submitted]
+                    pending.append((tile, executor.submit(render_tile, *tile, scale, fmt, now)))
+                    submitted += 1
+                (left, top, right, bottom), future = pending.popleft()
+                data = future.result()
+                tile_row = (right - left) * depth
+                for row in range(bottom - top):
+                    f.seek(len(head) + (top - r0 + row) * row_bytes + (left - c0) * depth)
+                    f.write(data[row * tile_row:(row + 1) * tile_row])
+                if progress:
+                    progress(done, len(work))
+    return width, height
@@ -0,0 +1,325 @@
+# Deterministic input recording and replay for the simulation in sim.py.
+#
+# Log format (little-endian):
+#   header  b'XRPL' | u8 version | u8 reserved | u16 window w | u16 window h
+#           | u8 cell w | u8 cell h | u32 seed
+#   frames  u16 dt (1/100 ms) | u8 flags | payload for each flag set, in flag order:
+#           REPEAT  u16 n          -> n more identical frames with no input change
+#           BUTTONS u8 keys | touch << 4
+#           MOUSE   u8 active | i16 dx | i16 dy    (pixels from window centre)
+#           ZOOM    u16 zoom * 100
+#           CODE    u8 len | utf-8 name | f64 angle | f64 jitter x | f64 jitter y
+# Only input changes are stored, so a coasting or parked ship costs a few
+# bytes per run of frames.
+import gc
+import os
+import struct
+import time
+import tracemalloc
+
+import sim
+
+MAGIC = b'XRPL'
+VERSION = 1
+HEADER = struct.Struct('<4sBBHHBBI')
+
+F_BUTTONS = 0x01
+F_MOUSE = 0x02
+F_ZOOM = 0x04
+F_CODE = 0x08
+F_REPEAT = 0x80
+
+FRAME = struct.Struct('<HB')
+U16 = struct.Struct('<H')
+MOUSE = struct.Struct('<Bhh')
+CODE_TAIL = struct.Struct('<ddd')
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+
+
+class Recorder:
+    """Drives a Simulation and writes every frame's input to a log."""
+
+    def __init__(self, stream, seed=0, window=(1280, 720), cell=(10, 16)):
+        self.stream = stream
+        self.sim = sim.Simulation(seed, window, cell)
+        self.previous = sim.Controls()
+        self.pending = None  # (dt units, repeat count) of the current idle run
+        stream.write(HEADER.pack(MAGIC, VERSION, 0, window[0], window[1], cell[0], cell[1], seed))
+
+    def step(self, dt, controls):
+        # Frame times are stored in 1/100 ms, and the recording steps with the stored value too
+        units = round(min(dt, 100) * 100)
+        prev = self.previous
+        flags = 0
+        payload = b''
+        if (controls.keys, controls.touch) != (prev.keys, prev.touch):
+            flags |= F_BUTTONS
+            payload += bytes([controls.keys | controls.touch << 4])
+        if (controls.mouse_active, controls.mouse_dx, controls.mouse_dy) != (prev.mouse_active, prev.mouse_dx, prev.mouse_dy):
+            flags |= F_MOUSE
+            payload += MOUSE.pack(controls.mouse_active, controls.mouse_dx, controls.mouse_dy)
+        if controls.zoom != prev.zoom:
+            flags |= F_ZOOM
+            payload += U16.pack(round(controls.zoom * 100))
+        if controls.code:
+            name = controls.code[0].encode('utf-8')
+            flags |= F_CODE
+            payload += bytes([len(name)]) + name + CODE_TAIL.pack(*controls.code[1:])
+
+        if flags == 0 and self.pending and self.pending[0] == units and self.pending[1] < 0xFFFF:
+            self.pending[1] += 1
+        else:
+            self.flush()
+            self.stream.write(FRAME.pack(units, flags) + payload)
+            if flags == 0:
+                self.pending = [units, 0]
+
+        self.previous = controls.copy()
+        self.sim.step(units / 100, controls)
+
+    def code(self, name):
+        """Press the Code button: the random angle and teleport jitter come from the seeded RNG and are logged."""
+        return self.sim.random_code(name)
+
+    def flush(self):
+        if self.pending and self.pending[1]:
+            self.stream.write(FRAME.pack(self.pending[0], F_REPEAT) + U16.pack(self.pending[1]))
+        self.pending = None
+
+    def close(self):
+        self.flush()
+
+
+def read_header(data):
+    magic, version, _, width, height, cell_w, cell_h, seed = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("not an input log")
+    if version != VERSION:
+        raise ValueError(f"unsupported input log version {version}")
+    return {'window': (width, height), 'cell': (cell_w, cell_h), 'seed': seed}
+
+
+def iter_frames(data):
+    """Yield (dt, Controls) for every frame in a log; Controls objects are reused between frames."""
+    offset = HEADER.size
+    controls = sim.Controls()
+    while offset < len(data):
+        units, flags = FRAME.unpack_from(data, offset)
+        offset += FRAME.size
+        dt = units / 100
+        if flags & F_REPEAT:
+            (count,) = U16.unpack_from(data, offset)
+            offset += U16.size
+            for _ in range(count):
+                yield dt, controls
+            continue
+        controls.code = None
+        if flags & F_BUTTONS:
+            controls.keys = data[offset] & 0xF
+            controls.touch = data[offset] >> 4
+            offset += 1
+        if flags & F_MOUSE:
+            active, controls.mouse_dx, controls.mouse_dy = MOUSE.unpack_from(data, offset)
+            controls.mouse_active = bool(active)
+            offset += MOUSE.size
+        if flags & F_ZOOM:
+            controls.zoom = U16.unpack_from(data, offset)[0] / 100
+            offset += U16.size
+        if flags & F_CODE:
+            length = data[offset]
+            name = data[offset + 1:offset + 1 + length].decode('utf-8')
+            offset += 1 + length
+            controls.code = (name,) + CODE_TAIL.unpack_from(data, offset)
+            offset += CODE_TAIL.size
+        yield dt, controls
+
+
+def replay(path, render=True, prefetch_lookahead=sim.PREFETCH_LOOKAHEAD):
+    """Replay a log as fast as possible and return throughput figures."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    header = read_header(data)
+
+    frames = 0
+    render_time = 0.0
+    start = time.perf_counter()
+    simulation = sim.Simulation(header['seed'], header['window'], header['cell'], prefetch_lookahead)
+    for dt, controls in iter_frames(data):
+        simulation.step(dt, controls)
+        if render:
+            render_start = time.perf_counter()
+            simulation.render()
+            render_time += time.perf_counter() - render_start
+        frames += 1
+    wall = time.perf_counter() - start
+
+    return {
+        'name': os.path.splitext(os.path.basename(path))[0],
+        'bytes': len(data),
+        'frames': frames,
+        'sim_seconds': simulation.now / 1000,
+        'wall_seconds': wall,
+        'realtime_factor': simulation.now / 1000 / wall if wall else float('inf'),
+        'chunks_generated': simulation.chunks_generated,
+        'generation_seconds': simulation.generation_time,
+        'render_seconds': render_time,
+        'prefetch_hits': simulation.prefetch_hits,
+        'prefetch_misses': simulation.prefetch_misses,
+        'chunks_restored': simulation.chunks.restores,
+        'final_position': (round(simulation.x, 6), round(simulation.y, 6)),
+    }
+
+
+# Representative sessions for the benchmark corpus. Each is a list of
+# (seconds, Controls) segments played at 60 fps; a Controls with a code name
+# presses the Code button on the segment's first frame.
+FRAME_MS = 1000 / 60
+
+CORPUS_SESSIONS = {
+    'parked': [(30, sim.Controls())],
+    'drift': [(2, sim.Controls(keys=sim.RIGHT | sim.DOWN)), (28, sim.Controls())],
+    'cruise': [(45, sim.Controls(keys=sim.RIGHT))],
+    'zigzag': [(4, sim.Controls(keys=sim.UP | sim.RIGHT)), (4, sim.Controls(keys=sim.DOWN | sim.RIGHT))] * 5,
+    'mouse-steer': [(10, sim.Controls(mouse_active=True, mouse_dx=300, mouse_dy=-40)),
+                    (10, sim.Controls(mouse_active=True, mouse_dx=-120, mouse_dy=280)),
+                    (10, sim.Controls(touch=sim.LEFT))],
+    'zoom-sweep': [(0.1, sim.Controls(keys=sim.LEFT, zoom=zoom)) for zoom in range(100, 45, -5)] +
+                  [(15, sim.Controls(keys=sim.LEFT, zoom=50))] +
+                  [(0.1, sim.Controls(zoom=zoom)) for zoom in range(55, 205, 5)] +
+                  [(10, sim.Controls(zoom=200))],
+    'autopilot': [(1, sim.Controls()), (25, sim.Controls(code='Ollivia')), (5, sim.Controls())],
+}
+
+
+def record_session(path, segments, seed=0):
+    with open(path, 'wb') as f:
+        recorder = Recorder(f, seed)
+        for seconds, template in segments:
+            for frame in range(round(seconds * 1000 / FRAME_MS)):
+                controls = template.copy()
+                if template.code and frame == 0:
+                    controls.code = recorder.code(template.code)
+                recorder.step(FRAME_MS, controls)
+        recorder.close()
+
+
+def build_corpus(directory=CORPUS_DIR):
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for name, segments in CORPUS_SESSIONS.items():
+        path = os.path.join(directory, name + '.xrpl')
+        record_session(path, segments)
+        paths.append(path)
+    return paths
+
+
+def corpus_paths(directory=CORPUS_DIR):
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.endswith('.xrpl'))
+
+
+# The soak flight: each circuit goes out and half way back along both axes, so
+# chunks are left and revisited while the ship keeps reaching new space, and a
+# Code jump every few circuits throws the whole neighbourhood away
+SOAK_CIRCUIT = ((sim.RIGHT, 30), (sim.LEFT, 15), (sim.DOWN, 30), (sim.UP, 15))  # (keys, seconds)
+SOAK_CODE_EVERY = 5  # circuits
+SOAK_MAX_GROWTH = 0.10
+
+
+def soak(hours, sample_minutes=5, render=False, seed=0):
+    """Fly the soak session for `hours` of simulated time, sampling traced memory.
+
+    Samples are taken after a gc.collect() every `sample_minutes` of play; the
+    growth figure compares the peak of the second half against the first, so
+    warm-up allocations (caches filling to their budgets) do not count.
+    """
+    frames = round(hours * 3600 * 1000 / FRAME_MS)
+    legs = [(keys, round(seconds * 1000 / FRAME_MS)) for keys, seconds in SOAK_CIRCUIT]
+    frames_per_sample = round(sample_minutes * 60 * 1000 / FRAME_MS)
+    samples = []
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        simulation = sim.Simulation(seed)
+        controls = sim.Controls()
+        frame = 0
+        circuit = 0
+        while frame < frames:
+            for leg, (keys, leg_frames) in enumerate(legs):
+                controls.keys = keys
+                if leg == 0 and circuit and circuit % SOAK_CODE_EVERY == 0:
+                    controls.code = simulation.random_code('Ollivia')
+                for _ in range(min(leg_frames, frames - frame)):
+                    simulation.step(FRAME_MS, controls)
+                    controls.code = None
+                    if render:
+                        simulation.render()
+                    frame += 1
+                    if frame % frames_per_sample == 0:
+                        gc.collect()
+                        samples.append((simulation.now / 60000, tracemalloc.get_traced_memory()[0],
+                                        len(simulation.chunks), len(simulation.chunks.evicted)))
+            circuit += 1
+        wall = time.perf_counter() - start
+    finally:
+        tracemalloc.stop()
+
+    half = len(samples) // 2
+    growth = 0.0
+    if half:
+        early = max(sample[1] for sample in samples[:half])
+        late = max(sample[1] for sample in samples[half:])
+        growth = (late - early) / early
+    return {
+        'samples': samples,
+        'growth': growth,
+        'wall_seconds': wall,
+        'chunks_generated': simulation.chunks_generated,
+        'chunks_restored': simulation.chunks.restores,
+        'chunks_evicted': simulation.chunks.evictions,
+    }
+
+
+LOOP_MODES = ('always', 'on-demand')
+
+
+def park_beside_planet(simulation):
+    """Move the ship just off the nearest planet with moons, inside its scan radius."""
+    planet = min((planet for planet in simulation.planets() if planet['moons']),
+                 key=lambda planet: (planet['x'] - simulation.x) ** 2 + (planet['y'] - simulation.y) ** 2)
+    simulation.x = planet['x'] + planet['size']
+    simulation.y = planet['y']
+    simulation.generate_world()
+
+
+def park(seconds, mode, beside_planet=False, seed=0):
+    """Sit parked for `seconds` of simulated time with the page's loop in `mode`.
+
+    'always' ticks and renders every FRAME_MS, as the page did before on-demand
+    rendering. 'on-demand' renders only when needs_render() and waits
+    idle_tick_ms between ticks while idle(). Process CPU time is the battery figure.
+    """
+    simulation = sim.Simulation(seed)
+    if beside_planet:
+        park_beside_planet(simulation)
+    controls = sim.Controls()
+    end = simulation.now + seconds * 1000
+    ticks = 0
+    renders = 0
+    dt = FRAME_MS
+    cpu = time.process_time()
+    while simulation.now < end:
+        simulation.step(dt, controls)
+        ticks += 1
+        if mode == 'always' or simulation.needs_render():
+            simulation.render()
+            renders += 1
+        dt = simulation.idle_tick_ms if mode == 'on-demand' and simulation.idle(controls) else FRAME_MS
+    return {
+        'mode': mode,
+        'scene': 'beside a planet' if beside_planet else 'open space',
+        'ticks': ticks,
+        'renders': renders,
+        'cpu_seconds': time.process_time() - cpu,
+        'sim_seconds': simulation.now / 1000,
+    }
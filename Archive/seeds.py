@@ -0,0 +1,97 @@
+# Integer seed derivation: the page's hashString() of "cx,cy", "cx,cy,i" and
+# "seed-m" computed from the numbers themselves, plus packed integer chunk keys.
+#
+# hashString() is h = h * 31 + code unit (mod 2**32) over the string, so
+# appending text t to a prefix with hash h gives h * 31**len(t) + hash(t).
+# Numbers are appended four decimal digits at a time from precomputed tables,
+# which gives the same value as formatting the string and hashing each character.
+MASK32 = 0xFFFFFFFF
+GROUP = 10000  # decimal digits are consumed in groups of four
+POW31 = [pow(31, k, 1 << 32) for k in range(12)]
+COMMA = ord(',')
+DASH = ord('-')
+INT32_MIN = -(1 << 31)
+INT32_MAX = (1 << 31) - 1
+
+
+def _raw_hash(text, h=0):
+    for ch in text:
+        h = (h * 31 + ord(ch)) & MASK32
+    return h
+
+
+# Hash of a full four-digit group ("0042") and of a leading group ("42", length 2)
+GROUP_HASH = [_raw_hash(f"{g:04d}") for g in range(GROUP)]
+LEAD_HASH = [_raw_hash(str(g)) for g in range(GROUP)]
+LEAD_POW = [POW31[len(str(g))] for g in range(GROUP)]
+
+
+def mix_int(h, n):
+    """h continued over the decimal digits of the integer n, as if str(n) were hashed."""
+    if n < 0:
+        h = (h * 31 + DASH) & MASK32
+        n = -n
+    if n < GROUP:
+        return (h * LEAD_POW[n] + LEAD_HASH[n]) & MASK32
+    groups = []
+    while n >= GROUP:
+        n, g = divmod(n, GROUP)
+        groups.append(g)
+    h = (h * LEAD_POW[n] + LEAD_HASH[n]) & MASK32
+    for g in reversed(groups):
+        h = (h * POW31[4] + GROUP_HASH[g]) & MASK32
+    return h
+
+
+def finish(h):
+    """hashString()'s last step: read the 32 bits as signed and take Math.abs()."""
+    return (1 << 32) - h if h & 0x80000000 else h
+
+
+def chunk_seed(cx, cy):
+    """hashString(`${cx},${cy}`)"""
+    return finish(mix_int((mix_int(0, cx) * 31 + COMMA) & MASK32, cy))
+
+
+def planet_seed(cx, cy, i):
+    """hashString(`${cx},${cy},${i}`)"""
+    h = (mix_int(0, cx) * 31 + COMMA) & MASK32
+    h = (mix_int(h, cy) * 31 + COMMA) & MASK32
+    return finish(mix_int(h, i))
+
+
+def moon_seed(parent_seed, m):
+    """hashString(`${parentSeed}-${m}`)"""
+    return finish(mix_int((mix_int(0, parent_seed) * 31 + DASH) & MASK32, m))
+
+
+def body_id_prefix(kind, cx, cy):
+    """hashString() state after `${kind}-${cx}-${cy}-`, the start every body ID in a chunk shares."""
+    h = (mix_int(_raw_hash(kind + '-'), cx) * 31 + DASH) & MASK32
+    return (mix_int(h, cy) * 31 + DASH) & MASK32
+
+
+def planet_id_seed(prefix, i):
+    """hashString(`planet-${cx}-${cy}-${i}`), the scan-data seed, from body_id_prefix('planet', cx, cy)."""
+    return finish(mix_int(prefix, i))
+
+
+def moon_id_seed(prefix, i, m):
+    """hashString(`moon-${cx}-${cy}-${i}-${m}`) from body_id_prefix('moon', cx, cy)."""
+    return finish(mix_int((mix_int(prefix, i) * 31 + DASH) & MASK32, m))
+
+
+def valid_coordinates(cx, cy):
+    return INT32_MIN <= cx <= INT32_MAX and INT32_MIN <= cy <= INT32_MAX
+
+
+def pack_key(cx, cy):
+    """(cx, cy) as one 64-bit integer, for dict and set keys; coordinates must fit in int32."""
+    return (cx & MASK32) << 32 | (cy & MASK32)
+
+
+def unpack_key(key):
+    cx = key >> 32
+    cy = key & MASK32
+    return (cx - (1 << 32) if cx & 0x80000000 else cx,
+            cy - (1 << 32) if cy & 0x80000000 else cy)
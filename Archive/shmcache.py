@@ -0,0 +1,212 @@
+# Chunk cache in multiprocessing.shared_memory, shared by pre-forked xeil.py workers.
+#
+# Layout of the segment:
+#   header   b'XSHM' | u32 slots | u32 ways | u32 slot bytes | u32 max workers
+#   stats    max workers x (u64 hits, u64 misses, u64 generated)
+#   slots    slots x (u64 seq | i32 cx | i32 cy | u32 length | u32 used | u64 stamp)
+#   data     slots x slot bytes
+# Slots are grouped into sets of `ways`; a key hashes to one set. Reads are
+# lock-free: a seqlock per slot (odd while a writer is inside) lets a reader
+# detect a torn copy and retry. Writers take the lock of the key's shard, so a
+# chunk missed by several workers at once is generated only once.
+import multiprocessing
+import multiprocessing.shared_memory
+import struct
+import threading
+import time
+
+import metrics
+from chunks import build_chunk, encode_chunk
+
+MAGIC = b'XSHM'
+HEADER = struct.Struct('<4sIIII')
+STATS = struct.Struct('<QQQ')
+SLOT = struct.Struct('<QiiIIQ')
+SEQ = struct.Struct('<Q')
+STAMP = struct.Struct('<Q')
+
+SLOTS = 256
+WAYS = 8
+SLOT_BYTES = 768 * 1024  # the largest full chunk payload is ~630 KB
+DESCRIPTOR_SLOT_BYTES = 512 * 1024  # descriptor-only payloads are ~400 KB
+LOCK_SHARDS = 16
+MAX_WORKERS = 64
+READ_RETRIES = 8
+
+
+class SharedChunkCache:
+    """Encoded chunk payloads keyed by (cx, cy), shared by every process forked after it is created.
+
+    Create it in the parent before forking; each child calls attach_worker()
+    with its own index so hit/miss counts are kept per worker without
+    cross-process races, and stats() sums them.
+    """
+
+    def __init__(self, slots=SLOTS, slot_bytes=SLOT_BYTES, patterns=True, ways=WAYS, name=None):
+        if slots % ways:
+            raise ValueError("slots must be a multiple of ways")
+        self.slots = slots
+        self.ways = ways
+        self.slot_bytes = slot_bytes
+        self.patterns = patterns
+        self.stats_offset = HEADER.size
+        self.slots_offset = self.stats_offset + STATS.size * MAX_WORKERS
+        self.data_offset = self.slots_offset + SLOT.size * slots
+        size = self.data_offset + slot_bytes * slots
+        self.shm = multiprocessing.shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.buf = self.shm.buf
+        HEADER.pack_into(self.buf, 0, MAGIC, slots, ways, slot_bytes, MAX_WORKERS)
+        self.buf[self.stats_offset:self.data_offset] = bytes(self.data_offset - self.stats_offset)
+        self.locks = [multiprocessing.Lock() for _ in range(LOCK_SHARDS)]
+        self.worker = 0
+        self.stats_lock = threading.Lock()
+
+    def attach_worker(self, index):
+        if not 0 <= index < MAX_WORKERS:
+            raise ValueError(f"worker index must be below {MAX_WORKERS}")
+        self.worker = index
+
+    def _set(self, cx, cy):
+        # Chunk keys cluster around the origin, so mix the bits before taking the set
+        h = (cx * 0x9E3779B1 ^ cy * 0x85EBCA77) & 0xFFFFFFFF
+        h ^= h >> 15
+        h = (h * 0x2C1B3C6D) & 0xFFFFFFFF
+        h ^= h >> 12
+        return h % (self.slots // self.ways)
+
+    def _count(self, field):
+        offset = self.stats_offset + STATS.size * self.worker
+        with self.stats_lock:
+            values = list(STATS.unpack_from(self.buf, offset))
+            values[field] += 1
+            STATS.pack_into(self.buf, offset, *values)
+
+    def _read(self, index, cx, cy):
+        """Copy slot `index` if it holds (cx, cy); None if it does not or stays contended."""
+        offset = self.slots_offset + SLOT.size * index
+        for _ in range(READ_RETRIES):
+            seq, slot_cx, slot_cy, length, used, _ = SLOT.unpack_from(self.buf, offset)
+            if seq & 1:
+                time.sleep(0)
+                continue
+            if not used or slot_cx != cx or slot_cy != cy:
+                payload = None
+            else:
+                start = self.data_offset + self.slot_bytes * index
+                payload = bytes(self.buf[start:start + length])
+            if SEQ.unpack_from(self.buf, offset)[0] == seq:
+                if payload is not None:
+                    # A hint for replacement only, so an unlocked write is fine
+                    STAMP.pack_into(self.buf, offset + SLOT.size - STAMP.size, time.monotonic_ns())
+                return payload
+        return None
+
+    def _lookup(self, cx, cy):
+        first = self._set(cx, cy) * self.ways
+        for index in range(first, first + self.ways):
+            payload = self._read(index, cx, cy)
+            if payload is not None:
+                return payload
+        return None
+
+    def _store(self, cx, cy, payload):
+        """Write into the set's empty or least recently used slot; the caller holds the shard lock."""
+        if len(payload) > self.slot_bytes:
+            return
+        first = self._set(cx, cy) * self.ways
+        victim = None
+        oldest = None
+        for index in range(first, first + self.ways):
+            _, _, _, _, used, stamp = SLOT.unpack_from(self.buf, self.slots_offset + SLOT.size * index)
+            if not used:
+                victim = index
+                break
+            if oldest is None or stamp < oldest:
+                victim, oldest = index, stamp
+        offset = self.slots_offset + SLOT.size * victim
+        seq = SEQ.unpack_from(self.buf, offset)[0]
+        SEQ.pack_into(self.buf, offset, seq + 1)
+        start = self.data_offset + self.slot_bytes * victim
+        self.buf[start:start + len(payload)] = payload
+        SLOT.pack_into(self.buf, offset, seq + 1, cx, cy, len(payload), 1, time.monotonic_ns())
+        SEQ.pack_into(self.buf, offset, seq + 2)
+
+    def fetch(self, cx, cy):
+        """(payload, hit) for a chunk, generating and storing it on a miss."""
+        payload = self._lookup(cx, cy)
+        if payload is not None:
+            self._count(0)
+            metrics.chunk_cache_hits.inc()
+            return payload, True
+
+        with self.locks[self._set(cx, cy) % LOCK_SHARDS]:
+            # Another worker may have generated it while we waited for the lock
+            payload = self._lookup(cx, cy)
+            if payload is not None:
+                self._count(0)
+                metrics.chunk_cache_hits.inc()
+                return payload, True
+            self._count(1)
+            metrics.chunk_cache_misses.inc()
+            start = time.perf_counter()
+            chunk = build_chunk(cx, cy, self.patterns)
+            payload = encode_chunk(chunk)
+            metrics.chunk_generation_seconds.observe(time.perf_counter() - start)
+            self._store(cx, cy, payload)
+            self._count(2)
+        return payload, False
+
+    def items(self):
+        """((cx, cy), payload) for every occupied slot, least recently used first."""
+        found = []
+        for index in range(self.slots):
+            _, cx, cy, _, used, stamp = SLOT.unpack_from(self.buf, self.slots_offset + SLOT.size * index)
+            if used:
+                payload = self._read(index, cx, cy)
+                if payload is not None:
+                    found.append((stamp, (cx, cy), payload))
+        found.sort(key=lambda entry: entry[0])
+        return [(key, payload) for _, key, payload in found]
+
+    def restore(self, items):
+        for (cx, cy), payload in items:
+            with self.locks[self._set(cx, cy) % LOCK_SHARDS]:
+                self._store(cx, cy, payload)
+
+    def stats(self):
+        """Hits, misses and generated chunks summed over every worker."""
+        totals = [0, 0, 0]
+        for worker in range(MAX_WORKERS):
+            for i, value in enumerate(STATS.unpack_from(self.buf, self.stats_offset + STATS.size * worker)):
+                totals[i] += value
+        used = sum(SLOT.unpack_from(self.buf, self.slots_offset + SLOT.size * i)[4] for i in range(self.slots))
+        return {'hits': totals[0], 'misses': totals[1], 'generated': totals[2], 'slots_used': used}
+
+    def close(self, unlink=False):
+        self.buf = None
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+class SharedCacheStats:
+    """Registry entry for the all-worker totals of the shared caches, labelled by payload kind."""
+
+    FIELDS = (
+        ('hits', 'counter', "Shared chunk cache hits across all workers."),
+        ('misses', 'counter', "Shared chunk cache misses across all workers."),
+        ('generated', 'counter', "Chunks generated into the shared cache."),
+        ('slots_used', 'gauge', "Occupied shared chunk cache slots."),
+    )
+
+    def __init__(self, caches):
+        self.caches = caches
+
+    def expose(self):
+        stats = [('full' if cache.patterns else 'descriptors', cache.stats()) for cache in self.caches]
+        lines = []
+        for key, kind, help_text in self.FIELDS:
+            name = f'xeil_shared_chunk_cache_{key}' + ('_total' if kind == 'counter' else '')
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            lines += [f'{name}{{payload="{payload}"}} {values[key]}' for payload, values in stats]
+        return lines
@@ -0,0 +1,630 @@
+# Server-side / terminal simulation of the game state that the page in xeil.py runs in the browser.
+import collections
+import heapq
+import math
+import random
+from array import array
+from time import perf_counter as _perf_counter
+
+import autopilot
+import galaxy
+from galaxy import CHUNK_SIZE
+from seeds import pack_key, unpack_key
+
+# Game constants, mirrored from the embedded page in xeil.py
+PLAYER_SPEED = 0.1
+DRAG = 0.95
+TRAIL_LENGTH = 30
+STAR_BLINK_INTERVAL = 100
+MIN_ZOOM = 50
+MAX_ZOOM = 200
+ZOOM_SPEED = 5
+SCAN_RADIUS = 150
+SCAN_DELAY = 2000
+SCAN_DURATION = 3000
+ROUTE_LEAD_MS = 100  # how far ahead of the ship the /route stream is modelled to run
+
+TRAIL_LIFETIME = TRAIL_LENGTH * 100  # ms a trail segment stays visible
+TRAIL_MAX_OPACITY = 0.3
+
+
+class Trail:
+    """Player trail as a fixed-capacity ring buffer.
+
+    Positions and timestamps live in preallocated typed arrays sized from
+    TRAIL_LENGTH, so updating and fading the trail never allocates once the
+    simulation is running. Slot `head` holds the oldest segment.
+    """
+
+    def __init__(self, length=TRAIL_LENGTH, frame_ms=16):
+        self.lifetime = length * 100
+        # One segment per frame for the whole lifetime; faster updates overwrite the oldest
+        self.capacity = math.ceil(self.lifetime / frame_ms) + 1
+        self.x = array('d', bytes(8 * self.capacity))
+        self.y = array('d', bytes(8 * self.capacity))
+        self.time = array('d', bytes(8 * self.capacity))
+        self.opacity = array('d', bytes(8 * self.capacity))
+        self.head = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.head = 0
+        self.count = 0
+
+    def update(self, x, y, now, zoom=100):
+        """Same rules as updateTrail(): append when the player moved, then expire old segments."""
+        cap = self.capacity
+        min_distance = 0.5 * (100 / zoom)
+
+        # An expired segment's slot keeps its position, so a parked ship lays no new segments
+        newest = (self.head + self.count - 1) % cap
+        if abs(x - self.x[newest]) > min_distance or abs(y - self.y[newest]) > min_distance:
+            if self.count == cap:
+                self.head = (self.head + 1) % cap
+                self.count -= 1
+            slot = (self.head + self.count) % cap
+            self.x[slot] = x
+            self.y[slot] = y
+            self.time[slot] = now
+            self.count += 1
+
+        while self.count and now - self.time[self.head] > self.lifetime:
+            self.head = (self.head + 1) % cap
+            self.count -= 1
+
+    def slots(self):
+        """Ring slots of the live segments, oldest first."""
+        head, cap = self.head, self.capacity
+        end = head + self.count
+        if end <= cap:
+            return range(head, end)
+        return (i % cap for i in range(head, end))
+
+    def fade(self, now):
+        """Fill self.opacity for every live slot in one pass over the buffer.
+
+        Opacity falls linearly from TRAIL_MAX_OPACITY to 0 over the lifetime,
+        matching the page; expired-but-not-yet-dropped slots get 0.
+        """
+        times, out = self.time, self.opacity
+        scale = TRAIL_MAX_OPACITY / self.lifetime
+        head, cap = self.head, self.capacity
+        for k in range(self.count):
+            i = head + k
+            if i >= cap:
+                i -= cap
+            o = TRAIL_MAX_OPACITY - (now - times[i]) * scale
+            out[i] = o if o > 0 else 0.0
+        return out
+
+
+# Control bits; touch controls use the same bits shifted left by 4
+UP = 0x1
+DOWN = 0x2
+LEFT = 0x4
+RIGHT = 0x8
+
+IDLE_TICK_MS = STAR_BLINK_INTERVAL  # tick interval of the page's on-demand loop while parked
+RENDER_MIN_MOVE = 0.01
+IDLE_VELOCITY = 0.0005
+RENDER_DISTANCE = CHUNK_SIZE * 2
+PREFETCH_LOOKAHEAD = 3000  # ms of projected flight, as in the page
+PREFETCH_STEP = CHUNK_SIZE / 4
+PREFETCH_MAX_CHUNKS = 27
+RESIDENT_CHUNK_BUDGET = 25  # 5x5, what RENDER_DISTANCE keeps around the player
+EVICTED_CHUNK_BUDGET = 27
+
+
+def projected_chunks(x, y, vx, vy, zoom, lookahead=PREFETCH_LOOKAHEAD, limit=PREFETCH_MAX_CHUNKS):
+    """Packed chunk keys around the player's straight-line path over `lookahead` ms, nearest first."""
+    scale = 100 / zoom
+    step_x = vx * scale
+    step_y = vy * scale
+    speed = math.hypot(step_x, step_y)  # world units per 16ms frame
+    keys = {}  # insertion-ordered set
+    if lookahead <= 0 or speed < 0.01:
+        return []
+    distance = speed * lookahead / 16
+    samples = math.ceil(distance / PREFETCH_STEP)
+    for i in range(1, samples + 1):
+        t = min(i * PREFETCH_STEP, distance) / speed
+        chunk_x = math.floor((x + step_x * t) / CHUNK_SIZE)
+        chunk_y = math.floor((y + step_y * t) / CHUNK_SIZE)
+        for cy in range(chunk_y - 1, chunk_y + 2):
+            for cx in range(chunk_x - 1, chunk_x + 2):
+                key = pack_key(cx, cy)
+                if key not in keys:
+                    keys[key] = None
+                    if len(keys) >= limit:
+                        return list(keys)
+    return list(keys)
+
+
+class Controls:
+    """Input state for one frame: keys, touch pads, mouse and zoom."""
+    __slots__ = ('keys', 'touch', 'mouse_active', 'mouse_dx', 'mouse_dy', 'zoom', 'code')
+
+    def __init__(self, keys=0, touch=0, mouse_active=False, mouse_dx=0, mouse_dy=0, zoom=100, code=None):
+        self.keys = keys
+        self.touch = touch
+        self.mouse_active = mouse_active
+        self.mouse_dx = mouse_dx  # mouse position relative to the window centre, in pixels
+        self.mouse_dy = mouse_dy
+        self.zoom = zoom
+        self.code = code  # (name, angle, jitter_x, jitter_y) on the frame the Code button was used
+
+    def copy(self):
+        return Controls(self.keys, self.touch, self.mouse_active, self.mouse_dx, self.mouse_dy, self.zoom)
+
+
+class LoadedChunk:
+    """A generated chunk plus the per-star blink state the page keeps on each star.
+
+    Blink deadlines sit in a heap so a blink check only touches the stars that
+    are due, and star indices are bucketed by world row so render() only looks
+    at the rows inside the viewport.
+    """
+    __slots__ = ('chunk', 'visible', 'blink_heap', 'rows')
+
+    def __init__(self, chunk, now):
+        self.chunk = chunk
+        self.visible = bytearray(b'\x01' * len(chunk))
+        self.blink_heap = [(now + offset, i) for i, offset in enumerate(chunk.blink_offset)]
+        heapq.heapify(self.blink_heap)
+        self.rows = [[] for _ in range(CHUNK_SIZE)]
+        top = chunk.cy * CHUNK_SIZE
+        for i, y in enumerate(chunk.y):
+            self.rows[min(int(y - top), CHUNK_SIZE - 1)].append(i)
+
+    def blink(self, now, left, top, right, bottom):
+        """Toggle the stars that are due; True if one of them lies inside the given view."""
+        heap, visible, speeds = self.blink_heap, self.visible, self.chunk.blink_speed
+        xs, ys = self.chunk.x, self.chunk.y
+        in_view = False
+        while heap[0][0] < now:
+            i = heap[0][1]
+            visible[i] ^= 1
+            heapq.heapreplace(heap, (now + speeds[i], i))
+            if not in_view and left <= xs[i] < right and top <= ys[i] < bottom:
+                in_view = True
+        return in_view
+
+
+def chunk_in_range(cx, cy, x, y):
+    """Whether chunk (cx, cy) is within RENDER_DISTANCE of the point (x, y)."""
+    left = cx * CHUNK_SIZE
+    top = cy * CHUNK_SIZE
+    return (left - RENDER_DISTANCE < x < left + CHUNK_SIZE + RENDER_DISTANCE and
+            top - RENDER_DISTANCE < y < top + CHUNK_SIZE + RENDER_DISTANCE)
+
+
+class ChunkResidency:
+    """The loaded chunks by packed key, evicted and restored as units, as the page's residency manager does.
+
+    Chunks out of range, then the farthest ones past `budget`, are evicted
+    with their keys; the last `evicted_budget` of them are kept so a return
+    restores them, blink state included, without regenerating.
+    """
+
+    def __init__(self, budget=RESIDENT_CHUNK_BUDGET, evicted_budget=EVICTED_CHUNK_BUDGET):
+        self.budget = budget
+        self.evicted_budget = evicted_budget
+        self.resident = {}
+        self.evicted = collections.OrderedDict()
+        self.evictions = 0
+        self.restores = 0
+
+    def __contains__(self, key):
+        return key in self.resident
+
+    def __len__(self):
+        return len(self.resident)
+
+    def values(self):
+        return self.resident.values()
+
+    def add(self, key, loaded):
+        self.resident[key] = loaded
+
+    def restore(self, key):
+        """Make an evicted chunk resident again; False if it has to be generated."""
+        loaded = self.evicted.pop(key, None)
+        if loaded is None:
+            return False
+        self.resident[key] = loaded
+        self.restores += 1
+        return True
+
+    def evict(self, x, y):
+        """Evict the chunks out of range or over budget; returns how many were evicted."""
+        victims = [key for key, loaded in self.resident.items() if not chunk_in_range(loaded.chunk.cx, loaded.chunk.cy, x, y)]
+        over = len(self.resident) - len(victims) - self.budget
+        if over > 0:
+            chunk_x = math.floor(x / CHUNK_SIZE)
+            chunk_y = math.floor(y / CHUNK_SIZE)
+            kept = [key for key in self.resident if key not in victims]
+            kept.sort(key=lambda key: max(abs(self.resident[key].chunk.cx - chunk_x), abs(self.resident[key].chunk.cy - chunk_y)),
+                      reverse=True)
+            victims += kept[:over]
+        for key in victims:
+            self.evicted[key] = self.resident.pop(key)
+            self.evicted.move_to_end(key)
+            self.evictions += 1
+        while len(self.evicted) > self.evicted_budget:
+            self.evicted.popitem(last=False)
+        return len(victims)
+
+    def clear(self):
+        self.resident.clear()
+        self.evicted.clear()
+
+
+class Simulation:
+    """gameLoop() without the browser: input, physics, world generation, trail, scanning and rendering.
+
+    Every random source is drawn from one seeded random.Random, and time is a
+    simulated clock advanced by each step, so a run is fully reproducible.
+    """
+
+    def __init__(self, seed=0, window=(1280, 720), cell=(10, 16), prefetch_lookahead=PREFETCH_LOOKAHEAD):
+        self.rng = random.Random(seed)
+        self.window_width, self.window_height = window
+        self.cell_width, self.cell_height = cell
+        self.now = 0.0
+        self.x = 0.0
+        self.y = 0.0
+        self.vx = 0.0
+        self.vy = 0.0
+        self.zoom = 100
+        self.requested_zoom = 100
+        self.trail = Trail()
+        self.chunks = ChunkResidency()
+        self.extra_planets = []
+        self.blink_timer = 0.0
+        self.chunks_generated = 0
+        self.generation_time = 0.0
+
+        # Chunks generated ahead of need along the projected path, one per frame like
+        # the page's idle-time prefetcher; hits/misses count loads by generate_world()
+        self.prefetch_lookahead = prefetch_lookahead
+        self.prefetched = {}
+        self.prefetch_hits = 0
+        self.prefetch_misses = 0
+
+        self.autopilot_active = False
+        self.autopilot_target_x = 0.0
+        self.autopilot_target_y = 0.0
+        self.autopilot_target_name = ''
+        self.route_start_x = 0.0
+        self.route_start_y = 0.0
+        self.route_duration = 0.0
+        self.route_elapsed = 0.0
+        self.route_plan = None  # deque of (cx, cy, eta) the /route stream has yet to deliver
+
+        self.scan_timer = 0.0
+        self.scan_target = None
+
+        # On-demand rendering, as the page's loop: what changed since the last render()
+        self.dirty = True
+        self.rendered_x = math.nan
+        self.rendered_y = math.nan
+        self.animating = False
+        self.drawn_moons = []  # (planet, moon, column, row) of each moon the last render() drew
+        self.idle_tick_ms = IDLE_TICK_MS
+
+        self.calculate_viewport()
+        self.generate_world()
+
+    def calculate_viewport(self):
+        scale = 100 / self.zoom
+        self.cols = math.floor(self.window_width / (self.cell_width * scale))
+        self.rows = math.floor(self.window_height / (self.cell_height * scale))
+        if self.cols % 2 == 0:
+            self.cols -= 1
+        if self.rows % 2 == 0:
+            self.rows -= 1
+
+    def set_zoom(self, zoom):
+        self.zoom = max(MIN_ZOOM, min(MAX_ZOOM, zoom))
+        self.calculate_viewport()
+        self.dirty = True
+
+    def step(self, dt, controls):
+        dt = min(dt, 100)
+        self.now += dt
+
+        if controls.zoom != self.requested_zoom:
+            self.requested_zoom = controls.zoom
+            self.set_zoom(controls.zoom)
+            self.stop_autopilot()
+        if controls.code:
+            self.use_code(*controls.code)
+        if self.autopilot_active and (controls.keys or controls.touch or controls.mouse_active):
+            self.stop_autopilot()
+
+        self.handle_input(dt, controls)
+        self.handle_autopilot(dt)
+
+        self.x += self.vx * (100 / self.zoom)
+        self.y += self.vy * (100 / self.zoom)
+        self.vx *= DRAG
+        self.vy *= DRAG
+
+        self.generate_world()
+        self.update_stars(dt)
+        self.trail.update(self.x, self.y, self.now, self.zoom)
+        self.update_scanning(dt)
+
+    def handle_input(self, dt, controls):
+        speed = PLAYER_SPEED * (dt / 16)
+        for bits in (controls.keys, controls.touch):
+            if bits & UP:
+                self.vy -= speed
+            if bits & DOWN:
+                self.vy += speed
+            if bits & LEFT:
+                self.vx -= speed
+            if bits & RIGHT:
+                self.vx += speed
+
+        if controls.mouse_active:
+            length = math.sqrt(controls.mouse_dx * controls.mouse_dx + controls.mouse_dy * controls.mouse_dy)
+            if length > 10:
+                self.vx += controls.mouse_dx / length * speed
+                self.vy += controls.mouse_dy / length * speed
+
+    def build_chunk(self, cx, cy):
+        start = _perf_counter()
+        chunk = galaxy.generate_chunk_descriptors(cx, cy)
+        self.generation_time += _perf_counter() - start
+        self.chunks_generated += 1
+        return chunk
+
+    def load_chunk(self, cx, cy):
+        chunk = self.prefetched.pop(pack_key(cx, cy), None)
+        if chunk is None:
+            chunk = self.build_chunk(cx, cy)
+            self.prefetch_misses += 1
+        else:
+            self.prefetch_hits += 1
+        self.chunks.add(pack_key(cx, cy), LoadedChunk(chunk, self.now))
+        self.dirty = True
+
+    def prefetch(self):
+        if self.route_plan is not None:
+            # The page skips path prefetching while /route streams the flight's chunks
+            while self.route_plan and self.route_plan[0][2] <= self.route_elapsed + ROUTE_LEAD_MS:
+                cx, cy, _ = self.route_plan.popleft()
+                key = pack_key(cx, cy)
+                if key not in self.chunks and key not in self.chunks.evicted and key not in self.prefetched:
+                    self.prefetched[key] = self.build_chunk(cx, cy)
+                    while len(self.prefetched) > PREFETCH_MAX_CHUNKS:
+                        del self.prefetched[next(iter(self.prefetched))]
+            return
+        for key in projected_chunks(self.x, self.y, self.vx, self.vy, self.zoom, self.prefetch_lookahead):
+            if key not in self.chunks and key not in self.chunks.evicted and key not in self.prefetched:
+                self.prefetched[key] = self.build_chunk(*unpack_key(key))
+                while len(self.prefetched) > PREFETCH_MAX_CHUNKS:
+                    del self.prefetched[next(iter(self.prefetched))]
+                return
+
+    def generate_world(self):
+        chunk_x = math.floor(self.x / CHUNK_SIZE)
+        chunk_y = math.floor(self.y / CHUNK_SIZE)
+        for cy in range(chunk_y - 1, chunk_y + 2):
+            for cx in range(chunk_x - 1, chunk_x + 2):
+                key = pack_key(cx, cy)
+                if key not in self.chunks:
+                    if self.chunks.restore(key):
+                        self.dirty = True
+                    else:
+                        self.load_chunk(cx, cy)
+        self.prefetch()
+        if self.chunks.evict(self.x, self.y):
+            self.dirty = True
+        if self.extra_planets:
+            target = f"planet-{self.autopilot_target_name}" if self.autopilot_active else None
+            self.extra_planets = [planet for planet in self.extra_planets if planet['id'] == target or
+                                  abs(planet['x'] - self.x) < RENDER_DISTANCE and abs(planet['y'] - self.y) < RENDER_DISTANCE]
+
+    def planets(self):
+        for loaded in self.chunks.values():
+            yield from loaded.chunk.planets
+        yield from self.extra_planets
+
+    def update_stars(self, dt):
+        self.blink_timer += dt
+        if self.blink_timer < STAR_BLINK_INTERVAL:
+            return
+        self.blink_timer = 0
+        left = self.x - self.cols / 2
+        top = self.y - self.rows / 2
+        for loaded in self.chunks.values():
+            if loaded.blink(self.now, left, top, left + self.cols, top + self.rows):
+                self.dirty = True
+
+    def update_scanning(self, dt):
+        stopped = abs(self.vx) < 0.01 and abs(self.vy) < 0.01 and not self.autopilot_active
+        if not stopped:
+            self.scan_timer = 0
+            if self.scan_target is not None:
+                self.scan_target = None
+                self.dirty = True
+            return
+        self.scan_timer += dt
+
+        closest = None
+        closest_dist_sq = math.inf
+        for planet in self.planets():
+            dist_sq = (self.x - planet['x']) ** 2 + (self.y - planet['y']) ** 2
+            if dist_sq < (SCAN_RADIUS + planet['size'] / 2) ** 2 and dist_sq < closest_dist_sq:
+                closest_dist_sq = dist_sq
+                closest = planet
+
+        if closest is not self.scan_target:
+            self.scan_target = closest
+            self.scan_timer = 0
+            self.dirty = True
+        elif closest is not None and self.scan_timer >= SCAN_DURATION:
+            for entity in [closest] + closest['moons']:
+                if 'scanData' not in entity:
+                    name = self.autopilot_target_name
+                    if name and entity['id'] == f"planet-{name}":
+                        entity['scanData'] = galaxy.generate_planet_data(galaxy.hash_string(name), False, name)
+                    else:
+                        entity['scanData'] = galaxy.generate_planet_data(
+                            galaxy.hash_string(entity['id']), 'orbitRadius' in entity)
+
+    def use_code(self, name, angle, jitter_x, jitter_y):
+        """handleCodeButton() + startAutopilot(), with the page's Math.random() draws passed in.
+
+        The flight replaced the teleport, so the jitter draws older recordings carry are unused.
+        """
+        offset_distance = max(self.window_width, self.window_height) * 5
+        self.autopilot_target_name = name
+        self.autopilot_target_x = self.x + offset_distance * math.cos(angle)
+        self.autopilot_target_y = self.y + offset_distance * math.sin(angle)
+        self.autopilot_active = True
+
+        self.route_start_x = self.x
+        self.route_start_y = self.y
+        self.route_duration, plan = autopilot.plan(self.x, self.y, self.autopilot_target_x, self.autopilot_target_y)
+        self.route_elapsed = 0.0
+        self.route_plan = collections.deque(plan)
+        target = f"planet-{name}"
+        self.extra_planets = [planet for planet in self.extra_planets if planet['id'] != target]
+        self.extra_planets.append(galaxy.generate_seeded_planet(name, self.autopilot_target_x, self.autopilot_target_y))
+        self.dirty = True
+
+        self.scan_timer = 0
+        self.scan_target = None
+
+    def random_code(self, name):
+        """Draw a Code button event the way the page would, from the seeded RNG."""
+        return (name, self.rng.random() * math.pi * 2, self.rng.random() - 0.5, self.rng.random() - 0.5)
+
+    def handle_autopilot(self, dt):
+        if not self.autopilot_active:
+            return
+        dx = self.autopilot_target_x - self.x
+        dy = self.autopilot_target_y - self.y
+        distance = math.sqrt(dx * dx + dy * dy)
+
+        if distance < 10:
+            self.stop_autopilot()
+            self.x = self.autopilot_target_x
+            self.y = self.autopilot_target_y
+            return
+
+        self.route_elapsed += dt
+        x, y = autopilot.position(self.route_start_x, self.route_start_y, self.autopilot_target_x,
+                                  self.autopilot_target_y, self.route_duration, self.route_elapsed)
+        scale = 100 / self.zoom
+        self.vx = (x - self.x) / scale
+        self.vy = (y - self.y) / scale
+
+    def stop_autopilot(self):
+        if self.autopilot_active:
+            self.autopilot_active = False
+            self.route_plan = None
+            self.vx = 0.0
+            self.vy = 0.0
+
+    def needs_render(self):
+        """Whether the page's on-demand loop would draw this frame."""
+        return (self.dirty or self.animating or len(self.trail) > 0 or
+                abs(self.x - self.rendered_x) > RENDER_MIN_MOVE or abs(self.y - self.rendered_y) > RENDER_MIN_MOVE or
+                self.moons_moved())
+
+    def moons_moved(self):
+        """Whether a moon the last render() drew has since moved into another cell."""
+        left = self.rendered_x - self.cols / 2
+        top = self.rendered_y - self.rows / 2
+        for planet, moon, column, row in self.drawn_moons:
+            mx, my = galaxy.moon_position(planet, moon, self.now)
+            moon_half = moon['size'] / 2
+            if math.floor(mx - moon_half - left) != column or math.floor(my - moon_half - top) != row:
+                return True
+        return False
+
+    def idle(self, controls):
+        """Whether the page would wait idle_tick_ms for the next tick instead of a frame."""
+        return (not (controls.keys or controls.touch or controls.mouse_active or self.autopilot_active) and
+                not self.animating and len(self.trail) == 0 and
+                abs(self.vx) < IDLE_VELOCITY and abs(self.vy) < IDLE_VELOCITY)
+
+    def render(self):
+        """render() as rows of characters: stars, planets, moons, trail and the player."""
+        self.rendered_x = self.x
+        self.rendered_y = self.y
+        self.dirty = False
+        # A filling scan bar changes every frame; moons only when one moves into another cell
+        self.animating = self.scan_target is not None and self.scan_timer < SCAN_DURATION
+        self.drawn_moons = []
+        fastest = 0.0
+        cols, rows = self.cols, self.rows
+        left = self.x - cols / 2
+        top = self.y - rows / 2
+        right = left + cols
+        bottom = top + rows
+        grid = [[' '] * cols for _ in range(rows)]
+
+        for loaded in self.chunks.values():
+            chunk = loaded.chunk
+            chunk_left = chunk.cx * CHUNK_SIZE
+            chunk_top = chunk.cy * CHUNK_SIZE
+            if chunk_left > right or chunk_left + CHUNK_SIZE < left or chunk_top > bottom or chunk_top + CHUNK_SIZE < top:
+                continue
+            xs, ys, chars, visible = chunk.x, chunk.y, chunk.chars, loaded.visible
+            first = max(0, math.floor(top) - chunk_top)
+            last = min(CHUNK_SIZE - 1, math.floor(bottom) - chunk_top)
+            for row in range(first, last + 1):
+                for i in loaded.rows[row]:
+                    sx = xs[i] - left
+                    sy = ys[i] - top
+                    if 0 <= sx < cols and 0 <= sy < rows and visible[i]:
+                        grid[int(sy)][int(sx)] = chars[i]
+
+        for planet in self.planets():
+            half = planet['size'] / 2
+            px, py = planet['x'], planet['y']
+            if px + half < left or px - half > right or py + half < top or py - half > bottom:
+                continue
+            self._blit(grid, galaxy.ensure_pattern(planet), px - half - left, py - half - top)
+            for moon in planet['moons']:
+                moon_half = moon['size'] / 2
+                mx, my = galaxy.moon_position(planet, moon, self.now)
+                if mx + moon_half < left or mx - moon_half > right or my + moon_half < top or my - moon_half > bottom:
+                    continue
+                self.drawn_moons.append((planet, moon, math.floor(mx - moon_half - left), math.floor(my - moon_half - top)))
+                fastest = max(fastest, moon['orbitRadius'])
+                self._blit(grid, galaxy.ensure_pattern(moon), mx - moon_half - left, my - moon_half - top)
+        # Parked, tick as often as the fastest moon drawn can cross a cell
+        self.idle_tick_ms = min(IDLE_TICK_MS, 1 / (galaxy.MOON_ORBIT_SPEED * fastest)) if fastest else IDLE_TICK_MS
+
+        opacity = self.trail.fade(self.now)
+        for i in self.trail.slots():
+            sx = math.floor(self.trail.x[i] - left)
+            sy = math.floor(self.trail.y[i] - top)
+            if opacity[i] > 0 and 0 <= sx < cols and 0 <= sy < rows:
+                grid[sy][sx] = '·'
+
+        grid[rows // 2][cols // 2] = '■'
+        return [''.join(row) for row in grid]
+
+    def _blit(self, grid, pattern, screen_left, screen_top):
+        rows, cols = len(grid), len(grid[0])
+        for py, row in enumerate(pattern):
+            sy = math.floor(screen_top + py)
+            if not 0 <= sy < rows:
+                continue
+            line = row['line']
+            target = grid[sy]
+            for px, char in enumerate(line):
+                if char != ' ':
+                    sx = math.floor(screen_left + px)
+                    if 0 <= sx < cols:
+                        target[sx] = char
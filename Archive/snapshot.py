@@ -0,0 +1,168 @@
+# Cache snapshots, so a restarted server starts with the caches of the one it replaces.
+#
+# A snapshot file is MAGIC, a length-prefixed JSON header, the preset
+# compression dictionary, then one record per cache entry: a RECORD header
+# (cache index, value kind, key and value lengths), the key as JSON and the
+# value as raw bytes or JSON. Nothing in it is executable, and a file that
+# does not parse is treated as no snapshot. The header carries a fingerprint
+# of the modules whose output is cached, so a deploy that changes the
+# generator starts cold instead of serving stale payloads. Snapshots live in
+# a directory only the server's user can enter, and load() also refuses a
+# file that user does not own or that others could have written.
+import hashlib
+import json
+import os
+import stat
+import struct
+import tempfile
+import time
+
+import chunks
+import compression
+import galaxy
+import seeds
+import tiles
+
+FORMAT = 2
+MAGIC = b'XSNAP\n'
+LENGTH = struct.Struct('<I')
+RECORD = struct.Struct('<HBII')  # cache index, value kind, key bytes, value bytes
+RAW, JSON = 0, 1
+GENERATOR_MODULES = (galaxy, seeds, chunks, compression, tiles)
+
+
+def fingerprint():
+    """SHA-1 over the source of the modules that produce cached payloads."""
+    digest = hashlib.sha1()
+    for module in GENERATOR_MODULES:
+        with open(module.__file__, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def private_directory():
+    """$XDG_RUNTIME_DIR, or a per-user directory in the temp directory, created mode 0700.
+
+    ValueError when it exists but belongs to someone else or others can enter it.
+    """
+    runtime = os.environ.get('XDG_RUNTIME_DIR')
+    directory = os.path.join(runtime, 'xeil') if runtime else os.path.join(tempfile.gettempdir(), f"xeil-{os.getuid()}")
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise ValueError(f"{directory} must be a directory owned by this user with mode 0700")
+    return directory
+
+
+def default_path(port):
+    return os.path.join(private_directory(), f"{port}.snapshot")
+
+
+def _key(value):
+    """A key read back from JSON: lists become the tuples they were."""
+    return tuple(_key(item) for item in value) if isinstance(value, list) else value
+
+
+def save(path, caches, dictionary=None):
+    """Write every cache in `caches` (name -> cache with items()) to path; returns the entry count."""
+    names = list(caches)
+    header = {
+        'format': FORMAT,
+        'fingerprint': fingerprint(),
+        'caches': names,
+        'dictionary': {'bytes': len(dictionary.data), 'samples': dictionary.samples} if dictionary is not None else None,
+    }
+    encoded = json.dumps(header).encode('utf-8')
+    count = 0
+    # A fresh file only this user can read, renamed over the old one, so a reader never sees half of one
+    temporary = f"{path}.{os.getpid()}.tmp"
+    fd = os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(MAGIC + LENGTH.pack(len(encoded)) + encoded)
+            if dictionary is not None:
+                f.write(dictionary.data)
+            for index, name in enumerate(names):
+                for key, value in caches[name].items():
+                    kind = RAW if isinstance(value, bytes) else JSON
+                    data = value if kind == RAW else json.dumps(value, separators=(',', ':')).encode('utf-8')
+                    key_data = json.dumps(key, separators=(',', ':')).encode('utf-8')
+                    f.write(RECORD.pack(index, kind, len(key_data), len(data)) + key_data + data)
+                    count += 1
+        os.replace(temporary, path)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+    return count
+
+
+def load(path):
+    """The snapshot at path as a dict, or None when there is none, it is not trusted or it does not parse."""
+    try:
+        fd = os.open(path, os.O_RDONLY | os.O_NOFOLLOW)
+    except OSError:
+        return None
+    try:
+        with os.fdopen(fd, 'rb') as f:
+            info = os.fstat(f.fileno())
+            if not stat.S_ISREG(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o022:
+                return None
+            data = f.read()
+        if not data.startswith(MAGIC):
+            return None
+        offset = len(MAGIC)
+        (length,) = LENGTH.unpack_from(data, offset)
+        offset += LENGTH.size
+        header = json.loads(data[offset:offset + length])
+        offset += length
+        if header.get('format') != FORMAT or header.get('fingerprint') != fingerprint():
+            return None
+        dictionary = None
+        if header['dictionary'] is not None:
+            size = header['dictionary']['bytes']
+            dictionary = (data[offset:offset + size], header['dictionary']['samples'])
+            offset += size
+        names = header['caches']
+        entries = {name: [] for name in names}
+        while offset < len(data):
+            index, kind, key_length, value_length = RECORD.unpack_from(data, offset)
+            offset += RECORD.size
+            key = _key(json.loads(data[offset:offset + key_length]))
+            offset += key_length
+            value = data[offset:offset + value_length]
+            offset += value_length
+            if len(value) != value_length:
+                return None
+            entries[names[index]].append((key, value if kind == RAW else json.loads(value)))
+        return {'dictionary': dictionary, 'caches': entries}
+    except Exception:
+        # A truncated or foreign file is no snapshot; the server starts cold
+        return None
+
+
+def restore(snapshot, caches):
+    """Put the snapshot's entries back into the caches of the same names; returns the entry count."""
+    restored = 0
+    for name, items in snapshot['caches'].items():
+        cache = caches.get(name)
+        if cache is not None:
+            cache.restore(items)
+            restored += len(items)
+    return restored
+
+
+def dictionary(snapshot):
+    """The snapshot's compression.Dictionary, which saves building one at startup."""
+    if snapshot is None or snapshot['dictionary'] is None:
+        return None
+    data, samples = snapshot['dictionary']
+    return compression.Dictionary(data, samples)
+
+
+def timed_restore(path, caches):
+    """(snapshot or None, entries restored, seconds) for the snapshot at path."""
+    start = time.perf_counter()
+    snapshot = load(path)
+    restored = restore(snapshot, caches) if snapshot is not None else 0
+    return snapshot, restored, time.perf_counter() - start
@@ -0,0 +1,144 @@
+# Aggregation of the timing histograms the page POSTs to /telemetry.
+#
+# Clients send bucket counts rather than raw samples, so ingesting a batch is a
+# few list additions and memory is bounded by device classes x phases x buckets.
+import json
+import math
+import threading
+
+# ms upper bounds; must match TELEMETRY_BUCKETS in the page
+BUCKETS_MS = [0.25, 0.5, 1, 2, 4, 8, 16, 33, 50, 100, 250, 500]
+PHASES = ('frame', 'generateChunk', 'generatePlanetPattern', 'render', 'arrival')
+QUANTILES = (0.5, 0.9, 0.99)
+MAX_DEVICE_CLASSES = 64
+MAX_BODY_BYTES = 64 * 1024
+
+
+def _device_number(device, name):
+    """device[name] as a float, 0 when absent; ValueError unless it is a finite non-negative number."""
+    value = device.get(name) or 0
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"device {name} is not a number")
+    try:
+        value = float(value)
+    except OverflowError:
+        raise ValueError(f"device {name} is out of range") from None
+    if not math.isfinite(value) or value < 0:
+        raise ValueError(f"device {name} is out of range")
+    return value
+
+
+def device_class(device):
+    """Coarse bucket for a client: form factor, core count, memory and renderer."""
+    cores = int(_device_number(device, 'cores'))
+    memory = _device_number(device, 'memory')
+    form = 'mobile' if device.get('mobile') else 'desktop'
+    if cores <= 0:
+        core_class = 'unknown'
+    elif cores <= 2:
+        core_class = '1-2c'
+    elif cores <= 4:
+        core_class = '3-4c'
+    elif cores <= 8:
+        core_class = '5-8c'
+    else:
+        core_class = '9+c'
+    memory_class = f"{memory:g}gb" if memory > 0 else 'unknown'
+    renderer = 'canvas' if device.get('renderer') == 'canvas' else 'dom'
+    return f"{form}/{core_class}/{memory_class}/{renderer}"
+
+
+def quantile(counts, q):
+    """Estimate a quantile (ms) from bucket counts, interpolating inside the bucket."""
+    total = sum(counts)
+    if total == 0:
+        return 0.0
+    rank = q * total
+    seen = 0
+    lower = 0.0
+    for i, count in enumerate(counts):
+        upper = BUCKETS_MS[i] if i < len(BUCKETS_MS) else BUCKETS_MS[-1] * 2
+        if count and seen + count >= rank:
+            return lower + (upper - lower) * (rank - seen) / count
+        seen += count
+        lower = upper
+    return lower
+
+
+class TelemetryStore:
+    def __init__(self):
+        self.histograms = {}  # (device class, phase) -> bucket counts
+        self.prefetch = {}  # device class -> [hits, misses]
+        self.batches = 0
+        self.lock = threading.Lock()
+
+    def ingest(self, body):
+        """Merge one client batch; raises ValueError for anything malformed."""
+        report = json.loads(body)
+        if report.get('buckets') != BUCKETS_MS:
+            raise ValueError("bucket bounds do not match the server")
+        phases = report.get('phases')
+        if not isinstance(phases, dict):
+            raise ValueError("missing phases")
+        cls = device_class(report.get('device') or {})
+        size = len(BUCKETS_MS) + 1
+
+        updates = []
+        for phase in PHASES:
+            counts = phases.get(phase)
+            if counts is None:
+                continue
+            if len(counts) != size or not all(isinstance(c, int) and c >= 0 for c in counts):
+                raise ValueError(f"bad counts for {phase}")
+            updates.append((phase, counts))
+
+        prefetch = report.get('prefetch') or {}
+        prefetch_counts = [prefetch.get('hits', 0), prefetch.get('misses', 0)]
+        if not all(isinstance(c, int) and c >= 0 for c in prefetch_counts):
+            raise ValueError("bad prefetch counts")
+
+        with self.lock:
+            known = {key[0] for key in self.histograms}
+            if cls not in known and len(known) >= MAX_DEVICE_CLASSES:
+                cls = 'other'
+            for phase, counts in updates:
+                merged = self.histograms.setdefault((cls, phase), [0] * size)
+                for i, count in enumerate(counts):
+                    merged[i] += count
+            totals = self.prefetch.setdefault(cls, [0, 0])
+            totals[0] += prefetch_counts[0]
+            totals[1] += prefetch_counts[1]
+            self.batches += 1
+
+    def summary(self):
+        """{device class: {phase: {'count': n, 'p50': ms, ...}, 'prefetchHitRate': ratio}}"""
+        with self.lock:
+            items = [(key, list(counts)) for key, counts in self.histograms.items()]
+            prefetch = {cls: list(totals) for cls, totals in self.prefetch.items()}
+        result = {}
+        for (cls, phase), counts in sorted(items):
+            entry = {'count': sum(counts)}
+            for q in QUANTILES:
+                entry[f"p{q * 100:g}"] = round(quantile(counts, q), 3)
+            result.setdefault(cls, {})[phase] = entry
+        for cls, (hits, misses) in prefetch.items():
+            if hits + misses:
+                result.setdefault(cls, {})['prefetchHitRate'] = round(hits / (hits + misses), 4)
+        return result
+
+    def expose(self):
+        """Prometheus lines, so the metrics registry can include client percentiles."""
+        name = 'xeil_client_phase_milliseconds'
+        lines = [f"# HELP {name} Client-reported phase durations by device class.", f"# TYPE {name} untyped"]
+        hit_rates = []
+        for cls, phases in self.summary().items():
+            if 'prefetchHitRate' in phases:
+                hit_rates.append(f'xeil_client_prefetch_hit_ratio{{device_class="{cls}"}} {phases.pop("prefetchHitRate")}')
+            for phase, entry in phases.items():
+                labels = f'device_class="{cls}",phase="{phase}"'
+                for q in QUANTILES:
+                    lines.append(f'{name}{{{labels},quantile="{q:g}"}} {entry[f"p{q * 100:g}"]}')
+                lines.append(f'{name}_count{{{labels}}} {entry["count"]}')
+        lines.append("# HELP xeil_client_prefetch_hit_ratio Share of chunk loads the client had already prefetched.")
+        lines.append("# TYPE xeil_client_prefetch_hit_ratio gauge")
+        return lines + hit_rates
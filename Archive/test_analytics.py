@@ -0,0 +1,58 @@
+# Region statistics: the streamed scans match the page's cards, tasks tile a region once, and partial results merge to the whole.
+import json
+
+import analytics
+import galaxy
+
+REGION = (-2, 3, 3, 6)  # 5 x 3 chunks
+
+
+def test_bodies_match_the_generator():
+    for body, card in analytics.scans(analytics.bodies([(4, -1)])):
+        cx, cy, i, m, _ = body
+        planet = galaxy.planet_descriptor(cx, cy, i)
+        expected_id = planet['id'] if m is None else planet['moons'][m]['id']
+        assert analytics.body_id(body) == expected_id
+        assert card == galaxy.generate_planet_data(galaxy.hash_string(expected_id), m is not None)
+
+
+def test_tasks_tile_the_region_once():
+    covered = []
+    for index in range(analytics.task_count(*REGION, side=2)):
+        covered += analytics.region_chunks(*analytics.task_region(*REGION, index, side=2))
+    assert sorted(covered) == sorted(analytics.region_chunks(*REGION))
+    assert analytics.task_count(*REGION, side=2) == 6
+
+
+def test_merged_tasks_equal_one_pass():
+    whole = analytics.run_task(*REGION, top=3)
+    merged = analytics.RegionStats(3)
+    for index in range(analytics.task_count(*REGION, side=2)):
+        merged.merge(analytics.RegionStats.from_json(analytics.run_task(*analytics.task_region(*REGION, index, side=2), top=3)))
+    assert merged.to_json() == whole
+    assert whole['chunks'] == 15 and whole['planets'] == 15 * analytics.PLANETS_PER_CHUNK
+    assert sum(whole['temperatures']) == whole['planets'] + whole['moons']
+    assert len(whole['populous']) == 3 and whole['populous'] == sorted(whole['populous'], reverse=True)
+
+
+def test_checkpoint_round_trip(tmp_path):
+    path = str(tmp_path / 'stats.json')
+    stats = analytics.RegionStats.from_json(analytics.run_task(0, 0, 2, 2, top=3), top=3)
+    analytics.save_checkpoint(path, REGION, 2, 3, 4, stats)
+    next_task, loaded = analytics.load_checkpoint(path, REGION, 2, 3)
+    assert next_task == 4 and loaded.to_json() == stats.to_json()
+    # A different region, task size or top-k starts over
+    assert analytics.load_checkpoint(path, (0, 0, 1, 1), 2, 3)[0] == 0
+    assert analytics.load_checkpoint(path, REGION, 4, 3)[0] == 0
+    assert analytics.load_checkpoint(str(tmp_path / 'missing.json'), REGION, 2, 3)[0] == 0
+
+
+def test_analyze_resumes_from_its_checkpoint(tmp_path):
+    path = str(tmp_path / 'stats.json')
+    expected = analytics.run_task(*REGION, top=3)
+    assert analytics.analyze(REGION, workers=1, checkpoint=path, side=2, top=3).to_json() == expected
+    with open(path) as f:
+        assert json.load(f)['next'] == 6
+    calls = []
+    resumed = analytics.analyze(REGION, workers=1, checkpoint=path, side=2, top=3, progress=lambda *args: calls.append(args))
+    assert resumed.to_json() == expected and calls == []
@@ -0,0 +1,74 @@
+# plan() must list every chunk the ship's 3x3 block touches on the way, once, in order of arrival.
+import math
+
+import pytest
+
+import autopilot
+from galaxy import CHUNK_SIZE
+
+FLIGHTS = [
+    (0.0, 0.0, 9600.0, 0.0),
+    (100.0, 100.0, -2500.0, 7300.0),
+    (-50.0, -50.0, -9000.0, -9100.0),  # the diagonal, where both chunk coordinates change together
+    (1.0, 2.0, 1.0 + 3 * CHUNK_SIZE, 2.0 + 3 * CHUNK_SIZE),
+    (5e7, -3e7, 5e7 + 1234.5, -3e7 + 321.0),
+]
+
+
+def block(x, y):
+    cx, cy = math.floor(x / CHUNK_SIZE), math.floor(y / CHUNK_SIZE)
+    return {(cx + dx, cy + dy) for dy in (-1, 0, 1) for dx in (-1, 0, 1)}
+
+
+def flown(x0, y0, x1, y1, steps):
+    """The 3x3 blocks the ship is in along the straight line, sampled far finer than plan() does."""
+    needed = set()
+    for k in range(steps + 1):
+        needed |= block(x0 + (x1 - x0) * k / steps, y0 + (y1 - y0) * k / steps)
+    return needed
+
+
+@pytest.mark.parametrize('flight', FLIGHTS)
+def test_plan_covers_every_chunk(flight):
+    x0, y0, x1, y1 = flight
+    duration, chunks = autopilot.plan(x0, y0, x1, y1)
+    planned = {(cx, cy) for cx, cy, _ in chunks}
+    steps = math.ceil(math.hypot(x1 - x0, y1 - y0))  # one sample per world unit
+    assert flown(x0, y0, x1, y1, steps) - block(x0, y0) <= planned
+    assert not planned & block(x0, y0)
+
+
+@pytest.mark.parametrize('flight', FLIGHTS)
+def test_plan_lists_each_chunk_once_in_order(flight):
+    duration, chunks = autopilot.plan(*flight)
+    assert len({(cx, cy) for cx, cy, _ in chunks}) == len(chunks)
+    etas = [eta for _, _, eta in chunks]
+    assert etas == sorted(etas)
+    assert all(0 <= eta <= duration for eta in etas)
+
+
+def test_eta_is_when_the_ship_reaches_the_chunk():
+    x0, y0, x1, y1 = FLIGHTS[0]
+    duration, chunks = autopilot.plan(x0, y0, x1, y1)
+    for cx, cy, eta in chunks:
+        x, _ = autopilot.position(x0, y0, x1, y1, duration, eta)
+        # The chunk's block edge is at most one sampling step behind the ship
+        assert (cx - 1) * CHUNK_SIZE <= x + autopilot.SAMPLE_STEP
+
+
+def test_short_hop_takes_the_minimum_flight_time():
+    duration, chunks = autopilot.plan(10.0, 10.0, 10.0, 10.0)
+    assert duration == autopilot.ROUTE_MIN_MS
+    assert chunks == []
+
+
+@pytest.mark.parametrize('x, y, expected', [
+    (0.0, 0.0, True),
+    ((2 ** 31 - 2) * CHUNK_SIZE, -(2 ** 31 - 1) * CHUNK_SIZE, True),
+    ((2 ** 31 - 1) * CHUNK_SIZE, 0.0, False),  # the block's right column is past INT32_MAX
+    (0.0, -(2 ** 31) * CHUNK_SIZE, False),
+    (math.inf, 0.0, False),
+    (0.0, math.nan, False),
+])
+def test_block_in_range(x, y, expected):
+    assert autopilot.block_in_range(x, y) is expected
@@ -0,0 +1,69 @@
+# HashRing churn and the checks on who may join the ring.
+import random
+
+import pytest
+
+import cluster
+
+NODES = [f"http://127.0.0.1:{8001 + k}" for k in range(5)]
+
+
+@pytest.fixture(scope='module')
+def sample():
+    rng = random.Random(3)
+    return [(rng.randrange(-10**6, 10**6), rng.randrange(-10**6, 10**6)) for _ in range(20000)]
+
+
+@pytest.mark.parametrize('size', [1, 2, 4])
+def test_join_moves_about_one_nth(sample, size):
+    before = cluster.HashRing(NODES[:size])
+    after = cluster.HashRing(NODES[:size + 1])
+    ideal = 1 / (size + 1)
+    assert abs(cluster.moved_fraction(before, after, sample) - ideal) < 0.35 * ideal
+    # Every key that moved, moved to the new node
+    for cx, cy in sample:
+        if before.node_for(cx, cy) != after.node_for(cx, cy):
+            assert after.node_for(cx, cy) == NODES[size]
+
+
+def test_leave_returns_keys_to_their_old_owners(sample):
+    ring = cluster.HashRing(NODES[:3])
+    before = cluster.HashRing(NODES[:3])
+    assert ring.add(NODES[3])
+    assert ring.remove(NODES[3])
+    assert cluster.moved_fraction(before, ring, sample) == 0
+
+
+def test_add_and_remove_report_changes():
+    ring = cluster.HashRing(NODES[:1])
+    assert not ring.add(NODES[0])
+    assert not ring.remove(NODES[1])
+    assert ring.nodes == NODES[:1]
+    assert ring.remove(NODES[0])
+    with pytest.raises(LookupError):
+        ring.node_for(0, 0)
+
+
+def test_shares_sum_to_one():
+    shares = cluster.HashRing(NODES).shares()
+    assert abs(sum(shares.values()) - 1) < 1e-9
+    assert all(0.1 < share < 0.3 for share in shares.values())
+
+
+@pytest.mark.parametrize('node', ['http://localhost:8001', 'http://127.0.0.1:8001/', 'http://[::1]:8001'])
+def test_parse_node_accepts_local_nodes(node):
+    assert cluster.parse_node(node) == node.rstrip('/')
+
+
+@pytest.mark.parametrize('node', ['http://10.0.0.5:8001', 'http://example.com:80', 'https://localhost:8001',
+                                  'http://localhost', 'http://localhost:8001/admin', 'http://user@localhost:8001',
+                                  'http://localhost:8001?x=1', ''])
+def test_parse_node_rejects_anything_else(node):
+    with pytest.raises(ValueError):
+        cluster.parse_node(node)
+
+
+@pytest.mark.parametrize('address, loopback', [('127.0.0.1', True), ('::1', True), ('::ffff:127.0.0.1', True),
+                                               ('10.0.0.5', False), ('::ffff:10.0.0.5', False), ('localhost', False)])
+def test_is_loopback(address, loopback):
+    assert cluster.is_loopback(address) == loopback
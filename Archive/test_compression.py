@@ -0,0 +1,73 @@
+# Content-Encoding negotiation and the preset-dictionary and gzip round trips.
+import gzip
+import json
+
+import pytest
+
+import compression
+import galaxy
+
+
+@pytest.fixture(scope='module')
+def dictionary():
+    return compression.Dictionary.build(chunk_count=2)
+
+
+@pytest.fixture(scope='module')
+def payload():
+    chunk = galaxy.generate_chunk_descriptors(123457, -98765)
+    return json.dumps(galaxy.ensure_pattern(galaxy.descriptor_for_id(chunk.planets[0]['id'])),
+                      separators=(',', ':')).encode('utf-8')
+
+
+def test_negotiate(dictionary):
+    version = dictionary.version
+    assert compression.negotiate(None, None, dictionary) is None
+    assert compression.negotiate('identity', None, dictionary) is None
+    assert compression.negotiate('gzip, deflate, br', None, dictionary) == 'gzip'
+    assert compression.negotiate('GZIP;q=0.5', None, dictionary) == 'gzip'
+    assert compression.negotiate(f'{compression.ENCODING}, gzip', version, dictionary) == compression.ENCODING
+    # A client holding an older dictionary, or a server without one, falls back to gzip
+    assert compression.negotiate(f'{compression.ENCODING}, gzip', 'stale', dictionary) == 'gzip'
+    assert compression.negotiate(f'{compression.ENCODING}, gzip', version, None) == 'gzip'
+    assert compression.negotiate(compression.ENCODING, 'stale', dictionary) is None
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('gzip;q=0', None),
+    ('gzip; q=0.0, identity', None),
+    ('gzip;q=0.001', 'gzip'),
+    ('gzip;q=nope', None),
+    ('gzip;q=1.5', None),
+    ('{0};q=0, gzip', 'gzip'),
+    ('{0};q=0.8, gzip;q=0', '{0}'),
+    ('{0};Q=0, gzip;Q=0', None),
+])
+def test_negotiate_honours_q_values(dictionary, header, expected):
+    header = header.format(compression.ENCODING)
+    expected = expected and expected.format(compression.ENCODING)
+    assert compression.negotiate(header, dictionary.version, dictionary) == expected
+
+
+def test_dictionary_round_trip(dictionary, payload):
+    body = compression.encode(payload, compression.ENCODING, dictionary)
+    assert dictionary.decompress(body) == payload
+    assert len(body) < len(gzip.compress(payload, compression.LEVEL))
+
+
+def test_gzip_round_trip(dictionary, payload):
+    assert gzip.decompress(compression.encode(payload, 'gzip', dictionary)) == payload
+
+
+def test_dictionary_is_reproducible(dictionary):
+    again = compression.Dictionary.build(chunk_count=2)
+    assert again.data == dictionary.data and again.version == dictionary.version
+    assert len(dictionary.data) <= compression.DICT_BYTES
+
+
+def test_compressed_cache_compresses_once(dictionary, payload):
+    cache = compression.CompressedCache(capacity=4)
+    first = cache.fetch('pattern', payload, 'gzip', dictionary)
+    assert cache.fetch('pattern', b'not used on a hit', 'gzip', dictionary) is first
+    assert cache.get(('pattern', 'gzip')) is first
+    assert dictionary.decompress(cache.fetch('pattern', payload, compression.ENCODING, dictionary)) == payload
@@ -0,0 +1,91 @@
+# Exported .npy columns: valid headers, and a Region that serves exactly what the generators build.
+import ast
+import json
+import struct
+
+import pytest
+
+import export
+import galaxy
+
+REGION = (-1, 2, 1, 3)  # two chunks, one row
+
+
+@pytest.fixture(scope='module')
+def exported(tmp_path_factory):
+    out = tmp_path_factory.mktemp('export')
+    export.export(REGION, out)
+    return out
+
+
+def read_header(path):
+    with open(path, 'rb') as f:
+        data = f.read(export.HEADER_BYTES)
+    assert data[:6] == export.MAGIC and data[6:8] == b'\x01\x00'
+    (length,) = struct.unpack_from('<H', data, 8)
+    assert 10 + length == export.HEADER_BYTES  # numpy wants the data 64-byte aligned
+    assert data[export.HEADER_BYTES - 1:] == b'\n'
+    return ast.literal_eval(data[10:10 + length].decode('latin1'))
+
+
+def test_npy_header():
+    header = export.npy_header('<f8', 12345)
+    assert len(header) == export.HEADER_BYTES
+    assert header.startswith(export.MAGIC + b'\x01\x00')
+    assert ast.literal_eval(header[10:].decode('latin1')) == {'descr': '<f8', 'fortran_order': False, 'shape': (12345,)}
+
+
+def test_columns_have_headers_for_their_rows(exported):
+    manifest = json.loads((exported / 'manifest.json').read_text())
+    assert manifest['complete'] and manifest['chunksWritten'] == 2
+    assert manifest['tables']['stars']['rows'] == 2 * galaxy.STAR_TOTAL
+    assert manifest['tables']['planets']['rows'] == 2 * export.PLANETS_PER_CHUNK
+    for table, columns in export.TABLES.items():
+        for name, kind in columns:
+            path = exported / table / f"{name}.npy"
+            header = read_header(path)
+            rows = manifest['tables'][table]['rows']
+            assert header == {'descr': export.column_descr(kind), 'fortran_order': False, 'shape': (rows,)}
+            width = int(kind[1:]) if kind.startswith('S') else struct.calcsize(kind)
+            assert path.stat().st_size == export.HEADER_BYTES + rows * width
+
+
+@pytest.mark.parametrize('cx, cy', [(-1, 2), (0, 2)])
+def test_region_serves_generated_chunks(exported, cx, cy):
+    region = export.Region(exported)
+    expected = galaxy.generate_chunk_descriptors(cx, cy)
+    chunk = region.chunk(cx, cy)
+    assert list(chunk.x) == list(expected.x) and list(chunk.y) == list(expected.y)
+    assert list(chunk.brightness) == list(expected.brightness)
+    assert chunk.chars == expected.chars
+    assert list(chunk.blink_speed) == list(expected.blink_speed)
+    assert list(chunk.blink_offset) == list(expected.blink_offset)
+    assert chunk.planets == expected.planets
+
+
+def test_region_serves_reduced_density(exported):
+    region = export.Region(exported)
+    expected = galaxy.generate_chunk_descriptors(0, 2, 0.5)
+    chunk = region.chunk(0, 2, 0.5)
+    assert list(chunk.x) == list(expected.x) and chunk.chars == expected.chars
+
+
+def test_region_serves_scan_cards(exported):
+    cards = export.Region(exported).cards(-1, 2)
+    for planet in galaxy.generate_chunk_descriptors(-1, 2).planets:
+        assert cards[planet['id']] == galaxy.generate_planet_data(galaxy.hash_string(planet['id']))
+        for moon in planet['moons']:
+            assert cards[moon['id']] == galaxy.generate_planet_data(galaxy.hash_string(moon['id']), True)
+
+
+def test_region_leaves_other_chunks_to_the_generator(exported):
+    region = export.Region(exported)
+    assert region.chunk(1, 2) is None and region.chunk(0, 3) is None and region.cards(-2, 2) is None
+
+
+def test_unfinished_export_is_refused(exported, tmp_path):
+    manifest = json.loads((exported / 'manifest.json').read_text())
+    manifest['complete'] = False
+    (tmp_path / 'manifest.json').write_text(json.dumps(manifest))
+    with pytest.raises(ValueError):
+        export.Region(tmp_path)
@@ -0,0 +1,95 @@
+# Generator checks: parity with the page's JS generator, and the moon ephemeris table against the orbit it samples.
+import hashlib
+import json
+import math
+
+import pytest
+
+import galaxy
+
+PLANET_ID = 'planet-0-0-16'
+
+# Expected values printed by WORKER_JS under node: the first stars of a chunk as
+# (x, y, brightness, char code, blinkSpeed, blink offset), each planet's descriptor
+# with its moons as (id, size, orbitRadius, orbitAngle, patternState), and the
+# pattern's middle line plus the first 16 hex digits of sha1(JSON.stringify(pattern)).
+STARS = {
+    (0, 0): [(842.4653080292046, 78.71075556613505, 3, 46, 2373.8462936598808, 487.5734242849688),
+             (539.6422776393592, 652.4023427627981, 2, 46, 2741.564432391897, 1450.164908154384)],
+    (-123457, 98765): [(-123456175.92942877, 98765761.54531166, 4, 46, 5369.415769120678, 2870.458396754135),
+                       (-123456076.2811366, 98765879.2001605, 4, 42, 4872.883229283616, 1469.6665053899906)],
+}
+PLANETS = [
+    ('planet-0-0-16', 268.28174572438, 708.0536261200905, 21, 1984202470,
+     [('moon-0-0-16-0', 4, 22.26198098435998, 1.8564685895284438, 2305808023),
+      ('moon-0-0-16-1', 3, 17.949190432205796, 5.23004963642314, 2305808022),
+      ('moon-0-0-16-2', 6, 19.845327456481755, 1.8567182847749673, 2305808021)],
+     ' OOo@%#%**^*^^%#OOOoO', '90315c563dbc70e2'),
+    ('planet-3--7-8', 3135.2497399784625, -6484.432291705161, 18, 2070010968,
+     [('moon-3--7-8-0', 4, 17.6865449892357, 2.154898627285958, 3091666594)],
+     '░=%-~%░&@~.&%*=*=*', 'd5335c7aa35124b3'),
+    ('planet--123457-98765-2', -123456885.21253923, 98765614.29392803, 18, 1272291879,
+     [('moon--123457-98765-2-0', 5, 17.290311289019883, 1.6573759587840915, 2227646456)],
+     'oOOOOOoOoOOO%%&@:~', '842200dd71446d74'),
+]
+SCANS = [
+    ('0,0,16', False, {'name': ' Lumine-613', 'lifeForm': 'No', 'population': '0', 'temperature': '45°C',
+                       'age': '7.02 billion years', 'species': 'None'}),
+    ('0,0,16-0', True, {'name': 'Iapetus-4', 'lifeForm': 'Yes', 'population': '9,302,168,393', 'temperature': '-53°C',
+                        'age': '6.88 billion years', 'species': 'Bio-luminescent Avianoid Sentient'}),
+]
+
+
+@pytest.fixture(scope='module')
+def planet():
+    return galaxy.descriptor_for_id(PLANET_ID)
+
+
+@pytest.mark.parametrize('cx, cy', list(STARS))
+def test_first_stars_match_the_page(cx, cy):
+    chunk = galaxy.generate_chunk_descriptors(cx, cy)
+    for i, expected in enumerate(STARS[cx, cy]):
+        star = (chunk.x[i], chunk.y[i], chunk.brightness[i], ord(chunk.chars[i]), chunk.blink_speed[i], chunk.blink_offset[i])
+        assert star == expected
+
+
+@pytest.mark.parametrize('body_id, x, y, size, state, moons, line, digest', PLANETS)
+def test_planet_matches_the_page(body_id, x, y, size, state, moons, line, digest):
+    planet = galaxy.descriptor_for_id(body_id)
+    assert (planet['x'], planet['y'], planet['size'], planet['patternState']) == (x, y, size, state)
+    assert [(m['id'], m['size'], m['orbitRadius'], m['orbitAngle'], m['patternState']) for m in planet['moons']] == moons
+    pattern = galaxy.ensure_pattern(planet)
+    assert pattern[len(pattern) // 2]['line'] == line
+    text = json.dumps(pattern, separators=(',', ':'), ensure_ascii=False)
+    assert hashlib.sha1(text.encode('utf-8')).hexdigest()[:16] == digest
+
+
+@pytest.mark.parametrize('seed_string, is_moon, expected', SCANS)
+def test_planet_data_matches_the_page(seed_string, is_moon, expected):
+    assert galaxy.generate_planet_data(galaxy.hash_string(seed_string), is_moon) == expected
+
+
+def exact(planet, moon, t):
+    angle = moon['orbitAngle'] + t * galaxy.MOON_ORBIT_SPEED
+    return (planet['x'] + moon['orbitRadius'] * math.cos(angle),
+            planet['y'] + moon['orbitRadius'] * math.sin(angle))
+
+
+def test_ephemeris_follows_the_orbit(planet):
+    times = [-1e6, -123.4, 0.0, 16.7, 5e5, 1.7e12]
+    for moon, xs, ys in galaxy.system_ephemeris(planet, times):
+        for t, x, y in zip(times, xs, ys):
+            assert (x, y) == galaxy.moon_position(planet, moon, t)
+            ex, ey = exact(planet, moon, t)
+            assert abs(x - ex) < 1e-3 and abs(y - ey) < 1e-3
+
+
+def test_negative_time_just_below_a_wrap(planet):
+    # The phase sum is a tiny negative number here, which float % rounds to EPHEMERIS_SAMPLES itself
+    t = -3712.937179056888
+    moon = planet['moons'][0]
+    assert (moon['ephemerisPhase'] + t * galaxy.EPHEMERIS_RATE) % galaxy.EPHEMERIS_SAMPLES == galaxy.EPHEMERIS_SAMPLES
+    x, y = galaxy.moon_position(planet, moon, t)
+    assert (x, y) == (planet['x'] + moon['orbitRadius'], planet['y'])
+    _, xs, ys = galaxy.system_ephemeris(planet, [t, t + 1])[0]
+    assert (xs[0], ys[0]) == (x, y)
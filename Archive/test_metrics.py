@@ -0,0 +1,61 @@
+# Prometheus text exposition of counters, gauges and histograms, and the sampling profiler's collapsed stacks.
+import threading
+
+import metrics
+
+
+def test_counter_exposes_each_label_set():
+    counter = metrics.Counter('requests_total', "Requests.", ('path', 'code'))
+    counter.inc('/chunk', 200)
+    counter.inc('/chunk', 200, amount=2)
+    counter.inc('/tiles', 503)
+    assert counter.expose() == [
+        '# HELP requests_total Requests.',
+        '# TYPE requests_total counter',
+        'requests_total{path="/chunk",code="200"} 3',
+        'requests_total{path="/tiles",code="503"} 1',
+    ]
+    assert counter.total() == 4
+
+
+def test_gauge_reads_when_scraped():
+    value = [0.5]
+    gauge = metrics.Gauge('ratio', "A ratio.", lambda: value[0])
+    value[0] = 0.25
+    assert gauge.expose()[-1] == 'ratio 0.25'
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = metrics.Histogram('seconds', "Latency.", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+    assert histogram.expose()[2:] == [
+        'seconds_bucket{le="0.1"} 2',
+        'seconds_bucket{le="1.0"} 3',
+        'seconds_bucket{le="+Inf"} 4',
+        'seconds_sum 3.65',
+        'seconds_count 4',
+    ]
+
+
+def test_registry_joins_every_metric():
+    registry = metrics.Registry()
+    registry.counter('a_total', "A.").inc()
+    registry.gauge('b', "B.", lambda: 2)
+    text = registry.expose()
+    assert text.endswith('\n') and 'a_total 1\n' in text and 'b 2\n' in text
+
+
+def test_profile_samples_other_threads():
+    stop = threading.Event()
+    worker = threading.Thread(target=stop.wait)
+    worker.start()
+    try:
+        profile = metrics.sample_profile(0.05, interval=0.01)
+    finally:
+        stop.set()
+        worker.join()
+    header, *stacks = profile.splitlines()
+    assert header.startswith('# ') and header.endswith(' samples over 0.05s')
+    assert any('wait (threading.py:' in stack for stack in stacks)
+    assert all(stack.rsplit(' ', 1)[1].isdigit() for stack in stacks)
@@ -0,0 +1,73 @@
+# Poster rendering: tiles line up with chunks and cover the image once, and a poster is the same however it is tiled.
+import pytest
+
+import galaxy
+import poster
+
+REGION = (-1500, 200, 1700, 900)  # world units, crossing chunk edges both ways
+
+
+@pytest.mark.parametrize('scale', [1, 4, 8, 1000, 2000])
+def test_tiles_cover_the_image_once_on_chunk_edges(scale):
+    cells = poster.cell_region((-5000, -3000, 7000, 4000), scale)
+    c0, r0, c1, r1 = cells
+    rects = list(poster.tiles(cells, scale))
+    for left, top, right, bottom in rects:
+        assert c0 <= left < right <= c1 and r0 <= top < bottom <= r1
+        for edge in (left, right, top, bottom):
+            assert edge in (c0, c1, r0, r1) or edge * scale % galaxy.CHUNK_SIZE == 0
+    for k, (left, top, right, bottom) in enumerate(rects):
+        for other in rects[k + 1:]:
+            assert right <= other[0] or other[2] <= left or bottom <= other[1] or other[3] <= top
+    assert sum((right - left) * (bottom - top) for left, top, right, bottom in rects) == (c1 - c0) * (r1 - r0)
+
+
+@pytest.mark.parametrize('scale', [0, 3, 1500])
+def test_scale_must_tile_chunks(scale):
+    with pytest.raises(ValueError):
+        poster.check_scale(scale)
+
+
+def test_color():
+    assert poster.color('#abc') == bytes.fromhex('aabbcc')
+    assert poster.color('#102030') == bytes((16, 32, 48))
+    assert poster.color('') == b'\xff\xff\xff'
+
+
+def test_near_bodies_are_the_planets_that_reach_in():
+    left, top, right, bottom = 200, 300, 600, 700
+    reach = poster.BODY_REACH
+    expected = [planet for planet in galaxy.generate_chunk_descriptors(0, 0).planets
+                if left - reach <= planet['x'] < right + reach and top - reach <= planet['y'] < bottom + reach]
+    assert poster.near_bodies(0, 0, left, top, right, bottom) == expected
+
+
+@pytest.mark.parametrize('fmt', poster.FORMATS)
+def test_split_tiles_render_the_same(fmt):
+    scale = 10
+    c0, r0, c1, r1 = poster.cell_region(REGION, scale)
+    depth = 3 if fmt == 'ppm' else 1
+    whole = poster.render_tile(c0, r0, c1, r1, scale, fmt)
+    middle = (c0 + c1) // 2
+    left = poster.render_tile(c0, r0, middle, r1, scale, fmt)
+    right = poster.render_tile(middle, r0, c1, r1, scale, fmt)
+    rows = []
+    for row in range(r1 - r0):
+        rows.append(left[row * (middle - c0) * depth:(row + 1) * (middle - c0) * depth])
+        rows.append(right[row * (c1 - middle) * depth:(row + 1) * (c1 - middle) * depth])
+    assert b''.join(rows) == whole
+    assert whole != bytes(len(whole)) and whole.strip(b' ')
+
+
+def test_render_writes_every_tile_in_place(tmp_path, monkeypatch):
+    monkeypatch.setattr(poster, 'TILE_CELLS', 8)  # many small tiles
+    scale = 125
+    out = tmp_path / 'poster.txt'
+    width, height = poster.render(REGION, scale, str(out), workers=1)
+    c0, r0, c1, r1 = poster.cell_region(REGION, scale)
+    assert (width, height) == (c1 - c0, r1 - r0)
+    whole = poster.render_tile(c0, r0, c1, r1, scale)
+    assert out.read_bytes() == b''.join(whole[row * width:(row + 1) * width] + b'\n' for row in range(height))
+    ppm = tmp_path / 'poster.ppm'
+    poster.render(REGION, scale, str(ppm), fmt='ppm', workers=1)
+    assert ppm.read_bytes() == poster.header('ppm', width, height) + poster.render_tile(c0, r0, c1, r1, scale, 'ppm')
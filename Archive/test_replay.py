@@ -0,0 +1,64 @@
+# Input logs: what Recorder writes is what iter_frames() reads back, and a replay lands where the recording did.
+import pytest
+
+import replay
+import sim
+
+FRAMES = (
+    [sim.Controls()] * 5 +
+    [sim.Controls(keys=sim.RIGHT | sim.DOWN)] * 20 +
+    [sim.Controls(mouse_active=True, mouse_dx=300, mouse_dy=-40)] * 10 +
+    [sim.Controls(touch=sim.LEFT, zoom=75)] * 10 +
+    [sim.Controls(code=('Ollivia', 1.25, 0.1, -0.2))] +
+    [sim.Controls()] * 15
+)
+
+
+def fields(controls):
+    return (controls.keys, controls.touch, controls.mouse_active, controls.mouse_dx, controls.mouse_dy,
+            controls.zoom, controls.code)
+
+
+def record(path, frames, seed=7):
+    with open(path, 'wb') as f:
+        recorder = replay.Recorder(f, seed)
+        for controls in frames:
+            recorder.step(replay.FRAME_MS, controls)
+        recorder.close()
+    return recorder.sim
+
+
+def test_header_round_trip(tmp_path):
+    path = tmp_path / 'session.xrpl'
+    record(path, FRAMES[:1])
+    header = replay.read_header(path.read_bytes())
+    assert header == {'window': (1280, 720), 'cell': (10, 16), 'seed': 7}
+
+
+def test_frames_round_trip(tmp_path):
+    path = tmp_path / 'session.xrpl'
+    record(path, FRAMES)
+    read = [(dt, fields(controls)) for dt, controls in replay.iter_frames(path.read_bytes())]
+    dt = round(replay.FRAME_MS * 100) / 100
+    assert read == [(dt, fields(controls)) for controls in FRAMES]
+
+
+def test_idle_frames_are_run_length_encoded(tmp_path):
+    path = tmp_path / 'parked.xrpl'
+    record(path, [sim.Controls()] * 1000)
+    assert len(path.read_bytes()) < replay.HEADER.size + 4 * (replay.FRAME.size + replay.U16.size)
+
+
+def test_replay_is_deterministic(tmp_path):
+    path = tmp_path / 'session.xrpl'
+    recorded = record(path, FRAMES)
+    first = replay.replay(path, render=False)
+    second = replay.replay(path, render=False)
+    assert first['frames'] == second['frames'] == len(FRAMES)
+    assert first['final_position'] == second['final_position'] == (round(recorded.x, 6), round(recorded.y, 6))
+    assert first['chunks_generated'] == second['chunks_generated']
+
+
+def test_rejects_other_files():
+    with pytest.raises(ValueError):
+        replay.read_header(b'\x93NUMPY' + bytes(replay.HEADER.size))
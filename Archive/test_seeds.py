@@ -0,0 +1,46 @@
+# The integer seed layer must give the same seeds as hashString() of the page's formatted strings.
+import itertools
+
+import pytest
+
+import galaxy
+import seeds
+
+GRID = range(-12, 13)
+EDGES = (0, 9, 10, -10, 9999, 10000, -10001, seeds.INT32_MIN, seeds.INT32_MIN + 1, seeds.INT32_MAX)
+
+
+def test_chunk_seeds_match_string_hashing():
+    for cx, cy in itertools.product(GRID, GRID):
+        assert seeds.chunk_seed(cx, cy) == galaxy.hash_string(f"{cx},{cy}"), (cx, cy)
+
+
+@pytest.mark.parametrize('cx, cy', list(itertools.product(EDGES, EDGES)))
+def test_edge_coordinates_match_string_hashing(cx, cy):
+    assert seeds.chunk_seed(cx, cy) == galaxy.hash_string(f"{cx},{cy}")
+    assert seeds.planet_seed(cx, cy, 2) == galaxy.hash_string(f"{cx},{cy},2")
+    assert seeds.unpack_key(seeds.pack_key(cx, cy)) == (cx, cy)
+
+
+def test_planet_and_moon_seeds_match_string_hashing():
+    for cx, cy in itertools.product(range(-3, 4), range(-3, 4)):
+        for i in range(3):
+            planet_seed = seeds.planet_seed(cx, cy, i)
+            assert planet_seed == galaxy.hash_string(f"{cx},{cy},{i}")
+            for m in range(3):
+                assert seeds.moon_seed(planet_seed, m) == galaxy.hash_string(f"{planet_seed}-{m}")
+
+
+def test_body_id_seeds_match_string_hashing():
+    for cx, cy in itertools.product(range(-3, 4), range(-3, 4)):
+        planets = seeds.body_id_prefix('planet', cx, cy)
+        moons = seeds.body_id_prefix('moon', cx, cy)
+        for i in range(3):
+            assert seeds.planet_id_seed(planets, i) == galaxy.hash_string(f"planet-{cx}-{cy}-{i}")
+            for m in range(2):
+                assert seeds.moon_id_seed(moons, i, m) == galaxy.hash_string(f"moon-{cx}-{cy}-{i}-{m}")
+
+
+def test_packed_keys_are_distinct():
+    keys = {seeds.pack_key(cx, cy) for cx, cy in itertools.product(GRID, GRID)}
+    assert len(keys) == len(GRID) ** 2
@@ -0,0 +1,107 @@
+# SharedChunkCache slots: stores read back whole, a slot mid-write is never read, and sets evict their oldest slot.
+import threading
+
+import pytest
+
+import shmcache
+
+
+@pytest.fixture
+def cache():
+    cache = shmcache.SharedChunkCache(slots=16, slot_bytes=256, ways=4)
+    yield cache
+    cache.close(unlink=True)
+
+
+def store(cache, cx, cy, payload):
+    with cache.locks[cache._set(cx, cy) % shmcache.LOCK_SHARDS]:
+        cache._store(cx, cy, payload)
+
+
+def slot_of(cache, cx, cy):
+    first = cache._set(cx, cy) * cache.ways
+    for index in range(first, first + cache.ways):
+        _, slot_cx, slot_cy, _, used, _ = shmcache.SLOT.unpack_from(cache.buf, cache.slots_offset + shmcache.SLOT.size * index)
+        if used and (slot_cx, slot_cy) == (cx, cy):
+            return index
+    return None
+
+
+def same_set(cache, count):
+    """`count` chunk keys that hash to the same set."""
+    target = cache._set(0, 0)
+    return [(cx, 0) for cx in range(10000) if cache._set(cx, 0) == target][:count]
+
+
+def test_store_then_read(cache):
+    store(cache, 3, -4, b'payload')
+    assert cache._lookup(3, -4) == b'payload'
+    assert cache._lookup(-4, 3) is None
+    seq = shmcache.SEQ.unpack_from(cache.buf, cache.slots_offset + shmcache.SLOT.size * slot_of(cache, 3, -4))[0]
+    assert seq % 2 == 0 and seq > 0
+
+
+def test_full_set_keeps_ways_entries(cache):
+    keys = same_set(cache, cache.ways + 1)
+    for k, (cx, cy) in enumerate(keys):
+        store(cache, cx, cy, b'%d' % k)
+    assert cache._lookup(*keys[-1]) == b'%d' % cache.ways
+    assert sum(cache._lookup(cx, cy) is not None for cx, cy in keys) == cache.ways
+
+
+def test_slot_being_written_is_not_read(cache):
+    store(cache, 1, 1, b'before')
+    offset = cache.slots_offset + shmcache.SLOT.size * slot_of(cache, 1, 1)
+    seq = shmcache.SEQ.unpack_from(cache.buf, offset)[0]
+    shmcache.SEQ.pack_into(cache.buf, offset, seq + 1)  # a writer is inside the slot
+    assert cache._lookup(1, 1) is None
+    shmcache.SEQ.pack_into(cache.buf, offset, seq + 2)
+    assert cache._lookup(1, 1) == b'before'
+
+
+def test_reads_during_writes_are_never_torn(cache):
+    payloads = (b'a' * 200, b'b' * 200)
+    store(cache, 4, 4, payloads[0])
+    stop = threading.Event()
+
+    def write():
+        k = 0
+        while not stop.is_set():
+            k += 1
+            store(cache, 4, 4, payloads[k % 2])
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    try:
+        seen = {cache._lookup(4, 4) for _ in range(5000)}
+    finally:
+        stop.set()
+        writer.join()
+    assert seen <= {None, *payloads}
+
+
+def test_oversized_payload_is_not_stored(cache):
+    store(cache, 2, 2, bytes(cache.slot_bytes + 1))
+    assert cache._lookup(2, 2) is None
+
+
+def test_least_recently_read_slot_is_evicted(cache):
+    keys = same_set(cache, cache.ways + 1)
+    for cx, cy in keys[:cache.ways]:
+        store(cache, cx, cy, b'x')
+    for cx, cy in keys[1:cache.ways]:
+        assert cache._lookup(cx, cy) == b'x'  # reading refreshes the stamp
+    store(cache, *keys[-1], b'y')
+    assert cache._lookup(*keys[0]) is None
+    assert all(cache._lookup(cx, cy) is not None for cx, cy in keys[1:])
+
+
+def test_items_restore_round_trip(cache):
+    store(cache, 5, 6, b'five-six')
+    store(cache, -7, 8, b'minus-seven')
+    other = shmcache.SharedChunkCache(slots=16, slot_bytes=256, ways=4)
+    try:
+        other.restore(cache.items())
+        assert sorted(other.items()) == sorted(cache.items()) == [((-7, 8), b'minus-seven'), ((5, 6), b'five-six')]
+    finally:
+        other.close(unlink=True)
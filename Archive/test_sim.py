@@ -0,0 +1,118 @@
+# Simulation helpers: the trail ring buffer, path prefetching, ChunkResidency evicting past its budget and restoring key and
+# blink state together, and the on-demand loop skipping only frames that would draw nothing new.
+import galaxy
+import replay
+import sim
+from galaxy import CHUNK_SIZE
+from seeds import pack_key, unpack_key
+
+
+def test_trail_keeps_the_newest_segments_in_order():
+    trail = sim.Trail(length=1, frame_ms=10)  # 100 ms lifetime, 11 slots
+    for k in range(25):
+        trail.update(float(k), 0.0, k * 5.0)
+    assert len(trail) == trail.capacity == 11
+    assert [trail.x[i] for i in trail.slots()] == [float(k) for k in range(14, 25)]
+
+
+def test_parked_trail_lays_no_segments_and_expires():
+    trail = sim.Trail(length=1)
+    trail.update(10.0, 10.0, 0.0)
+    for now in range(16, 100, 16):
+        trail.update(10.2, 10.0, float(now))  # within min_distance of the last segment
+    assert len(trail) == 1
+    trail.update(10.2, 10.0, 101.0)
+    assert len(trail) == 0
+
+
+def test_trail_fades_linearly():
+    trail = sim.Trail(length=1)
+    trail.update(1.0, 0.0, 0.0)
+    trail.update(2.0, 0.0, 50.0)
+    opacity = trail.fade(100.0)
+    assert [opacity[i] for i in trail.slots()] == [0.0, sim.TRAIL_MAX_OPACITY / 2]
+
+
+def test_projected_chunks_follow_the_path_nearest_first():
+    x, y = centre(0, 0)
+    keys = sim.projected_chunks(x, y, 4.0, 0.0, 100, limit=100)  # 750 units ahead, into chunk (1, 0)
+    assert [unpack_key(key) for key in keys] == block(0, 0) + [(2, -1), (2, 0), (2, 1)]
+
+
+def test_projected_chunks_stop_at_the_limit_and_when_parked():
+    x, y = centre(0, 0)
+    assert len(sim.projected_chunks(x, y, 0.0, 30.0, 100)) == sim.PREFETCH_MAX_CHUNKS
+    assert sim.projected_chunks(x, y, 0.001, 0.0, 100) == []
+
+
+def loaded(cx, cy):
+    return sim.LoadedChunk(galaxy.generate_chunk_descriptors(cx, cy), 0.0)
+
+
+def residency(keys, budget=sim.RESIDENT_CHUNK_BUDGET, evicted_budget=sim.EVICTED_CHUNK_BUDGET):
+    chunks = sim.ChunkResidency(budget, evicted_budget)
+    for cx, cy in keys:
+        chunks.add(pack_key(cx, cy), loaded(cx, cy))
+    return chunks
+
+
+def block(cx, cy, radius=1):
+    return [(cx + dx, cy + dy) for dy in range(-radius, radius + 1) for dx in range(-radius, radius + 1)]
+
+
+def centre(cx, cy):
+    return (cx + 0.5) * CHUNK_SIZE, (cy + 0.5) * CHUNK_SIZE
+
+
+def test_farthest_chunks_are_evicted_past_the_budget():
+    chunks = residency(block(0, 0, 2), budget=9)
+    assert chunks.evict(*centre(0, 0)) == 16
+    assert len(chunks) == 9
+    assert all(pack_key(cx, cy) in chunks for cx, cy in block(0, 0))
+    assert len(chunks.evicted) == 16 and chunks.evictions == 16
+
+
+def test_chunks_in_range_and_within_budget_stay():
+    chunks = residency(block(0, 0))
+    assert chunks.evict(*centre(0, 0)) == 0
+    assert len(chunks) == 9 and not chunks.evicted
+
+
+def test_restore_brings_back_the_same_chunk_under_its_key():
+    chunks = residency(block(0, 0))
+    key = pack_key(1, -1)
+    before = chunks.resident[key]
+    before.visible[0] = 0  # a star mid-blink
+    chunks.evict(*centre(40, 40))
+    assert len(chunks) == 0
+    assert chunks.restore(key)
+    after = chunks.resident[key]
+    assert after is before and after.visible[0] == 0
+    assert unpack_key(key) == (after.chunk.cx, after.chunk.cy) == (1, -1)
+    assert key not in chunks.evicted and chunks.restores == 1
+    assert not chunks.restore(key)
+
+
+def test_oldest_evicted_chunks_are_dropped():
+    chunks = residency(block(0, 0), evicted_budget=4)
+    chunks.evict(*centre(40, 40))
+    assert len(chunks.evicted) == 4
+    keys = [pack_key(cx, cy) for cx, cy in block(0, 0)]
+    assert [key for key in keys if chunks.restore(key)] == keys[-4:]
+
+
+def test_parked_beside_moons_skips_only_unchanged_frames():
+    simulation = sim.Simulation(0)
+    replay.park_beside_planet(simulation)
+    controls = sim.Controls()
+    skipped = 0
+    rows = simulation.render()
+    for _ in range(1200):  # 19 s, the first 3 s filling the scan bar
+        simulation.step(replay.FRAME_MS, controls)
+        needed = simulation.needs_render()
+        previous, rows = rows, simulation.render()  # drawn every frame to compare
+        if not needed:
+            skipped += 1
+            assert rows == previous
+    assert simulation.drawn_moons and skipped > 800
+    assert simulation.idle(controls) and simulation.idle_tick_ms <= sim.IDLE_TICK_MS
@@ -0,0 +1,48 @@
+# Cache snapshots: what save() writes, load() and restore() put back; anything untrusted or broken loads as None.
+import os
+
+import chunks
+import snapshot
+
+
+def caches():
+    chunk_cache = chunks.ChunkCache(capacity=4)
+    chunk_cache.put(chunks.pack_key(3, -4), b'{"cx":3}')
+    tile_cache = chunks.LRUCache(4)
+    tile_cache.put((2, 0, -1), {'stars': [1, 2], 'planets': [0, 1]})
+    return {'chunks': chunk_cache, 'tiles': tile_cache}
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / 'cache.snapshot'
+    assert snapshot.save(path, caches()) == 2
+    assert os.stat(path).st_mode & 0o777 == 0o600
+    restored = {'chunks': chunks.ChunkCache(capacity=4), 'tiles': chunks.LRUCache(4)}
+    loaded = snapshot.load(path)
+    assert snapshot.restore(loaded, restored) == 2
+    assert restored['chunks'].get(chunks.pack_key(3, -4)) == b'{"cx":3}'
+    assert restored['tiles'].get((2, 0, -1)) == {'stars': [1, 2], 'planets': [0, 1]}
+    assert snapshot.dictionary(loaded) is None
+
+
+def test_missing_or_broken_files_load_as_none(tmp_path):
+    path = tmp_path / 'cache.snapshot'
+    assert snapshot.load(path) is None
+    snapshot.save(path, caches())
+    data = path.read_bytes()
+    path.write_bytes(data[:len(data) - 3])
+    assert snapshot.load(path) is None
+    path.write_bytes(b'\x80\x04pickle')
+    assert snapshot.load(path) is None
+
+
+def test_files_others_could_write_are_refused(tmp_path):
+    path = tmp_path / 'cache.snapshot'
+    snapshot.save(path, caches())
+    os.chmod(path, 0o620)
+    assert snapshot.load(path) is None
+    os.chmod(path, 0o600)
+    link = tmp_path / 'link.snapshot'
+    link.symlink_to(path)
+    assert snapshot.load(link) is None
+    assert snapshot.load(path) is not None
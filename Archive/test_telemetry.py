@@ -0,0 +1,66 @@
+# Telemetry batches: device classes, validation of what clients send, and the quantiles summed from them.
+import json
+
+import pytest
+
+import telemetry
+
+SIZE = len(telemetry.BUCKETS_MS) + 1
+
+
+def batch(device=None, **phases):
+    return json.dumps({'buckets': telemetry.BUCKETS_MS, 'device': device or {}, 'phases': phases,
+                       'prefetch': {'hits': 3, 'misses': 1}}).encode('utf-8')
+
+
+@pytest.mark.parametrize('device, expected', [
+    ({}, 'desktop/unknown/unknown/dom'),
+    ({'cores': 2, 'memory': 4, 'mobile': True}, 'mobile/1-2c/4gb/dom'),
+    ({'cores': 8, 'memory': 0.5, 'renderer': 'canvas'}, 'desktop/5-8c/0.5gb/canvas'),
+    ({'cores': 64, 'memory': 8}, 'desktop/9+c/8gb/dom'),
+])
+def test_device_class(device, expected):
+    assert telemetry.device_class(device) == expected
+
+
+@pytest.mark.parametrize('device', [{'cores': float('inf')}, {'memory': float('nan')}, {'cores': -2},
+                                    {'memory': '8'}, {'cores': True}, {'memory': 10 ** 400}])
+def test_device_class_rejects_bad_numbers(device):
+    with pytest.raises(ValueError):
+        telemetry.device_class(device)
+
+
+def test_ingest_rejects_infinite_cores():
+    # JSON's 1e400 parses to inf
+    body = b'{"buckets": %s, "device": {"cores": 1e400}, "phases": {}}' % json.dumps(telemetry.BUCKETS_MS).encode()
+    with pytest.raises(ValueError):
+        telemetry.TelemetryStore().ingest(body)
+
+
+def test_ingest_and_summary():
+    store = telemetry.TelemetryStore()
+    frame = [0] * SIZE
+    frame[6] = 90  # 8-16 ms
+    frame[7] = 10  # 16-33 ms
+    store.ingest(batch({'cores': 4, 'memory': 8}, frame=frame))
+    store.ingest(batch({'cores': 4, 'memory': 8}, frame=frame))
+    summary = store.summary()['desktop/3-4c/8gb/dom']
+    assert summary['frame']['count'] == 200
+    assert 8 < summary['frame']['p50'] < 16 and 16 < summary['frame']['p99'] <= 33
+    assert summary['prefetchHitRate'] == 0.75
+    assert store.batches == 2
+
+
+@pytest.mark.parametrize('body', [
+    b'{"buckets": [1, 2], "phases": {}}',
+    batch(frame=[1] * (SIZE - 1)),
+    batch(frame=[-1] + [0] * (SIZE - 1)),
+    b'{"buckets": %s}' % json.dumps(telemetry.BUCKETS_MS).encode(),
+])
+def test_ingest_rejects_malformed_batches(body):
+    with pytest.raises(ValueError):
+        telemetry.TelemetryStore().ingest(body)
+
+
+def test_quantile_of_empty_histogram():
+    assert telemetry.quantile([0] * SIZE, 0.5) == 0.0
@@ -0,0 +1,69 @@
+# Density tiles: counts agree with the generator, each level sums its children, and cold builds are limited.
+import json
+
+import pytest
+
+import galaxy
+import tiles
+
+CELLS = tiles.TILE_CELLS * tiles.TILE_CELLS
+
+
+@pytest.fixture
+def cache():
+    return tiles.TileCache(capacity=64)
+
+
+def test_chunk_bodies_match_the_generator():
+    for i, (x, y, moons, life) in enumerate(tiles.chunk_bodies(2, -3)):
+        planet = galaxy.planet_descriptor(2, -3, i)
+        assert (x, y, moons) == (planet['x'], planet['y'], len(planet['moons']))
+        bodies = [planet['id']] + [moon['id'] for moon in planet['moons']]
+        scans = [galaxy.generate_planet_data(galaxy.hash_string(body_id)) for body_id in bodies]
+        assert life == sum(scan['lifeForm'] == 'Yes' for scan in scans)
+
+
+@pytest.mark.parametrize('z, x, y, expected', [
+    (0, 0, 0, True),
+    (tiles.MAX_LEVEL, -(1 << 25), (1 << 25) - 1, True),
+    (tiles.MAX_LEVEL, 1 << 25, 0, False),
+    (tiles.MAX_LEVEL + 1, 0, 0, False),
+    (-1, 0, 0, False),
+])
+def test_valid_tile(z, x, y, expected):
+    assert tiles.valid_tile(z, x, y) is expected
+
+
+def test_base_tile_bins_every_body(cache):
+    counts = cache.fetch(0, 5, -5)
+    assert sum(counts['stars']) == galaxy.STAR_TOTAL
+    assert sum(counts['planets']) == tiles.PLANETS_PER_CHUNK
+    assert all(len(counts[field]) == CELLS for field in tiles.FIELDS)
+
+
+def test_levels_sum_their_children(cache):
+    parent = cache.fetch(1, 0, 0)
+    children = [cache.fetch(0, cx, cy) for cy in (0, 1) for cx in (0, 1)]
+    for field in tiles.FIELDS:
+        assert sum(parent[field]) == sum(sum(child[field]) for child in children)
+    chunk_level = cache.fetch(tiles.CHUNK_LEVEL, 0, 0)
+    for field in tiles.FIELDS:
+        assert chunk_level[field][0] == sum(cache.fetch(0, 0, 0)[field])
+
+
+def test_busy_build_slots_turn_a_request_away(cache, monkeypatch):
+    monkeypatch.setattr(tiles, 'BUILD_WAIT_SECONDS', 0.01)
+    for _ in range(tiles.COLD_BUILDS):
+        cache.build_slots.acquire()
+    with pytest.raises(tiles.TileBusy):
+        cache.fetch(0, 1, 1)
+    cache.build_slots.release()
+    assert sum(cache.fetch(0, 1, 1)['stars']) == galaxy.STAR_TOTAL
+
+
+def test_encode(cache):
+    tile = json.loads(cache.encode(2, -1, 3))
+    assert (tile['z'], tile['x'], tile['y'], tile['cells']) == (2, -1, 3, tiles.TILE_CELLS)
+    assert tile['cellSize'] == galaxy.CHUNK_SIZE * 4 / tiles.TILE_CELLS
+    assert (tile['left'], tile['top']) == (-4 * galaxy.CHUNK_SIZE, 12 * galaxy.CHUNK_SIZE)
+    assert sum(tile['planets']) == 16 * tiles.PLANETS_PER_CHUNK
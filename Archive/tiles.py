@@ -0,0 +1,181 @@
+# Galaxy density tile pyramid for the minimap: star, planet, moon and life counts per cell.
+#
+# A tile is TILE_CELLS x TILE_CELLS cells. Tile (z, x, y) covers the 2**z x 2**z
+# chunks starting at chunk (x * 2**z, y * 2**z), so each level halves the
+# resolution of the one below. Level 0 tiles bin every star of one chunk.
+# CHUNK_LEVEL tiles have one cell per chunk and need no star positions, since
+# every chunk holds STAR_TOTAL stars. Every other level is the 2x2 sum of its
+# four children. Tiles are built on first request and never change, because
+# the generator is deterministic. A cold tile costs up to ~2 s of CPU, so at
+# most COLD_BUILDS are built at once, concurrent requests for the same tile
+# share one build, and a request that finds no free slot is turned away.
+import json
+import math
+import threading
+
+import galaxy
+import seeds
+from chunks import LRUCache
+
+TILE_CELLS = 16
+CHUNK_LEVEL = 4  # 2**CHUNK_LEVEL == TILE_CELLS: one cell per chunk
+MAX_LEVEL = 6  # the page's widest minimap; a top tile spans 64 x 64 chunks and takes ~2 s to build cold
+COLD_BUILDS = 2  # tiles built at once for requests, so the rest of the server keeps its threads
+BUILD_WAIT_SECONDS = 1.0  # how long a request waits for a build slot before TileBusy
+TILE_CACHE_TILES = 4096  # four count lists of 256 cells each
+FIELDS = ('stars', 'planets', 'moons', 'life')
+PLANETS_PER_CHUNK = math.ceil(galaxy.PLANET_COUNT)
+LIFE_THRESHOLD = 0.65  # generatePlanetData(): hasLife = rand() > 0.65
+
+
+def has_life(seed):
+    return galaxy.mulberry32_at(seed, 0) > LIFE_THRESHOLD
+
+
+def chunk_bodies(cx, cy):
+    """(x, y, moons, life) for each planet of a chunk, life counting the planet and its moons.
+
+    Only the draws planet_descriptor() makes for position and moon count are
+    taken, and life comes from the first draw of each body's scan seed.
+    """
+    planet_ids = seeds.body_id_prefix('planet', cx, cy)
+    moon_ids = seeds.body_id_prefix('moon', cx, cy)
+    bodies = []
+    for i in range(PLANETS_PER_CHUNK):
+        rand = galaxy.Mulberry32(seeds.planet_seed(cx, cy, i))
+        x = cx * galaxy.CHUNK_SIZE + rand() * galaxy.CHUNK_SIZE
+        y = cy * galaxy.CHUNK_SIZE + rand() * galaxy.CHUNK_SIZE
+        rand()  # size
+        moons = math.floor(rand() * 3) + 1 if rand() > 0.6 else 0
+        life = has_life(seeds.planet_id_seed(planet_ids, i))
+        life += sum(has_life(seeds.moon_id_seed(moon_ids, i, m)) for m in range(moons))
+        bodies.append((x, y, moons, life))
+    return bodies
+
+
+def valid_tile(z, x, y):
+    if not 0 <= z <= MAX_LEVEL:
+        return False
+    span = 1 << z
+    return (seeds.valid_coordinates(x * span, y * span)
+            and seeds.valid_coordinates(x * span + span - 1, y * span + span - 1))
+
+
+def _empty():
+    return {field: [0] * (TILE_CELLS * TILE_CELLS) for field in FIELDS}
+
+
+def _base_tile(cx, cy):
+    counts = _empty()
+    cell = galaxy.CHUNK_SIZE / TILE_CELLS
+    left = cx * galaxy.CHUNK_SIZE
+    top = cy * galaxy.CHUNK_SIZE
+    # min() keeps a coordinate that rounds to the chunk's far edge in the last cell
+    last = TILE_CELLS - 1
+    stars = counts['stars']
+    chunk = galaxy.generate_star_range(cx, cy, 0, galaxy.STAR_TOTAL)
+    for x, y in zip(chunk.x, chunk.y):
+        stars[min(int((y - top) / cell), last) * TILE_CELLS + min(int((x - left) / cell), last)] += 1
+    for x, y, moons, life in chunk_bodies(cx, cy):
+        index = min(int((y - top) / cell), last) * TILE_CELLS + min(int((x - left) / cell), last)
+        counts['planets'][index] += 1
+        counts['moons'][index] += moons
+        counts['life'][index] += life
+    return counts
+
+
+def _chunk_tile(x, y):
+    counts = _empty()
+    for row in range(TILE_CELLS):
+        for column in range(TILE_CELLS):
+            index = row * TILE_CELLS + column
+            bodies = chunk_bodies(x * TILE_CELLS + column, y * TILE_CELLS + row)
+            counts['stars'][index] = galaxy.STAR_TOTAL
+            counts['planets'][index] = len(bodies)
+            counts['moons'][index] = sum(moons for _, _, moons, _ in bodies)
+            counts['life'][index] = sum(life for _, _, _, life in bodies)
+    return counts
+
+
+class TileBusy(Exception):
+    """Every cold build slot stayed taken; the tile can be asked for again later."""
+
+
+class TileCache(LRUCache):
+    """Cell counts keyed by (z, x, y); a miss builds the tile from its children, which are cached too."""
+
+    def __init__(self, capacity=TILE_CACHE_TILES):
+        super().__init__(capacity)
+        self.build_slots = threading.BoundedSemaphore(COLD_BUILDS)
+        self.building = {}  # (z, x, y) -> threading.Event set when its build ends
+        self.building_lock = threading.Lock()
+
+    def fetch(self, z, x, y):
+        """A tile's counts, building it in one of the COLD_BUILDS slots on a miss; TileBusy if none frees up."""
+        key = (z, x, y)
+        counts = self.get(key)
+        if counts is not None:
+            return counts
+        with self.building_lock:
+            done = self.building.get(key)
+            leader = done is None
+            if leader:
+                done = self.building[key] = threading.Event()
+        if not leader:
+            done.wait()
+            counts = self.get(key)
+            if counts is None:
+                raise TileBusy(key)
+            return counts
+        try:
+            if not self.build_slots.acquire(timeout=BUILD_WAIT_SECONDS):
+                raise TileBusy(key)
+            try:
+                return self._cached(z, x, y)
+            finally:
+                self.build_slots.release()
+        finally:
+            with self.building_lock:
+                del self.building[key]
+            done.set()
+
+    def _cached(self, z, x, y):
+        counts = self.get((z, x, y))
+        if counts is None:
+            counts = self._build(z, x, y)
+            self.put((z, x, y), counts)
+        return counts
+
+    def _build(self, z, x, y):
+        if z == 0:
+            return _base_tile(x, y)
+        if z == CHUNK_LEVEL:
+            return _chunk_tile(x, y)
+        counts = _empty()
+        half = TILE_CELLS // 2
+        for qy in (0, 1):
+            for qx in (0, 1):
+                child = self._cached(z - 1, 2 * x + qx, 2 * y + qy)
+                for row in range(TILE_CELLS):
+                    target = ((qy * half + row // 2) * TILE_CELLS + qx * half)
+                    source = row * TILE_CELLS
+                    for field in FIELDS:
+                        values = counts[field]
+                        cells = child[field]
+                        for column in range(0, TILE_CELLS, 2):
+                            values[target + column // 2] += cells[source + column] + cells[source + column + 1]
+        return counts
+
+    def encode(self, z, x, y):
+        span = 1 << z
+        tile = {
+            'z': z,
+            'x': x,
+            'y': y,
+            'cells': TILE_CELLS,
+            'cellSize': galaxy.CHUNK_SIZE * span / TILE_CELLS,
+            'left': x * span * galaxy.CHUNK_SIZE,
+            'top': y * span * galaxy.CHUNK_SIZE,
+        }
+        tile.update(self.fetch(z, x, y))
+        return json.dumps(tile, separators=(',', ':')).encode('utf-8')
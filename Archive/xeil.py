@@ -1,9 +1,408 @@
 # This is simply an alternative Script to run the game from a terminal via port-forwarding locally.
+import argparse
+import collections
+import hashlib
+import http.client
 import http.server
-import socketserver
+import json
+import math
+import os
+import select
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+
+import analytics
+import autopilot
+import bench
+import chunks
+import cluster
+import compression
+import export
+import galaxy
+import metrics
+import poster
+import replay
+import seeds
+import shmcache
+import sim
+import snapshot
+import telemetry
+import tiles
 
 PORT = 8000
 
+WORKER_JS = r"""
+// Procedural generation shared by the page and its Web Workers. The page loads this
+// file as a plain script (for the synchronous fallback) and also starts it as workers.
+const CHUNK_SIZE = 1000;
+const STAR_DENSITY = 0.005;
+const PLANET_DENSITY = 0.00005;
+const STAR_FIELDS = 6; // x, y, brightness, char code, blinkSpeed, blink offset
+const STAR_TOTAL = Math.ceil(CHUNK_SIZE * CHUNK_SIZE * STAR_DENSITY);
+// Planet glyphs and palettes; the canvas renderer rasterizes these up front
+const PLANET_CHARS = ['@', '░', '%', '&', '*', '+', '=', '-', '~', ':', '.'];
+const COMMON_COLORS = [
+    '#FF5733', '#33FF57', '#3357FF', '#F3FF33', '#FF33F3',
+    '#33FFF3', '#8A2BE2', '#FF6347', '#7CFC00', '#FFD700',
+    '#FF8C00', '#E6E6FA', '#40E0D0', '#F08080', '#90EE90'
+];
+const WHITE_PINK_COLORS = [
+    '#FFFFFF', '#F8F8F8', '#F0F0F0',
+    '#FFC0CB', '#FFB6C1', '#FFD1DC'
+];
+// Moon ephemeris: every moon orbits at MOON_ORBIT_SPEED, so one unit-circle table serves them all
+// and a moon's ephemerisPhase is its starting angle in table entries. Must match galaxy.py.
+const MOON_ORBIT_SPEED = 0.0005; // radians per ms
+const EPHEMERIS_SAMPLES = 1024;
+const EPHEMERIS_RATE = MOON_ORBIT_SPEED * EPHEMERIS_SAMPLES / (2 * Math.PI); // table entries per ms
+const EPHEMERIS_COS = new Float64Array(EPHEMERIS_SAMPLES + 1); // one extra entry so interpolation never wraps
+const EPHEMERIS_SIN = new Float64Array(EPHEMERIS_SAMPLES + 1);
+for (let k = 0; k <= EPHEMERIS_SAMPLES; k++) {
+    EPHEMERIS_COS[k] = Math.cos(2 * Math.PI * k / EPHEMERIS_SAMPLES);
+    EPHEMERIS_SIN[k] = Math.sin(2 * Math.PI * k / EPHEMERIS_SAMPLES);
+}
+
+// Where a moon is at time t (ms), interpolated from the ephemeris table. The result is kept
+// on the moon, so every caller in the same frame shares one lookup; do not hold on to it.
+function moonPosition(planet, moon, t) {
+    let position = moon.position;
+    if (!position) position = moon.position = { t: NaN, x: 0, y: 0 };
+    if (position.t === t) return position;
+    const p = (moon.ephemerisPhase + t * EPHEMERIS_RATE) % EPHEMERIS_SAMPLES;
+    const i = Math.floor(p);
+    const f = p - i;
+    position.t = t;
+    position.x = planet.x + moon.orbitRadius * (EPHEMERIS_COS[i] + (EPHEMERIS_COS[i + 1] - EPHEMERIS_COS[i]) * f);
+    position.y = planet.y + moon.orbitRadius * (EPHEMERIS_SIN[i] + (EPHEMERIS_SIN[i + 1] - EPHEMERIS_SIN[i]) * f);
+    return position;
+}
+
+function mulberry32(a) {
+    return function() {
+        var t = a += 0x6D2B79F5;
+        t = Math.imul(t ^ t >>> 15, t | 1);
+        t = t ^ t >>> 13;
+        return ((t >>> 0) / 4294967296);
+    }
+}
+
+// RNG state after `draws` calls to mulberry32(seed), so a generator can be resumed later
+function mulberry32State(seed, draws) {
+    return (seed + draws * 0x6D2B79F5) >>> 0;
+}
+
+function hashString(str) {
+    let hash = 0;
+    for (let i = 0; i < str.length; i++) {
+        const char = str.charCodeAt(i);
+        hash = ((hash << 5) - hash) + char;
+        hash |= 0;
+    }
+    return Math.abs(hash);
+}
+
+function generateSpecies(rand, planetName = null) {
+    const categories = ['Flora', 'Fauna', 'Fungi', 'Microbial', 'Sentient'];
+    const subCategories = {
+        'Flora': ['Photosynthetic', 'Chemosynthetic', 'Carnivorous', 'Arboreal', 'Aquatic'],
+        'Fauna': ['Mammalian', 'Reptilian', 'Avian', 'Insectoid', 'Aquatic', 'Amphibious'],
+        'Fungi': ['Mycorrhizal', 'Saprophytic', 'Parasitic', 'Symbiotic'],
+        'Microbial': ['Bacterial', 'Viral', 'Archaeal', 'Protist'],
+        'Sentient': ['Bipedal', 'Quadrupedal', 'Avianoid', 'Aquatic-Intelligent']
+    };
+    const descriptors = ['Bio-luminescent', 'Cryo-tolerant', 'Hydrophilic', 'Xenomorphic', 'Symbiotic', 'Silicate-based', 'Carbon-based', 'Silicon-based'];
+
+    if (planetName && planetName.toLowerCase() === 'ollivia') {
+        return "Aesthetiflora (Luminescent, Harmonious Ecosystem)";
+    }
+
+    const category = categories[Math.floor(rand() * categories.length)];
+    const subCategory = subCategories[category][Math.floor(rand() * subCategories[category].length)];
+    const descriptor = descriptors[Math.floor(rand() * descriptors.length)];
+
+    return `${descriptor} ${subCategory} ${category}`;
+}
+
+function generatePlanetData(seed, isMoon = false, specificName = null) {
+    const rand = mulberry32(seed);
+
+    let hasLife = rand() > 0.65;
+    let population = hasLife ? Math.floor(rand() * 10000000000) : 0;
+    
+    let tempBase = -100 + rand() * 200;
+    if (isMoon) tempBase += (rand() - 0.5) * 50;
+    const tempVariation = rand() * 50 - 25;
+    const temperature = Math.round(tempBase + tempVariation);
+
+    const ageBillionYears = (rand() * 10) + 1;
+    const ageString = `${ageBillionYears.toFixed(2)} billion years`;
+
+    const planetNames = ["Xylos", "Aelon", "Veridian", "Obsidian", "Celestia", "Aethel", "Solara", "Lunara", "Titanus", "Zephyr", "Astra", "Cosmos", "Orion", "Lyra", " Lilith", "Nebula", "Terra", "Yeawn", " Eudes", "Xia", " Caleb", "Sylus", " Zayne", "Rafayel", " Xavier", "Calypso", "Aether", " Lumine"];
+    const moonNames = ["Lune", "Phobos", "Elxi", "Miranda", "Tsuko", "Io", "Callisto", "Triton", "Elxi", "Oberon", "Hae", "Elxi", "Umbriel", "Paimon", "Ariel", "Rhea", "Iapetus", "Daiso"];
+    
+    let name;
+    // Use specificName only if it's explicitly provided (for the autopilot target planet)
+    // Otherwise, generate a random name.
+    if (specificName) { 
+        name = specificName;
+    } else if (isMoon) {
+        name = moonNames[Math.floor(rand() * moonNames.length)] + "-" + Math.floor(rand() * 9);
+    } else {
+        name = planetNames[Math.floor(rand() * planetNames.length)] + "-" + Math.floor(rand() * 999);
+    }
+    
+    // Special case for "Ollivia"
+    if (name.toLowerCase() === 'ollivia') { // Check against the determined name, not just specificName input
+        hasLife = true; // Ensure it has life
+        if (population === 0) population = Math.floor(rand() * 5000000000) + 100000000; // Ensure some population if it was 0
+        tempBase = 15 + rand() * 10; // More temperate
+    }
+    
+    const species = hasLife ? generateSpecies(rand, name) : "None";
+
+    return {
+        name: name,
+        lifeForm: hasLife ? "Yes" : "No",
+        population: population.toLocaleString(),
+        temperature: `${temperature}°C`,
+        age: ageString,
+        species: species
+    };
+}
+
+// Stars come back as one Float64Array (STAR_FIELDS values per star) so a worker can
+// transfer the buffer instead of cloning 5,000 objects. Every star is an independent
+// draw, so the first `density` share of them is an even, repeatable thinning.
+function generateChunkData(chunkX, chunkY, density = 1) {
+    const chunkPlanets = [];
+    const chunkStartX = chunkX * CHUNK_SIZE;
+    const chunkStartY = chunkY * CHUNK_SIZE;
+    
+    const chunkSeed = hashString(`${chunkX},${chunkY}`);
+    const chunkRand = mulberry32(chunkSeed);
+
+    const starCount = Math.ceil(STAR_TOTAL * density);
+    const starData = new Float64Array(starCount * STAR_FIELDS);
+    for (let i = 0, o = 0; i < starCount; i++, o += STAR_FIELDS) {
+        starData[o] = chunkStartX + chunkRand() * CHUNK_SIZE;
+        starData[o + 1] = chunkStartY + chunkRand() * CHUNK_SIZE;
+        starData[o + 2] = Math.floor(chunkRand() * 4) + 1;
+        starData[o + 3] = chunkRand() > 0.5 ? 46 : 42; // '.' or '*'
+        const blinkSpeed = chunkRand() * 5000 + 2000;
+        starData[o + 4] = blinkSpeed;
+        starData[o + 5] = chunkRand() * blinkSpeed; // Added to the receiver's Date.now()
+    }
+    
+    const planetCount = CHUNK_SIZE * CHUNK_SIZE * PLANET_DENSITY;
+    for (let i = 0; i < planetCount; i++) {
+        const planetSeed = hashString(`${chunkX},${chunkY},${i}`); // Unique seed for each planet
+        const planetRand = mulberry32(planetSeed);
+
+        const x = chunkStartX + planetRand() * CHUNK_SIZE;
+        const y = chunkStartY + planetRand() * CHUNK_SIZE;
+        const size = Math.floor(planetRand() * 20) + 10;
+        
+        const hasMoons = planetRand() > 0.6; 
+        let draws = 4;
+        const moons = [];
+        if (hasMoons) {
+            const numMoons = Math.floor(planetRand() * 3) + 1; 
+            draws++;
+            for (let m = 0; m < numMoons; m++) {
+                const moonSeed = hashString(`${planetSeed}-${m}`);
+                const moonRand = mulberry32(moonSeed);
+                const moonSize = Math.floor(moonRand() * 5) + 3; 
+                const orbitRadius = size / 2 + moonSize + moonRand() * 10;
+                const orbitAngle = moonRand() * Math.PI * 2;
+                moons.push({
+                    id: `moon-${chunkX}-${chunkY}-${i}-${m}`, // Unique ID for each moon
+                    size: moonSize,
+                    orbitRadius: orbitRadius,
+                    orbitAngle: orbitAngle,
+                    ephemerisPhase: orbitAngle * EPHEMERIS_SAMPLES / (2 * Math.PI),
+                    pattern: null, // Generated on first visibility by ensurePattern()
+                    patternState: mulberry32State(moonSeed, 3)
+                });
+            }
+        }
+
+        const planet = {
+            id: `planet-${chunkX}-${chunkY}-${i}`, // Unique ID for the main planet
+            x, y, size,
+            pattern: null,
+            patternState: mulberry32State(planetSeed, draws), // planetRand resumes here for the pattern
+            moons: moons
+        };
+        chunkPlanets.push(planet);
+    }
+    return { cx: chunkX, cy: chunkY, density, starData, planets: chunkPlanets };
+}
+
+function generatePlanetPattern(size, isMoon = false, specificName = null, rand = Math.random) {
+    // If rand is not a function (e.g., if Math.random was passed directly), wrap it
+    const seededRand = typeof rand === 'function' ? rand : () => Math.random();
+
+    const pattern = [];
+    const center = size / 2;
+    const maxDist = center * center;
+    
+    const hasRings = !isMoon && seededRand() > 0.7; 
+    const isGasGiant = seededRand() > 0.5;
+    const craterCount = Math.floor(seededRand() * 5) + 1;
+    const craters = [];
+    
+    let baseColor;
+    let secondaryColor;
+    let highlightColor;
+
+    if (specificName && specificName.toLowerCase() === 'ollivia') {
+        baseColor = '#FFC0CB'; // Pink
+        secondaryColor = '#FFFFFF'; // White
+        highlightColor = '#F0F0F0'; // Off-white
+    } else {
+        baseColor = getRandomColor(seededRand);
+        secondaryColor = getRandomColor(seededRand);
+        highlightColor = getRandomColor(seededRand);
+    }
+    
+    for (let i = 0; i < craterCount; i++) {
+        craters.push({
+            x: seededRand() * size - center,
+            y: seededRand() * size - center,
+            size: seededRand() * (size/4) + 1
+        });
+    }
+    
+    for (let y = -center; y < center; y++) {
+        let line = '';
+        let colors = '';
+        for (let x = -center; x < center; x++) {
+            const dist = x*x + y*y;
+            
+            if (dist > maxDist) {
+                if (hasRings && Math.abs(y) < 2 && dist < maxDist * 1.5 && dist > maxDist * 0.8) {
+                    const ringChar = seededRand() > 0.7 ? '=' : seededRand() > 0.7 ? '+' : '-';
+                    line += ringChar;
+                    colors += highlightColor + '|';
+                } else {
+                    line += ' ';
+                    colors += '|';
+                }
+            } else {
+                if (isGasGiant) {
+                    const noise = Math.floor(seededRand() * 4);
+                    let color;
+                    const angle = Math.atan2(y, x);
+                    const distFactor = dist / maxDist;
+                    
+                    if (Math.sin(angle * 5 + distFactor * 10) > 0.7) {
+                        color = highlightColor;
+                    } else if (Math.sin(angle * 3 + distFactor * 15) > 0.5) {
+                        color = secondaryColor;
+                    } else {
+                        color = baseColor;
+                    }
+                    
+                    if (noise < 1) {
+                        line += getRandomPlanetChar(seededRand);
+                    } else {
+                        line += getRandomPlanetChar(seededRand);
+                    }
+                    colors += color + '|';
+                } else {
+                    let inCrater = false;
+                    for (const crater of craters) {
+                        const craterDist = (x-crater.x)*(x-crater.x) + (y-crater.y)*(y-crater.y);
+                        if (craterDist < crater.size * crater.size) {
+                            inCrater = true;
+                            break;
+                        }
+                    }
+                    
+                    const altitude = 1 - (dist / maxDist);
+                    let char, color;
+                    
+                    if (inCrater) {
+                        char = seededRand() > 0.7 ? 'o' : 'O';
+                        color = '#888'; 
+                    } else if (altitude > 0.9) {
+                        char = seededRand() > 0.7 ? '^' : '*';
+                        color = mixColors(baseColor, '#ffffff', 0.7);
+                    } else if (altitude > 0.7) {
+                        char = seededRand() > 0.7 ? '#' : '%';
+                        color = mixColors(baseColor, secondaryColor, 0.5);
+                    } else if (altitude > 0.4) {
+                        char = seededRand() > 0.7 ? '@' : '&';
+                        color = baseColor;
+                    } else {
+                        char = seededRand() > 0.7 ? '~' : ':';
+                        color = mixColors(baseColor, '#000000', 0.3);
+                    }
+                    
+                    line += char;
+                    colors += color + '|';
+                }
+            }
+        }
+        pattern.push({ line, colors });
+    }
+    
+    return pattern;
+}
+
+function mixColors(color1, color2, weight) {
+    const r1 = parseInt(color1.substring(1, 3), 16);
+    const g1 = parseInt(color1.substring(3, 5), 16);
+    const b1 = parseInt(color1.substring(5, 7), 16);
+    
+    const r2 = parseInt(color2.substring(1, 3), 16);
+    const g2 = parseInt(color2.substring(3, 5), 16);
+    const b2 = parseInt(color2.substring(5, 7), 16);
+    
+    const r = Math.round(r1 * weight + r2 * (1 - weight));
+    const g = Math.round(g1 * weight + g2 * (1 - weight));
+    const b = Math.round(b1 * weight + b2 * (1 - weight));
+    
+    return `#${((1 << 24) + (r << 16) + (g << 8) + b).toString(16).slice(1)}`;
+}
+
+function getRandomPlanetChar(rand = Math.random) {
+    return PLANET_CHARS[Math.floor(rand() * PLANET_CHARS.length)];
+}
+
+function getRandomColor(rand = Math.random) {
+    if (rand() < 0.35) { // Increased chance for white/pink
+        return WHITE_PINK_COLORS[Math.floor(rand() * WHITE_PINK_COLORS.length)];
+    } else {
+        return COMMON_COLORS[Math.floor(rand() * COMMON_COLORS.length)];
+    }
+}
+
+// Worker side: { id, type, args } in, { id, result, ms } out
+if (typeof WorkerGlobalScope !== 'undefined' && self instanceof WorkerGlobalScope) {
+    self.onmessage = (e) => {
+        const { id, type, args } = e.data;
+        const start = performance.now();
+        if (type === 'chunk') {
+            const result = generateChunkData(args[0], args[1], args[2]);
+            self.postMessage({ id, result, ms: performance.now() - start }, [result.starData.buffer]);
+        } else if (type === 'pattern') {
+            const [size, isMoon, specificName, state] = args;
+            const result = generatePlanetPattern(size, isMoon, specificName, mulberry32(state));
+            self.postMessage({ id, result, ms: performance.now() - start });
+        } else if (type === 'scan') {
+            const result = args.map(([seed, isMoon, specificName]) => generatePlanetData(seed, isMoon, specificName));
+            self.postMessage({ id, result, ms: performance.now() - start });
+        }
+    };
+}
+"""
+
 HTML_CONTENT = r"""
 <!DOCTYPE html>
 <html>
@@ -173,6 +572,50 @@ HTML_CONTENT = r"""
             background-color: #555;
         }
 
+        /* Minimap */
+        #minimap {
+            position: fixed;
+            top: 15px;
+            right: 15px;
+            margin: 0;
+            padding: 4px;
+            font-family: monospace;
+            font-size: 10px;
+            line-height: 10px;
+            color: #66cc66;
+            background-color: rgba(0, 0, 0, 0.7);
+            border: 1px solid #555;
+            pointer-events: none;
+            z-index: 1001;
+        }
+        #minimap .here {
+            color: #ff0000;
+        }
+
+        /* Canvas renderer (?renderer=canvas) and the FPS overlay */
+        #game-canvas {
+            position: fixed;
+            top: 0;
+            left: 0;
+            width: 100%;
+            height: 100%;
+            display: none;
+        }
+        #fps {
+            position: fixed;
+            bottom: 15px;
+            left: 15px;
+            margin: 0;
+            padding: 4px;
+            font-family: monospace;
+            font-size: 12px;
+            color: #aaa;
+            background-color: rgba(0, 0, 0, 0.7);
+            pointer-events: none;
+            z-index: 1001;
+            display: none;
+        }
+
 
         @media (max-width: 768px) {
             #mobile-controls {
@@ -193,12 +636,13 @@ HTML_CONTENT = r"""
 </head>
 <body>
     <div id="game"></div>
+    <canvas id="game-canvas"></canvas>
     <div id="player">■</div>
     <div id="trail-container"></div>
     <div id="scan-container"></div>
     <div id="controls">
         Use WASD or arrow keys to move | Hold mouse/touch to move in that direction<br>
-        Scroll/pinch to zoom | Current zoom: <span id="zoom-level">100%</span>
+        Scroll/pinch to zoom | Current zoom: <span id="zoom-level">100%</span> | M to change the minimap scale
     </div>
     <div id="mobile-controls">
         <div class="control-area" id="left-control"></div>
@@ -207,15 +651,15 @@ HTML_CONTENT = r"""
         <div class="control-area" id="down-control"></div>
     </div>
     <button id="code-button">Code</button>
+    <pre id="minimap"></pre>
+    <pre id="fps"></pre>
 
+    <script id="generator" src="/worker.js?v=__WORKER_VERSION__"></script>
     <script>
-        // Game constants
+        // Game constants (CHUNK_SIZE, STAR_DENSITY and PLANET_DENSITY live in /worker.js)
         const PLAYER_SPEED = 0.1;
         const DRAG = 0.95;
         const TRAIL_LENGTH = 30;
-        const STAR_DENSITY = 0.005;
-        const PLANET_DENSITY = 0.00005;
-        const CHUNK_SIZE = 1000;
         const STAR_BLINK_INTERVAL = 100;
         const MIN_ZOOM = 50;
         const MAX_ZOOM = 200;
@@ -224,7 +668,54 @@ HTML_CONTENT = r"""
         const SCAN_DELAY = 2000;
         const SCAN_DURATION = 3000;
         const SCAN_DETAIL_OFFSET_X = 20;
-        const AUTOPILOT_SPEED_MULTIPLIER = 5;
+        const ROUTE_SPEED = 1.5; // Mean autopilot speed in world units per ms, must match autopilot.py
+        const ROUTE_MIN_MS = 1000;
+        const TRAIL_LIFETIME = TRAIL_LENGTH * 100; // At the top quality tier
+        const TRAIL_CAPACITY = Math.ceil(TRAIL_LIFETIME / 16) + 1; // One segment per 60fps frame for the whole lifetime
+        const TELEMETRY_BUCKETS = [0.25, 0.5, 1, 2, 4, 8, 16, 33, 50, 100, 250, 500]; // ms upper bounds, must match telemetry.py
+        const TELEMETRY_FLUSH_INTERVAL = 10000;
+        const PATTERN_CACHE_SIZE = 2000; // Planet/moon patterns kept after their chunk is dropped
+        const PREFETCH_LOOKAHEAD = (value => Number.isFinite(value) && value >= 0 ? value : 3000)(
+            Number(new URLSearchParams(location.search).get('prefetch') || 3000)); // ms of projected flight to prefetch for, 0 disables; anything else unusable means 3000
+        const PREFETCH_STEP = CHUNK_SIZE / 4; // Distance between sampled points on the projected path
+        const PREFETCH_MAX_CHUNKS = 27; // Prefetched chunks kept waiting to be used
+        const TILE_CELLS = 16; // Cells per /tiles tile edge, must match tiles.py
+        const MINIMAP_COLS = 33;
+        const MINIMAP_ROWS = 17;
+        const MINIMAP_LEVELS = [4, 6, 2]; // Tile levels M cycles through before hiding the minimap; at level 4 a cell is one chunk
+        const MINIMAP_RAMP = '.:-=+*#%@'; // Fewest to most life-bearing bodies in view
+        const TILE_CACHE_SIZE = 64;
+        const TILE_RETRY_MS = 2000; // Wait before asking again for a tile that failed, e.g. a 503 under load
+        const SCAN_CARD_CHUNKS = 64; // Chunks of /scans cards kept, oldest dropped first
+        const CHUNK_BODY_ID = /^(?:planet|moon)-(-?\d+)-(-?\d+)-/; // Bodies of a chunk, not the Code button's planet
+        const PAGE_PARAMS = new URLSearchParams(location.search);
+        const RENDERER = PAGE_PARAMS.get('renderer') === 'canvas' ? 'canvas' : 'dom'; // ?renderer=dom|canvas
+        const SHOW_FPS = PAGE_PARAMS.has('renderer') || PAGE_PARAMS.has('loop') || PAGE_PARAMS.has('quality') || PAGE_PARAMS.has('fps');
+        const ATLAS_COLUMNS = 64;
+        const ATLAS_ROWS = 64; // Slots before the atlas is cleared and refilled
+        const FPS_WINDOW = 1000; // ms of frames averaged per FPS reading
+        const LOOP_MODE = PAGE_PARAMS.get('loop') === 'always' ? 'always' : 'on-demand'; // ?loop=always renders every frame
+        const IDLE_TICK_MS = STAR_BLINK_INTERVAL; // Tick interval while parked; blinks are the fastest idle change
+        const RENDER_MIN_MOVE = 0.01; // Cells the player must move before a frame is drawn again
+        const IDLE_VELOCITY = 0.0005; // Below this the rest of the drift, velocity / (1 - DRAG), is under RENDER_MIN_MOVE
+        const RESIDENT_CHUNK_BUDGET = 25; // 5x5, what a range of two chunk widths keeps around the player
+        // Quality tiers, lowest first. stars: share of each chunk's stars generated and drawn, must match
+        // galaxy.DENSITY_TIERS; trail: TRAIL_LENGTH at this tier; moonStep: ms between moon positions, 0 every
+        // frame; patterns: 2 draws every body's pattern, 1 draws moons as one glyph, 0 planets as plain discs too;
+        // range: chunk widths from the player within which a chunk stays loaded; chunks: most chunks kept loaded
+        const QUALITY_TIERS = [
+            { stars: 0.25, trail: 8, moonStep: 100, patterns: 0, range: 1.5, chunks: 16 },
+            { stars: 0.5, trail: 15, moonStep: 50, patterns: 1, range: 2, chunks: RESIDENT_CHUNK_BUDGET },
+            { stars: 1, trail: TRAIL_LENGTH, moonStep: 0, patterns: 2, range: 2, chunks: RESIDENT_CHUNK_BUDGET }
+        ];
+        const QUALITY_PARAM = PAGE_PARAMS.get('quality'); // ?quality=0|1|2 pins a tier, anything else adapts
+        const QUALITY_AUTO = !/^[0-2]$/.test(QUALITY_PARAM || '');
+        const QUALITY_WINDOW = 2000; // ms of ticks measured per tier decision
+        const QUALITY_DOWN_BUSY_MS = 12; // Mean ms of work per tick above which the tier steps down
+        const QUALITY_DOWN_FRAME_MS = 24; // Mean ms between frames above which it steps down, frames are being dropped
+        const QUALITY_UP_BUSY_MS = 5; // Mean ms of work per tick below which a window counts towards stepping up
+        const QUALITY_UP_WINDOWS = 3; // Quiet windows in a row before stepping up; doubled when a step up is undone
+        const QUALITY_MAX_UP_WINDOWS = 24;
 
         // Dynamic viewport sizing
         let viewportCols, viewportRows;
@@ -239,8 +730,78 @@ HTML_CONTENT = r"""
         let touchControls = { up: false, down: false, left: false, right: false };
         let mouseControl = { active: false, x: 0, y: 0 };
         let lastTime = 0;
-        let trail = [];
-        let generatedChunks = new Set();
+
+        // Trail ring buffer, allocated once; trailHead is the oldest segment
+        const trailX = new Float64Array(TRAIL_CAPACITY);
+        const trailY = new Float64Array(TRAIL_CAPACITY);
+        const trailTime = new Float64Array(TRAIL_CAPACITY);
+        const trailSpans = [];
+        let trailHead = 0;
+        let trailCount = 0;
+
+        // Phase timing histograms, one count per TELEMETRY_BUCKETS bound plus an overflow bucket
+        const telemetryPhases = ['frame', 'generateChunk', 'generatePlanetPattern', 'render', 'arrival'];
+        const telemetry = {};
+        let telemetrySamples = 0;
+        // Chunk residency: a chunk's stars, planets and key are loaded and evicted together
+        const EVICTED_CHUNK_BUDGET = 27; // recently evicted chunks kept for a cheap return
+        let residentChunks = new Map(); // chunk key -> { cx, cy, stars, planets }
+        let evictedChunks = new Map(); // chunk key -> { cx, cy, stars, planets }, oldest first
+        let seededPlanets = []; // The Code button's planet, which belongs to no chunk
+        let residencyChanged = false;
+        let patternCache = new Map(); // body id -> pattern, oldest first
+        let plainPatterns = new Map(); // size, negated for moons -> plainPattern()
+        let prefetchedChunks = new Map(); // chunk key -> { stars, planets } generated ahead of time, oldest first
+        let prefetchQueue = [];
+        let prefetchScheduled = false;
+        let prefetchHits = 0;
+        let prefetchMisses = 0;
+        // Minimap: density tiles from /tiles, one character per cell, redrawn only when its cell or a tile changes
+        let minimapLevel = 0; // index into MINIMAP_LEVELS; MINIMAP_LEVELS.length hides the minimap
+        let minimapKey = '';
+        let tileCache = new Map(); // 'z/x/y' -> tile, or null while it is fetched, oldest first
+        let scanCards = new Map(); // chunk key -> scan details by body id; null while fetched, false if /scans failed
+        // Rendering: render() fills gridCells, then the DOM or canvas renderer draws it
+        let gridCells = [];
+        let glyphSpans = new Map(); // glyph key -> span HTML for the DOM renderer
+        let gameContext = null;
+        let canvasScale = 1; // device pixels per CSS pixel
+        let atlasCanvas = null;
+        let atlasContext = null;
+        let atlasSlots = new Map(); // glyph key -> slot index in the atlas
+        let fpsFrames = 0;
+        let fpsTicks = 0;
+        let fpsRenderMs = 0;
+        let fpsBusyMs = 0;
+        let fpsStart = 0;
+        // On-demand loop: a frame is drawn only when something on screen changed, and a parked ship ticks at idleTickMs
+        let frameDirty = true; // set by invalidate() for changes render() cannot see coming
+        let renderedX = NaN; // player position at the last render
+        let renderedY = NaN;
+        let animating = false; // the last render drew a filling scan bar
+        let drawnMoons = []; // [planet, moon, column, row] of each moon the last render drew
+        let idleTickMs = IDLE_TICK_MS; // shorter while a moon is drawn, so it still moves cell by cell
+        let idleTimer = 0;
+        let idleTick = false; // this tick was scheduled by the idle timer, so its frame time is not a frame
+        // Adaptive quality: tick work and frame intervals are summed over QUALITY_WINDOW, then the tier may move
+        let qualityTier = QUALITY_AUTO ? QUALITY_TIERS.length - 1 : Number(QUALITY_PARAM);
+        let quality = QUALITY_TIERS[qualityTier];
+        let qualityStart = 0;
+        let qualityTicks = 0;
+        let qualityBusyMs = 0;
+        let qualityFrameMs = 0;
+        let qualityQuietWindows = 0;
+        let qualityUpWindows = QUALITY_UP_WINDOWS;
+        let qualityRaised = false; // the last move was up, so a step down right after it backs off
+        let animatedAt = 0; // Date.now() of the moon positions last drawn
+
+        // Generation runs in a small Web Worker pool; with no workers it runs inline
+        const WORKER_POOL_SIZE = Math.max(1, Math.min(4, (navigator.hardwareConcurrency || 2) - 1));
+        let workers = [];
+        let workerJobs = new Map(); // job id -> callback(result, ms)
+        let nextWorkerJob = 0;
+        let pendingChunks = new Set(); // chunk keys a worker is generating
+        let pendingPatterns = new Set(); // body ids a worker is generating
         let stars = [];
         let planets = [];
         let blinkTimer = 0;
@@ -260,6 +821,11 @@ HTML_CONTENT = r"""
         let autopilotTargetY = 0;
         let autopilotArrivalThreshold = 10;
         let autopilotTargetPlanetName = ''; // Stores the name (seed) of the target planet
+        let autopilotRoute = null; // {startX, startY, duration, elapsed} of the flight under way
+        let routeId = null; // The /route stream feeding routeChunks, until it ends or is cancelled
+        const routeChunks = new Map(); // chunkKey -> chunk payload streamed ahead of the ship
+        let routeDensity = 1; // The quality tier's star share the stream was asked for
+        let arrivalStart = 0; // performance.now() on arrival, until the destination block is drawn
         
         // DOM elements
         const gameElement = document.getElementById('game');
@@ -269,6 +835,9 @@ HTML_CONTENT = r"""
         const controlsElement = document.getElementById('controls');
         const zoomLevelElement = document.getElementById('zoom-level');
         const codeButton = document.getElementById('code-button');
+        const minimapElement = document.getElementById('minimap');
+        const gameCanvas = document.getElementById('game-canvas');
+        const fpsElement = document.getElementById('fps');
         
         function calculateViewport() {
             const temp = document.createElement('div');
@@ -291,10 +860,35 @@ HTML_CONTENT = r"""
             
             if (viewportCols % 2 === 0) viewportCols--;
             if (viewportRows % 2 === 0) viewportRows--;
+
+            if (RENDERER === 'canvas') resizeCanvas();
+        }
+
+        function resizeCanvas() {
+            canvasScale = window.devicePixelRatio || 1;
+            gameCanvas.width = Math.round(window.innerWidth * canvasScale);
+            gameCanvas.height = Math.round(window.innerHeight * canvasScale);
+            gameContext = gameCanvas.getContext('2d');
+            gameContext.textBaseline = 'top';
+            resetAtlas(); // Cell size or pixel ratio may have changed
         }
         
         function init() {
             playerElement.textContent = '■';
+            if (RENDERER === 'canvas') {
+                gameElement.style.display = 'none';
+                gameCanvas.style.display = 'block';
+            }
+            if (SHOW_FPS) fpsElement.style.display = 'block';
+
+            for (let i = 0; i < TRAIL_CAPACITY; i++) {
+                const trailSpan = document.createElement('span');
+                trailSpan.className = 'trail-segment';
+                trailSpan.textContent = '■';
+                trailSpan.style.display = 'none';
+                trailContainer.appendChild(trailSpan);
+                trailSpans.push(trailSpan);
+            }
             
             calculateViewport();
             window.addEventListener('resize', () => {
@@ -311,6 +905,9 @@ HTML_CONTENT = r"""
             window.addEventListener('touchstart', handleTouchStart);
             window.addEventListener('touchmove', handleTouchMove);
             window.addEventListener('touchend', handleTouchEnd);
+            for (const type of ['keydown', 'mousedown', 'mousemove', 'wheel', 'touchstart']) {
+                window.addEventListener(type, wake);
+            }
             
             document.getElementById('up-control').addEventListener('touchstart', (e) => { touchControls.up = true; e.preventDefault(); });
             document.getElementById('up-control').addEventListener('touchend', (e) => { touchControls.up = false; e.preventDefault(); });
@@ -323,6 +920,15 @@ HTML_CONTENT = r"""
             
             codeButton.addEventListener('click', handleCodeButton);
 
+            for (const phase of telemetryPhases) {
+                telemetry[phase] = new Array(TELEMETRY_BUCKETS.length + 1).fill(0);
+            }
+            setInterval(flushTelemetry, TELEMETRY_FLUSH_INTERVAL);
+            document.addEventListener('visibilitychange', () => {
+                if (document.visibilityState === 'hidden') flushTelemetry();
+            });
+
+            startWorkers();
             generateWorld();
             requestAnimationFrame(gameLoop);
             
@@ -333,6 +939,14 @@ HTML_CONTENT = r"""
         }
         
         function handleKeyDown(e) {
+            if (e.key.toLowerCase() === 'm') {
+                if (!e.repeat) {
+                    minimapLevel = (minimapLevel + 1) % (MINIMAP_LEVELS.length + 1);
+                    minimapKey = '';
+                    invalidate();
+                }
+                return;
+            }
             keys[e.key.toLowerCase()] = true;
             if (autopilotActive) stopAutopilot();
             lastPlayerMoveTime = Date.now();
@@ -435,7 +1049,39 @@ HTML_CONTENT = r"""
             render(); 
         }
         
+        function recordPhase(phase, ms) {
+            const counts = telemetry[phase];
+            let i = 0;
+            while (i < TELEMETRY_BUCKETS.length && ms > TELEMETRY_BUCKETS[i]) i++;
+            counts[i]++;
+            telemetrySamples++;
+        }
+
+        function flushTelemetry() {
+            if (telemetrySamples === 0) return;
+            const body = JSON.stringify({
+                buckets: TELEMETRY_BUCKETS,
+                device: {
+                    cores: navigator.hardwareConcurrency || 0,
+                    memory: navigator.deviceMemory || 0,
+                    mobile: window.matchMedia('(pointer: coarse)').matches,
+                    renderer: RENDERER
+                },
+                phases: telemetry,
+                prefetch: { hits: prefetchHits, misses: prefetchMisses }
+            });
+            if (!(navigator.sendBeacon && navigator.sendBeacon('/telemetry', body))) {
+                fetch('/telemetry', { method: 'POST', body, keepalive: true }).catch(() => {});
+            }
+            for (const phase of telemetryPhases) telemetry[phase].fill(0);
+            telemetrySamples = 0;
+            prefetchHits = 0;
+            prefetchMisses = 0;
+        }
+
         function gameLoop(timestamp) {
+            const tickStart = performance.now();
+            if (lastTime > 0 && !idleTick) recordPhase('frame', timestamp - lastTime);
             const deltaTime = Math.min(timestamp - lastTime, 100);
             lastTime = timestamp;
             
@@ -452,10 +1098,167 @@ HTML_CONTENT = r"""
             updateStars(deltaTime);
             updateTrail();
             updateScanning(deltaTime);
-            render();
-            
+            let renderMs = null;
+            const moved = Math.abs(playerX - renderedX) > RENDER_MIN_MOVE || Math.abs(playerY - renderedY) > RENDER_MIN_MOVE;
+            const moonsDue = drawnMoons.length > 0 && Date.now() - animatedAt >= quality.moonStep && moonsMoved();
+            if (LOOP_MODE === 'always' || frameDirty || moved || moonsDue || trailCount > 0) {
+                const renderStart = performance.now();
+                render();
+                renderMs = performance.now() - renderStart;
+                recordPhase('render', renderMs);
+            }
+            // Time to first frame at the destination: from arrival until its whole block is drawn
+            if (arrivalStart && renderMs !== null && blockResident()) {
+                recordPhase('arrival', performance.now() - arrivalStart);
+                arrivalStart = 0;
+                cancelRoute();
+            }
+            updateMinimap();
+
+            const inputActive = mouseControl.active || Object.values(keys).some(Boolean) ||
+                touchControls.up || touchControls.down || touchControls.left || touchControls.right;
+            idleTick = LOOP_MODE !== 'always' && !inputActive && !autopilotActive && !animating && trailCount === 0 &&
+                Math.abs(velocityX) < IDLE_VELOCITY && Math.abs(velocityY) < IDLE_VELOCITY;
+            if (SHOW_FPS) updateFps(timestamp, renderMs, performance.now() - tickStart);
+            if (QUALITY_AUTO && !idleTick) measureQuality(timestamp, deltaTime, performance.now() - tickStart);
+            if (idleTick) {
+                idleTimer = setTimeout(() => {
+                    idleTimer = 0;
+                    requestAnimationFrame(gameLoop);
+                }, idleTickMs);
+            } else {
+                requestAnimationFrame(gameLoop);
+            }
+        }
+
+        // Step the quality tier down as soon as a window is slow, and up only after
+        // qualityUpWindows quiet windows in a row. The gap between the two thresholds
+        // and the wait to climb keep the tier from flapping at a boundary.
+        function measureQuality(timestamp, frameMs, busyMs) {
+            if (qualityStart === 0) qualityStart = timestamp;
+            qualityTicks++;
+            qualityBusyMs += busyMs;
+            qualityFrameMs += frameMs;
+            if (timestamp - qualityStart < QUALITY_WINDOW) return;
+            const meanBusy = qualityBusyMs / qualityTicks;
+            const meanFrame = qualityFrameMs / qualityTicks;
+            qualityStart = timestamp;
+            qualityTicks = 0;
+            qualityBusyMs = 0;
+            qualityFrameMs = 0;
+            if (meanBusy > QUALITY_DOWN_BUSY_MS || meanFrame > QUALITY_DOWN_FRAME_MS) {
+                qualityQuietWindows = 0;
+                if (qualityTier === 0) return;
+                qualityUpWindows = qualityRaised ? Math.min(qualityUpWindows * 2, QUALITY_MAX_UP_WINDOWS) : QUALITY_UP_WINDOWS;
+                qualityRaised = false;
+                setQualityTier(qualityTier - 1);
+            } else if (meanBusy < QUALITY_UP_BUSY_MS && qualityTier < QUALITY_TIERS.length - 1) {
+                if (++qualityQuietWindows < qualityUpWindows) return;
+                qualityQuietWindows = 0;
+                qualityRaised = true;
+                setQualityTier(qualityTier + 1);
+            } else {
+                qualityQuietWindows = 0;
+            }
+        }
+
+        // Thinner chunks already loaded stay until generateWorld() reloads the
+        // block around the player at the new density
+        function setQualityTier(tier) {
+            qualityTier = tier;
+            quality = QUALITY_TIERS[tier];
+            residencyChanged = true;
+            frameDirty = true;
+        }
+
+        // Run the next tick now instead of at the end of the idle interval
+        function wake() {
+            if (!idleTimer) return;
+            clearTimeout(idleTimer);
+            idleTimer = 0;
             requestAnimationFrame(gameLoop);
         }
+
+        // Draw the next frame even though the player has not moved
+        function invalidate() {
+            frameDirty = true;
+            wake();
+        }
+
+        function requestTile(z, x, y) {
+            const key = `${z}/${x}/${y}`;
+            if (tileCache.has(key)) return tileCache.get(key);
+            tileCache.set(key, null);
+            fetch(`/tiles/${key}`)
+                .then(response => response.ok ? response.json() : Promise.reject(response.status))
+                .then(tile => {
+                    tileCache.set(key, tile);
+                    while (tileCache.size > TILE_CACHE_SIZE) tileCache.delete(tileCache.keys().next().value);
+                    minimapKey = '';
+                    invalidate();
+                })
+                .catch(() => {
+                    tileCache.delete(key);
+                    // Redraw later, which asks for the tile again, so a parked ship's minimap does not stay blank
+                    setTimeout(() => {
+                        minimapKey = '';
+                        invalidate();
+                    }, TILE_RETRY_MS);
+                });
+            return null;
+        }
+
+        // Costs one lookup per minimap cell whatever the scale, instead of one per star
+        function updateMinimap() {
+            if (minimapLevel === MINIMAP_LEVELS.length) {
+                minimapElement.style.display = 'none';
+                return;
+            }
+            const z = MINIMAP_LEVELS[minimapLevel];
+            const cellSize = CHUNK_SIZE * 2 ** z / TILE_CELLS;
+            const centerX = Math.floor(playerX / cellSize);
+            const centerY = Math.floor(playerY / cellSize);
+            const key = `${z},${centerX},${centerY}`;
+            if (key === minimapKey) return;
+            minimapKey = key;
+
+            const left = centerX - (MINIMAP_COLS - 1) / 2;
+            const top = centerY - (MINIMAP_ROWS - 1) / 2;
+            const life = new Array(MINIMAP_COLS * MINIMAP_ROWS).fill(-1); // -1 until the cell's tile arrives
+            let minLife = Infinity;
+            let maxLife = -Infinity;
+            for (let row = 0; row < MINIMAP_ROWS; row++) {
+                for (let col = 0; col < MINIMAP_COLS; col++) {
+                    const cellX = left + col;
+                    const cellY = top + row;
+                    const tileX = Math.floor(cellX / TILE_CELLS);
+                    const tileY = Math.floor(cellY / TILE_CELLS);
+                    const tile = requestTile(z, tileX, tileY);
+                    if (!tile) continue;
+                    const value = tile.life[(cellY - tileY * TILE_CELLS) * TILE_CELLS + cellX - tileX * TILE_CELLS];
+                    life[row * MINIMAP_COLS + col] = value;
+                    minLife = Math.min(minLife, value);
+                    maxLife = Math.max(maxLife, value);
+                }
+            }
+
+            const range = Math.max(1, maxLife - minLife);
+            const lines = [];
+            for (let row = 0; row < MINIMAP_ROWS; row++) {
+                let line = '';
+                for (let col = 0; col < MINIMAP_COLS; col++) {
+                    const value = life[row * MINIMAP_COLS + col];
+                    if (row === (MINIMAP_ROWS - 1) / 2 && col === (MINIMAP_COLS - 1) / 2) {
+                        line += '<span class="here">■</span>';
+                    } else {
+                        line += value < 0 ? ' ' : MINIMAP_RAMP[Math.round((value - minLife) / range * (MINIMAP_RAMP.length - 1))];
+                    }
+                }
+                lines.push(line);
+            }
+            minimapElement.innerHTML = lines.join('\n');
+            minimapElement.style.display = '';
+        }
         
         function handleInput(deltaTime) {
             const speed = PLAYER_SPEED * (deltaTime / 16); 
@@ -492,92 +1295,170 @@ HTML_CONTENT = r"""
             }
         }
         
-        function mulberry32(a) {
-            return function() {
-                var t = a += 0x6D2B79F5;
-                t = Math.imul(t ^ t >>> 15, t | 1);
-                t = t ^ t >>> 13;
-                return ((t >>> 0) / 4294967296);
+        function startWorkers() {
+            if (typeof Worker === 'undefined') return;
+            try {
+                for (let i = 0; i < WORKER_POOL_SIZE; i++) {
+                    const worker = new Worker(document.getElementById('generator').src);
+                    worker.jobs = 0;
+                    worker.onmessage = (e) => {
+                        worker.jobs--;
+                        const callback = workerJobs.get(e.data.id);
+                        workerJobs.delete(e.data.id);
+                        if (callback) callback(e.data.result, e.data.ms);
+                        invalidate(); // A chunk, pattern or scan result may be on screen
+                    };
+                    worker.onerror = stopWorkers;
+                    workers.push(worker);
+                }
+            } catch (err) {
+                stopWorkers();
             }
         }
 
-        function hashString(str) {
-            let hash = 0;
-            for (let i = 0; i < str.length; i++) {
-                const char = str.charCodeAt(i);
-                hash = ((hash << 5) - hash) + char;
-                hash |= 0;
-            }
-            return Math.abs(hash);
+        // Drop the pool and forget its jobs, so everything is regenerated inline
+        function stopWorkers() {
+            for (const worker of workers) worker.terminate();
+            workers = [];
+            workerJobs.clear();
+            pendingChunks.clear();
+            pendingPatterns.clear();
         }
 
-        function generateSpecies(rand, planetName = null) {
-            const categories = ['Flora', 'Fauna', 'Fungi', 'Microbial', 'Sentient'];
-            const subCategories = {
-                'Flora': ['Photosynthetic', 'Chemosynthetic', 'Carnivorous', 'Arboreal', 'Aquatic'],
-                'Fauna': ['Mammalian', 'Reptilian', 'Avian', 'Insectoid', 'Aquatic', 'Amphibious'],
-                'Fungi': ['Mycorrhizal', 'Saprophytic', 'Parasitic', 'Symbiotic'],
-                'Microbial': ['Bacterial', 'Viral', 'Archaeal', 'Protist'],
-                'Sentient': ['Bipedal', 'Quadrupedal', 'Avianoid', 'Aquatic-Intelligent']
-            };
-            const descriptors = ['Bio-luminescent', 'Cryo-tolerant', 'Hydrophilic', 'Xenomorphic', 'Symbiotic', 'Silicate-based', 'Carbon-based', 'Silicon-based'];
+        function runInWorker(type, args, callback) {
+            let worker = workers[0];
+            for (const candidate of workers) {
+                if (candidate.jobs < worker.jobs) worker = candidate;
+            }
+            const id = nextWorkerJob++;
+            workerJobs.set(id, callback);
+            worker.jobs++;
+            worker.postMessage({ id, type, args });
+        }
 
-            if (planetName && planetName.toLowerCase() === 'ollivia') {
-                return "Aesthetiflora (Luminescent, Harmonious Ecosystem)";
+        // Star objects from a chunk's packed star columns; blink offsets are relative to now
+        function hydrateChunk(data) {
+            const now = Date.now();
+            const starData = data.starData;
+            const chunkStars = new Array(starData.length / STAR_FIELDS);
+            for (let i = 0, o = 0; i < chunkStars.length; i++, o += STAR_FIELDS) {
+                chunkStars[i] = {
+                    x: starData[o],
+                    y: starData[o + 1],
+                    char: starData[o + 3] === 46 ? '.' : '*',
+                    brightness: starData[o + 2],
+                    blinkSpeed: starData[o + 4],
+                    nextBlink: now + starData[o + 5],
+                    originalBrightness: starData[o + 2],
+                    visible: true
+                };
             }
+            return { density: data.density, stars: chunkStars, planets: data.planets };
+        }
 
-            const category = categories[Math.floor(rand() * categories.length)];
-            const subCategory = subCategories[category][Math.floor(rand() * subCategories[category].length)];
-            const descriptor = descriptors[Math.floor(rand() * descriptors.length)];
+        function generateChunk(cx, cy) {
+            const phaseStart = performance.now();
+            const chunk = hydrateChunk(generateChunkData(cx, cy, quality.stars));
+            recordPhase('generateChunk', performance.now() - phaseStart);
+            return chunk;
+        }
 
-            return `${descriptor} ${subCategory} ${category}`;
+        // Generate a chunk off the main thread; results for keys dropped from
+        // pendingChunks meanwhile (a teleport) are discarded
+        function requestChunk(cx, cy, chunkKey, onReady) {
+            pendingChunks.add(chunkKey);
+            runInWorker('chunk', [cx, cy, quality.stars], (data, ms) => {
+                if (!pendingChunks.delete(chunkKey)) return;
+                recordPhase('generateChunk', ms);
+                onReady(hydrateChunk(data));
+            });
         }
 
-        function generatePlanetData(seed, isMoon = false, specificName = null) {
-            const rand = mulberry32(seed);
+        function cachePattern(body, pattern) {
+            patternCache.set(body.id, pattern);
+            if (patternCache.size > PATTERN_CACHE_SIZE) {
+                patternCache.delete(patternCache.keys().next().value);
+            }
+            body.pattern = pattern;
+        }
 
-            let hasLife = rand() > 0.65;
-            let population = hasLife ? Math.floor(rand() * 10000000000) : 0;
-            
-            let tempBase = -100 + rand() * 200;
-            if (isMoon) tempBase += (rand() - 0.5) * 50;
-            const tempVariation = rand() * 50 - 25;
-            const temperature = Math.round(tempBase + tempVariation);
+        // Patterns are generated the first time a body is on screen, from the RNG state
+        // its descriptor saved, and cached by body id so revisits do not regenerate them.
+        // With workers this returns null until the pattern arrives and the body is skipped.
+        function ensurePattern(body, isMoon) {
+            if (body.pattern) return body.pattern;
+            const cached = patternCache.get(body.id);
+            if (cached) {
+                body.pattern = cached;
+                return cached;
+            }
+            const args = [body.size, isMoon, body.patternName || null, body.patternState];
+            if (workers.length) {
+                if (!pendingPatterns.has(body.id)) {
+                    pendingPatterns.add(body.id);
+                    runInWorker('pattern', args, (pattern, ms) => {
+                        if (!pendingPatterns.delete(body.id)) return;
+                        recordPhase('generatePlanetPattern', ms);
+                        cachePattern(body, pattern);
+                    });
+                }
+                return null;
+            }
+            const phaseStart = performance.now();
+            const pattern = generatePlanetPattern(args[0], args[1], args[2], mulberry32(args[3]));
+            recordPhase('generatePlanetPattern', performance.now() - phaseStart);
+            cachePattern(body, pattern);
+            return pattern;
+        }
 
-            const ageBillionYears = (rand() * 10) + 1;
-            const ageString = `${ageBillionYears.toFixed(2)} billion years`;
+        // Scan details of every body in a chunk, fetched once from /scans
+        function requestScanCards(chunkKey) {
+            if (scanCards.has(chunkKey)) return scanCards.get(chunkKey);
+            scanCards.set(chunkKey, null);
+            const [cx, cy] = chunkKey.split(',');
+            fetch(`/scans?x=${cx}&y=${cy}`)
+                .then(response => response.ok ? response.json() : Promise.reject(response.status))
+                .then(cards => scanCards.set(chunkKey, cards.cards))
+                .catch(() => scanCards.set(chunkKey, false)) // Generated locally instead
+                .then(() => {
+                    while (scanCards.size > SCAN_CARD_CHUNKS) scanCards.delete(scanCards.keys().next().value);
+                    invalidate();
+                });
+            return null;
+        }
 
-            const planetNames = ["Xylos", "Aelon", "Veridian", "Obsidian", "Celestia", "Aethel", "Solara", "Lunara", "Titanus", "Zephyr", "Astra", "Cosmos", "Orion", "Lyra", " Lilith", "Nebula", "Terra", "Yeawn", " Eudes", "Xia", " Caleb", "Sylus", " Zayne", "Rafayel", " Xavier", "Calypso", "Aether", " Lumine"];
-            const moonNames = ["Lune", "Phobos", "Elxi", "Miranda", "Tsuko", "Io", "Callisto", "Triton", "Elxi", "Oberon", "Hae", "Elxi", "Umbriel", "Paimon", "Ariel", "Rhea", "Iapetus", "Daiso"];
-            
-            let name;
-            // Use specificName only if it's explicitly provided (for the autopilot target planet)
-            // Otherwise, generate a random name.
-            if (specificName) { 
-                name = specificName;
-            } else if (isMoon) {
-                name = moonNames[Math.floor(rand() * moonNames.length)] + "-" + Math.floor(rand() * 9);
-            } else {
-                name = planetNames[Math.floor(rand() * planetNames.length)] + "-" + Math.floor(rand() * 999);
+        // Scan details for a body, cached on it; null while /scans or a worker is generating them.
+        // A chunk's bodies come from the server's scan cards; the Code button's planet and moons,
+        // and any chunk whose cards could not be fetched, are generated here.
+        function requestScanData(entity, seed, isMoon, specificName) {
+            const data = entity.scanData;
+            if (data && data.seed === seed && data.specificName === specificName) return data;
+            const store = (result) => {
+                result.seed = seed;
+                result.specificName = specificName;
+                entity.scanData = result;
+            };
+            const match = specificName === null && CHUNK_BODY_ID.exec(entity.id);
+            if (match) {
+                const cards = requestScanCards(`${match[1]},${match[2]}`);
+                if (cards === null) return null;
+                if (cards && cards[entity.id]) {
+                    store(Object.assign({}, cards[entity.id]));
+                    return entity.scanData;
+                }
             }
-            
-            // Special case for "Ollivia"
-            if (name.toLowerCase() === 'ollivia') { // Check against the determined name, not just specificName input
-                hasLife = true; // Ensure it has life
-                if (population === 0) population = Math.floor(rand() * 5000000000) + 100000000; // Ensure some population if it was 0
-                tempBase = 15 + rand() * 10; // More temperate
+            if (!workers.length) {
+                store(generatePlanetData(seed, isMoon, specificName));
+                return entity.scanData;
             }
-            
-            const species = hasLife ? generateSpecies(rand, name) : "None";
-
-            return {
-                name: name,
-                lifeForm: hasLife ? "Yes" : "No",
-                population: population.toLocaleString(),
-                temperature: `${temperature}°C`,
-                age: ageString,
-                species: species
-            };
+            if (!entity.scanPending) {
+                entity.scanPending = true;
+                runInWorker('scan', [[seed, isMoon, specificName]], (result) => {
+                    entity.scanPending = false;
+                    store(result[0]);
+                });
+            }
+            return null;
         }
 
         function generateWorld() {
@@ -589,247 +1470,212 @@ HTML_CONTENT = r"""
                     const cx = chunkX + x;
                     const cy = chunkY + y;
                     const chunkKey = `${cx},${cy}`;
-                    
-                    if (!generatedChunks.has(chunkKey)) {
-                        generateChunk(cx, cy);
-                        generatedChunks.add(chunkKey);
+                    const resident = residentChunks.get(chunkKey);
+                    if (!resident || resident.density < quality.stars) {
+                        loadChunk(cx, cy, chunkKey);
                     }
                 }
             }
+            prefetchAlongPath();
+            evictChunks();
+            if (residencyChanged) {
+                rebuildResidentLists();
+            }
+        }
+
+        function blockResident() {
+            const chunkX = Math.floor(playerX / CHUNK_SIZE);
+            const chunkY = Math.floor(playerY / CHUNK_SIZE);
+            for (let y = -1; y <= 1; y++) {
+                for (let x = -1; x <= 1; x++) {
+                    if (!residentChunks.has(`${chunkX + x},${chunkY + y}`)) return false;
+                }
+            }
+            return true;
+        }
+
+        function chunkInRange(cx, cy) {
+            const renderDistance = CHUNK_SIZE * quality.range;
+            const left = cx * CHUNK_SIZE;
+            const top = cy * CHUNK_SIZE;
+            return left - renderDistance < playerX && playerX < left + CHUNK_SIZE + renderDistance &&
+                top - renderDistance < playerY && playerY < top + CHUNK_SIZE + renderDistance;
+        }
+
+        // Evict out-of-range chunks, then the farthest ones while over budget. Evicted
+        // chunks drop their key too, so generateWorld() loads them again on return.
+        function evictChunks() {
+            const chunkX = Math.floor(playerX / CHUNK_SIZE);
+            const chunkY = Math.floor(playerY / CHUNK_SIZE);
+            const distance = (chunk) => Math.max(Math.abs(chunk.cx - chunkX), Math.abs(chunk.cy - chunkY));
+            let victims = [...residentChunks.values()].filter(chunk => !chunkInRange(chunk.cx, chunk.cy));
+            const over = residentChunks.size - victims.length - quality.chunks;
+            if (over > 0) {
+                const kept = [...residentChunks.values()].filter(chunk => chunkInRange(chunk.cx, chunk.cy));
+                kept.sort((a, b) => distance(b) - distance(a));
+                victims = victims.concat(kept.slice(0, over));
+            }
+            for (const chunk of victims) {
+                const chunkKey = `${chunk.cx},${chunk.cy}`;
+                residentChunks.delete(chunkKey);
+                evictedChunks.delete(chunkKey);
+                evictedChunks.set(chunkKey, chunk);
+                if (evictedChunks.size > EVICTED_CHUNK_BUDGET) {
+                    evictedChunks.delete(evictedChunks.keys().next().value);
+                }
+                residencyChanged = true;
+            }
 
             const renderDistance = CHUNK_SIZE * 2;
-            stars = stars.filter(star => {
-                return Math.abs(star.x - playerX) < renderDistance && Math.abs(star.y - playerY) < renderDistance;
-            });
-            planets = planets.filter(planet => {
+            const nearby = seededPlanets.filter(planet => {
+                if (autopilotActive && planet.id === `planet-${autopilotTargetPlanetName}`) return true; // Kept for the whole flight
                 return Math.abs(planet.x - playerX) < renderDistance && Math.abs(planet.y - playerY) < renderDistance;
             });
-        }
-        
-        function generateChunk(chunkX, chunkY) {
-            const chunkStartX = chunkX * CHUNK_SIZE;
-            const chunkStartY = chunkY * CHUNK_SIZE;
-            
-            const chunkSeed = hashString(`${chunkX},${chunkY}`);
-            const chunkRand = mulberry32(chunkSeed);
-
-            const starCount = CHUNK_SIZE * CHUNK_SIZE * STAR_DENSITY;
-            for (let i = 0; i < starCount; i++) {
-                const x = chunkStartX + chunkRand() * CHUNK_SIZE;
-                const y = chunkStartY + chunkRand() * CHUNK_SIZE;
-                const brightness = Math.floor(chunkRand() * 4) + 1;
-                const char = chunkRand() > 0.5 ? '.' : '*';
-                const blinkSpeed = chunkRand() * 5000 + 2000;
-                const nextBlink = Date.now() + chunkRand() * blinkSpeed;
-                
-                stars.push({
-                    x, y, char, brightness, blinkSpeed, nextBlink,
-                    originalBrightness: brightness,
-                    visible: true
-                });
+            if (nearby.length !== seededPlanets.length) {
+                seededPlanets = nearby;
+                residencyChanged = true;
             }
-            
-            const planetCount = CHUNK_SIZE * CHUNK_SIZE * PLANET_DENSITY;
-            for (let i = 0; i < planetCount; i++) {
-                const planetSeed = hashString(`${chunkX},${chunkY},${i}`); // Unique seed for each planet
-                const planetRand = mulberry32(planetSeed);
-
-                const x = chunkStartX + planetRand() * CHUNK_SIZE;
-                const y = chunkStartY + planetRand() * CHUNK_SIZE;
-                const size = Math.floor(planetRand() * 20) + 10;
-                
-                const hasMoons = planetRand() > 0.6; 
-                const moons = [];
-                if (hasMoons) {
-                    const numMoons = Math.floor(planetRand() * 3) + 1; 
-                    for (let m = 0; m < numMoons; m++) {
-                        const moonSeed = hashString(`${planetSeed}-${m}`);
-                        const moonRand = mulberry32(moonSeed);
-                        const moonSize = Math.floor(moonRand() * 5) + 3; 
-                        const orbitRadius = size / 2 + moonSize + moonRand() * 10;
-                        const orbitAngle = moonRand() * Math.PI * 2;
-                        moons.push({
-                            id: `moon-${chunkX}-${chunkY}-${i}-${m}`, // Unique ID for each moon
-                            size: moonSize,
-                            orbitRadius: orbitRadius,
-                            orbitAngle: orbitAngle,
-                            pattern: generatePlanetPattern(moonSize, true, null, moonRand) 
-                        });
-                    }
-                }
+        }
 
-                const planet = {
-                    id: `planet-${chunkX}-${chunkY}-${i}`, // Unique ID for the main planet
-                    x, y, size,
-                    pattern: generatePlanetPattern(size, false, null, planetRand), // Pass planetRand for pattern generation
-                    moons: moons
-                };
-                planets.push(planet);
+        // stars and planets are flat views over the resident chunks, rebuilt when residency changes
+        function rebuildResidentLists() {
+            stars = [];
+            planets = [];
+            // A chunk's stars are independent draws, so its first ones are an even thinning
+            const starCount = Math.ceil(STAR_TOTAL * quality.stars);
+            for (const chunk of residentChunks.values()) {
+                const chunkStars = chunk.stars;
+                for (let i = 0; i < chunkStars.length && i < starCount; i++) stars.push(chunkStars[i]);
+                for (const planet of chunk.planets) planets.push(planet);
             }
+            for (const planet of seededPlanets) planets.push(planet);
+            residencyChanged = false;
+            frameDirty = true;
         }
         
-        function generatePlanetPattern(size, isMoon = false, specificName = null, rand = Math.random) {
-            // If rand is not a function (e.g., if Math.random was passed directly), wrap it
-            const seededRand = typeof rand === 'function' ? rand : () => Math.random();
-
-            const pattern = [];
-            const center = size / 2;
-            const maxDist = center * center;
-            
-            const hasRings = !isMoon && seededRand() > 0.7; 
-            const isGasGiant = seededRand() > 0.5;
-            const craterCount = Math.floor(seededRand() * 5) + 1;
-            const craters = [];
-            
-            let baseColor;
-            let secondaryColor;
-            let highlightColor;
-
-            if (specificName && specificName.toLowerCase() === 'ollivia') {
-                baseColor = '#FFC0CB'; // Pink
-                secondaryColor = '#FFFFFF'; // White
-                highlightColor = '#F0F0F0'; // Off-white
-            } else {
-                baseColor = getRandomColor(seededRand);
-                secondaryColor = getRandomColor(seededRand);
-                highlightColor = getRandomColor(seededRand);
+        // Chunks held at a lower density than the current tier are passed over and generated again
+        function loadChunk(cx, cy, chunkKey) {
+            const evicted = evictedChunks.get(chunkKey);
+            evictedChunks.delete(chunkKey);
+            if (evicted && evicted.density >= quality.stars) {
+                addChunk(chunkKey, evicted);
+                return;
             }
-            
-            for (let i = 0; i < craterCount; i++) {
-                craters.push({
-                    x: seededRand() * size - center,
-                    y: seededRand() * size - center,
-                    size: seededRand() * (size/4) + 1
-                });
+            const streamed = routeChunks.get(chunkKey);
+            routeChunks.delete(chunkKey);
+            if (streamed && routeDensity >= quality.stars) {
+                prefetchHits++;
+                addChunk(chunkKey, chunkFromPayload(streamed, routeDensity));
+                return;
             }
-            
-            for (let y = -center; y < center; y++) {
-                let line = '';
-                let colors = '';
-                for (let x = -center; x < center; x++) {
-                    const dist = x*x + y*y;
-                    
-                    if (dist > maxDist) {
-                        if (hasRings && Math.abs(y) < 2 && dist < maxDist * 1.5 && dist > maxDist * 0.8) {
-                            const ringChar = seededRand() > 0.7 ? '=' : seededRand() > 0.7 ? '+' : '-';
-                            line += ringChar;
-                            colors += highlightColor + '|';
-                        } else {
-                            line += ' ';
-                            colors += '|';
-                        }
-                    } else {
-                        if (isGasGiant) {
-                            const noise = Math.floor(seededRand() * 4);
-                            let color;
-                            const angle = Math.atan2(y, x);
-                            const distFactor = dist / maxDist;
-                            
-                            if (Math.sin(angle * 5 + distFactor * 10) > 0.7) {
-                                color = highlightColor;
-                            } else if (Math.sin(angle * 3 + distFactor * 15) > 0.5) {
-                                color = secondaryColor;
-                            } else {
-                                color = baseColor;
-                            }
-                            
-                            if (noise < 1) {
-                                line += getRandomPlanetChar(seededRand);
-                            } else {
-                                line += getRandomPlanetChar(seededRand);
-                            }
-                            colors += color + '|';
-                        } else {
-                            let inCrater = false;
-                            for (const crater of craters) {
-                                const craterDist = (x-crater.x)*(x-crater.x) + (y-crater.y)*(y-crater.y);
-                                if (craterDist < crater.size * crater.size) {
-                                    inCrater = true;
-                                    break;
-                                }
-                            }
-                            
-                            const altitude = 1 - (dist / maxDist);
-                            let char, color;
-                            
-                            if (inCrater) {
-                                char = seededRand() > 0.7 ? 'o' : 'O';
-                                color = '#888'; 
-                            } else if (altitude > 0.9) {
-                                char = seededRand() > 0.7 ? '^' : '*';
-                                color = mixColors(baseColor, '#ffffff', 0.7);
-                            } else if (altitude > 0.7) {
-                                char = seededRand() > 0.7 ? '#' : '%';
-                                color = mixColors(baseColor, secondaryColor, 0.5);
-                            } else if (altitude > 0.4) {
-                                char = seededRand() > 0.7 ? '@' : '&';
-                                color = baseColor;
-                            } else {
-                                char = seededRand() > 0.7 ? '~' : ':';
-                                color = mixColors(baseColor, '#000000', 0.3);
-                            }
-                            
-                            line += char;
-                            colors += color + '|';
+            const chunk = prefetchedChunks.get(chunkKey);
+            prefetchedChunks.delete(chunkKey);
+            if (chunk && chunk.density >= quality.stars) {
+                prefetchHits++;
+                addChunk(chunkKey, chunk);
+            } else if (!workers.length) {
+                prefetchMisses++;
+                addChunk(chunkKey, generateChunk(cx, cy));
+            } else if (!pendingChunks.has(chunkKey)) {
+                // A chunk still in flight from the prefetcher is picked up once it lands
+                prefetchMisses++;
+                requestChunk(cx, cy, chunkKey, (loaded) => addChunk(chunkKey, loaded));
+            }
+        }
+
+        function addChunk(chunkKey, chunk) {
+            const resident = residentChunks.get(chunkKey);
+            if (resident && resident.density >= chunk.density) return;
+            const [cx, cy] = chunkKey.split(',').map(Number);
+            // A denser copy only adds stars; keeping the bodies keeps their patterns and scan state
+            const planets = resident ? resident.planets : chunk.planets;
+            residentChunks.set(chunkKey, { cx, cy, density: chunk.density, stars: chunk.stars, planets });
+            residencyChanged = true;
+        }
+
+        // Queue the chunks around points on the player's projected path, so they are
+        // generated in idle time before generateWorld() needs them
+        function prefetchAlongPath() {
+            if (PREFETCH_LOOKAHEAD <= 0 || routeId !== null) return; // A /route stream is already ahead of the ship
+            const scale = 100 / zoomLevel;
+            const stepX = velocityX * scale;
+            const stepY = velocityY * scale;
+            const speed = Math.hypot(stepX, stepY); // world units per 16ms frame
+            if (speed < 0.01) return;
+
+            const distance = speed * PREFETCH_LOOKAHEAD / 16;
+            const samples = Math.ceil(distance / PREFETCH_STEP);
+            prefetchQueue = []; // Rebuilt every frame, nearest first, so turns drop stale entries
+            for (let i = 1; i <= samples && prefetchQueue.length < PREFETCH_MAX_CHUNKS; i++) {
+                const t = Math.min(i * PREFETCH_STEP, distance) / speed;
+                const chunkX = Math.floor((playerX + stepX * t) / CHUNK_SIZE);
+                const chunkY = Math.floor((playerY + stepY * t) / CHUNK_SIZE);
+                for (let y = -1; y <= 1; y++) {
+                    for (let x = -1; x <= 1; x++) {
+                        const chunkKey = `${chunkX + x},${chunkY + y}`;
+                        if (!residentChunks.has(chunkKey) && !evictedChunks.has(chunkKey) && !prefetchedChunks.has(chunkKey) &&
+                            !pendingChunks.has(chunkKey) && !prefetchQueue.includes(chunkKey)) {
+                            prefetchQueue.push(chunkKey);
                         }
                     }
                 }
-                pattern.push({ line, colors });
             }
-            
-            return pattern;
+            schedulePrefetch();
         }
-        
-        function mixColors(color1, color2, weight) {
-            const r1 = parseInt(color1.substring(1, 3), 16);
-            const g1 = parseInt(color1.substring(3, 5), 16);
-            const b1 = parseInt(color1.substring(5, 7), 16);
-            
-            const r2 = parseInt(color2.substring(1, 3), 16);
-            const g2 = parseInt(color2.substring(3, 5), 16);
-            const b2 = parseInt(color2.substring(5, 7), 16);
-            
-            const r = Math.round(r1 * weight + r2 * (1 - weight));
-            const g = Math.round(g1 * weight + g2 * (1 - weight));
-            const b = Math.round(b1 * weight + b2 * (1 - weight));
-            
-            return `#${((1 << 24) + (r << 16) + (g << 8) + b).toString(16).slice(1)}`;
+
+        function schedulePrefetch() {
+            if (workers.length) {
+                // One job per worker at a time, so chunks generateWorld() needs are never queued behind many prefetches;
+                // prefetchAlongPath() tops the pool up again every frame
+                while (workerJobs.size < workers.length && prefetchQueue.length) {
+                    const chunkKey = prefetchQueue.shift();
+                    if (residentChunks.has(chunkKey) || evictedChunks.has(chunkKey) || prefetchedChunks.has(chunkKey) || pendingChunks.has(chunkKey)) continue;
+                    const [cx, cy] = chunkKey.split(',').map(Number);
+                    requestChunk(cx, cy, chunkKey, (chunk) => storePrefetched(chunkKey, chunk));
+                }
+                return;
+            }
+            if (prefetchScheduled || prefetchQueue.length === 0) return;
+            prefetchScheduled = true;
+            const idle = window.requestIdleCallback || ((callback) => setTimeout(callback, 0));
+            idle(runPrefetch);
         }
-        
-        function getRandomPlanetChar(rand = Math.random) {
-            const chars = ['@', '░', '%', '&', '*', '+', '=', '-', '~', ':', '.'];
-            return chars[Math.floor(rand() * chars.length)];
+
+        function runPrefetch() {
+            prefetchScheduled = false;
+            const chunkKey = prefetchQueue.shift(); // Nearest on the path first
+            if (chunkKey && !residentChunks.has(chunkKey) && !evictedChunks.has(chunkKey) && !prefetchedChunks.has(chunkKey)) {
+                const [cx, cy] = chunkKey.split(',').map(Number);
+                storePrefetched(chunkKey, generateChunk(cx, cy));
+            }
+            schedulePrefetch();
         }
-        
-        function getRandomColor(rand = Math.random) {
-            const commonColors = [
-                '#FF5733', '#33FF57', '#3357FF', '#F3FF33', '#FF33F3',
-                '#33FFF3', '#8A2BE2', '#FF6347', '#7CFC00', '#FFD700',
-                '#FF8C00', '#E6E6FA', '#40E0D0', '#F08080', '#90EE90'
-            ];
-            const whitePinkColors = [
-                '#FFFFFF', '#F8F8F8', '#F0F0F0',
-                '#FFC0CB', '#FFB6C1', '#FFD1DC'
-            ];
-
-            if (rand() < 0.35) { // Increased chance for white/pink
-                return whitePinkColors[Math.floor(rand() * whitePinkColors.length)];
-            } else {
-                return commonColors[Math.floor(rand() * commonColors.length)];
+
+        function storePrefetched(chunkKey, chunk) {
+            if (residentChunks.has(chunkKey)) return;
+            prefetchedChunks.set(chunkKey, chunk);
+            if (prefetchedChunks.size > PREFETCH_MAX_CHUNKS) {
+                prefetchedChunks.delete(prefetchedChunks.keys().next().value);
             }
         }
-        
+
         function updateStars(deltaTime) {
             const now = Date.now();
             blinkTimer += deltaTime;
             
-            if (blinkTimer > STAR_BLINK_INTERVAL) {
+            // >= so ticks capped at 100 ms while idle still blink every tick
+            if (blinkTimer >= STAR_BLINK_INTERVAL) {
                 blinkTimer = 0;
+                const left = playerX - viewportCols / 2;
+                const top = playerY - viewportRows / 2;
                 
                 for (const star of stars) {
                     if (now > star.nextBlink) {
                         star.visible = !star.visible;
                         star.nextBlink = now + star.blinkSpeed;
+                        if (star.x >= left && star.x < left + viewportCols && star.y >= top && star.y < top + viewportRows) {
+                            frameDirty = true;
+                        }
                     }
                 }
             }
@@ -840,19 +1686,26 @@ HTML_CONTENT = r"""
             
             const minDistanceForTrail = 0.5 * (100 / zoomLevel); 
             
-            if (trail.length === 0 || 
-                Math.abs(playerX - trail[trail.length - 1].x) > minDistanceForTrail ||
-                Math.abs(playerY - trail[trail.length - 1].y) > minDistanceForTrail) {
+            // An expired segment's slot keeps its position, so a parked ship does not lay a new segment every TRAIL_LIFETIME
+            const newest = (trailHead + trailCount - 1 + TRAIL_CAPACITY) % TRAIL_CAPACITY;
+            if (Math.abs(playerX - trailX[newest]) > minDistanceForTrail ||
+                Math.abs(playerY - trailY[newest]) > minDistanceForTrail) {
                 
-                trail.push({
-                    x: playerX,
-                    y: playerY,
-                    time: now
-                });
+                if (trailCount === TRAIL_CAPACITY) {
+                    // Full (faster than 60fps): overwrite the oldest segment
+                    trailHead = (trailHead + 1) % TRAIL_CAPACITY;
+                    trailCount--;
+                }
+                const slot = (trailHead + trailCount) % TRAIL_CAPACITY;
+                trailX[slot] = playerX;
+                trailY[slot] = playerY;
+                trailTime[slot] = now;
+                trailCount++;
             }
             
-            while (trail.length > 0 && now - trail[0].time > TRAIL_LENGTH * 100) {
-                trail.shift();
+            while (trailCount > 0 && now - trailTime[trailHead] > quality.trail * 100) {
+                trailHead = (trailHead + 1) % TRAIL_CAPACITY;
+                trailCount--;
             }
         }
 
@@ -864,6 +1717,7 @@ HTML_CONTENT = r"""
                 scanTimer += deltaTime;
             } else {
                 scanTimer = 0;
+                if (isScanning) frameDirty = true;
                 clearScanElements();
                 isScanning = false;
                 closestScannablePlanet = null;
@@ -886,6 +1740,7 @@ HTML_CONTENT = r"""
                     isScanning = true;
                     closestScannablePlanet = currentClosestPlanet;
                     scanTimer = 0;
+                    frameDirty = true;
                     clearScanElements(); 
                 }
             } else {
@@ -893,6 +1748,7 @@ HTML_CONTENT = r"""
                     isScanning = false;
                     closestScannablePlanet = null;
                     scanTimer = 0;
+                    frameDirty = true;
                     clearScanElements();
                 }
             }
@@ -903,20 +1759,169 @@ HTML_CONTENT = r"""
             activeScanElements.clear();
         }
         
+        // Glyph keys are the character followed by its colour ('#rrggbb') or, for a star, its brightness 1-4
+        function glyphHtml(key) {
+            let html = glyphSpans.get(key);
+            if (html === undefined) {
+                const style = key[1] === '#' ? `color:${key.slice(1)}` : `opacity:${Number(key.slice(1)) / 5}`;
+                html = `<span style="${style}">${key[0]}</span>`;
+                glyphSpans.set(key, html);
+            }
+            return html;
+        }
+
+        // Every glyph is rasterized once into an offscreen atlas; cells are then copied with drawImage
+        function resetAtlas() {
+            atlasCanvas = document.createElement('canvas');
+            atlasCanvas.width = Math.ceil(cellWidth * canvasScale) * ATLAS_COLUMNS;
+            atlasCanvas.height = Math.ceil(cellHeight * canvasScale) * ATLAS_ROWS;
+            atlasContext = atlasCanvas.getContext('2d');
+            atlasContext.font = `${16 * canvasScale}px monospace`;
+            atlasContext.textBaseline = 'top';
+            atlasSlots.clear();
+            for (const char of ['.', '*']) {
+                for (let brightness = 1; brightness <= 4; brightness++) atlasSlot(char + brightness);
+            }
+            for (const color of [...COMMON_COLORS, ...WHITE_PINK_COLORS]) {
+                for (const char of PLANET_CHARS) atlasSlot(char + color);
+            }
+        }
+
+        function atlasSlot(key) {
+            let slot = atlasSlots.get(key);
+            if (slot !== undefined) return slot;
+            if (atlasSlots.size === ATLAS_COLUMNS * ATLAS_ROWS) resetAtlas(); // Mixed colours filled it up
+            slot = atlasSlots.size;
+            const slotWidth = Math.ceil(cellWidth * canvasScale);
+            const slotHeight = Math.ceil(cellHeight * canvasScale);
+            const x = (slot % ATLAS_COLUMNS) * slotWidth;
+            const y = Math.floor(slot / ATLAS_COLUMNS) * slotHeight;
+            if (key[1] === '#') {
+                atlasContext.globalAlpha = 1;
+                atlasContext.fillStyle = key.slice(1);
+            } else {
+                atlasContext.globalAlpha = Number(key.slice(1)) / 5;
+                atlasContext.fillStyle = '#fff';
+            }
+            atlasContext.fillText(key[0], x, y);
+            atlasSlots.set(key, slot);
+            return slot;
+        }
+
+        function drawCells() {
+            const slotWidth = Math.ceil(cellWidth * canvasScale);
+            const slotHeight = Math.ceil(cellHeight * canvasScale);
+            gameContext.clearRect(0, 0, gameCanvas.width, gameCanvas.height);
+            for (let y = 0; y < viewportRows; y++) {
+                for (let x = 0; x < viewportCols; x++) {
+                    const key = gridCells[y * viewportCols + x];
+                    if (key === null) continue;
+                    const slot = atlasSlot(key);
+                    gameContext.drawImage(atlasCanvas,
+                        (slot % ATLAS_COLUMNS) * slotWidth, Math.floor(slot / ATLAS_COLUMNS) * slotHeight, slotWidth, slotHeight,
+                        Math.round(x * cellWidth * canvasScale), Math.round(y * cellHeight * canvasScale), slotWidth, slotHeight);
+                }
+            }
+        }
+
+        // Frames drawn and ticks run per second, mean render time and loop time per second (a CPU cost
+        // proxy) for this renderer and loop mode, next to the last readings stored for the other renderer
+        // and the other loop mode, so they can be compared on the same machine
+        function updateFps(timestamp, renderMs, busyMs) {
+            fpsTicks++;
+            fpsBusyMs += busyMs;
+            if (renderMs !== null) {
+                fpsFrames++;
+                fpsRenderMs += renderMs;
+            }
+            if (fpsStart === 0) fpsStart = timestamp;
+            const elapsed = timestamp - fpsStart;
+            if (elapsed < FPS_WINDOW) return;
+            const reading = `${(fpsFrames * 1000 / elapsed).toFixed(1)} fps, ${(fpsTicks * 1000 / elapsed).toFixed(1)} ticks/s, ` +
+                `render ${(fpsFrames ? fpsRenderMs / fpsFrames : 0).toFixed(2)} ms, busy ${(fpsBusyMs * 1000 / elapsed).toFixed(1)} ms/s`;
+            fpsFrames = 0;
+            fpsTicks = 0;
+            fpsRenderMs = 0;
+            fpsBusyMs = 0;
+            fpsStart = timestamp;
+            const otherRenderer = RENDERER === 'canvas' ? 'dom' : 'canvas';
+            const otherLoop = LOOP_MODE === 'always' ? 'on-demand' : 'always';
+            const mode = `${RENDERER}/${LOOP_MODE}`;
+            let lines = `${mode}: ${reading}, quality ${qualityTier}${QUALITY_AUTO ? ' (auto)' : ''}`;
+            try {
+                localStorage.setItem(`xeil-fps-${mode}`, reading);
+                for (const [other, hint] of [[`${otherRenderer}/${LOOP_MODE}`, `?renderer=${otherRenderer}`],
+                                             [`${RENDERER}/${otherLoop}`, `?loop=${otherLoop}`]]) {
+                    lines += `\n${other}: ${localStorage.getItem(`xeil-fps-${other}`) || `not measured, try ${hint}`}`;
+                }
+            } catch (e) {
+                // Storage disabled; show this mode only
+            }
+            fpsElement.textContent = lines;
+        }
+
+        // What the low quality tiers draw instead of generating a pattern: a grey disc for
+        // a planet, one glyph in the middle for a moon. Cached by size, shared by every body.
+        function plainPattern(size, isMoon) {
+            const key = isMoon ? -size : size;
+            let pattern = plainPatterns.get(key);
+            if (pattern) return pattern;
+            pattern = [];
+            const radius = size / 2;
+            const middle = Math.floor(radius);
+            for (let y = 0; y < size; y++) {
+                let line = '';
+                let colors = '';
+                for (let x = 0; x < size; x++) {
+                    const dx = x + 0.5 - radius;
+                    const dy = y + 0.5 - radius;
+                    const lit = isMoon ? x === middle && y === middle : dx * dx + dy * dy <= radius * radius;
+                    line += lit ? (isMoon ? 'o' : '@') : ' ';
+                    colors += '#AAAAAA|';
+                }
+                pattern.push({ line, colors });
+            }
+            plainPatterns.set(key, pattern);
+            return pattern;
+        }
+
+        // One clock reading for every moon position in a frame, held for moonStep ms at the low tiers
+        function moonClock() {
+            return quality.moonStep ? Math.floor(Date.now() / quality.moonStep) * quality.moonStep : Date.now();
+        }
+
+        // Whether a moon the last render drew has since moved into another cell
+        function moonsMoved() {
+            const frameTime = moonClock();
+            const viewportLeft = renderedX - viewportCols / 2;
+            const viewportTop = renderedY - viewportRows / 2;
+            for (const [planet, moon, column, row] of drawnMoons) {
+                const { x, y } = moonPosition(planet, moon, frameTime);
+                if (Math.floor(x - moon.size / 2 - viewportLeft) !== column || Math.floor(y - moon.size / 2 - viewportTop) !== row) {
+                    return true;
+                }
+            }
+            return false;
+        }
+
         function render() {
-            gameElement.innerHTML = '';
-            trailContainer.innerHTML = '';
-            
+            renderedX = playerX;
+            renderedY = playerY;
+            frameDirty = false;
+            animating = false;
+            drawnMoons = [];
+            let fastestOrbit = 0;
+            const frameTime = moonClock();
+            animatedAt = frameTime;
             const viewportLeft = playerX - viewportCols / 2;
             const viewportTop = playerY - viewportRows / 2;
 
             const currentEffectiveCellWidth = cellWidth * (100 / zoomLevel);
             const currentEffectiveCellHeight = cellHeight * (100 / zoomLevel);
             
-            const grid = [];
-            for (let y = 0; y < viewportRows; y++) {
-                grid[y] = new Array(viewportCols).fill(' ');
-            }
+            // One glyph key per cell (see glyphHtml), null where nothing is lit
+            if (gridCells.length !== viewportCols * viewportRows) gridCells = new Array(viewportCols * viewportRows);
+            gridCells.fill(null);
             
             for (const star of stars) {
                 if (!star.visible) continue;
@@ -926,7 +1931,7 @@ HTML_CONTENT = r"""
                 
                 if (screenX >= 0 && screenX < viewportCols && 
                     screenY >= 0 && screenY < viewportRows) {
-                    grid[screenY][screenX] = `<span style="opacity:${star.brightness/5}">${star.char}</span>`;
+                    gridCells[screenY * viewportCols + screenX] = star.char + star.brightness;
                 }
             }
             
@@ -941,8 +1946,10 @@ HTML_CONTENT = r"""
                     continue;
                 }
                 
-                for (let py = 0; py < planet.pattern.length; py++) {
-                    for (let px = 0; px < planet.pattern[py].line.length; px++) {
+                // Empty until a worker returns it
+                const planetPattern = quality.patterns > 0 ? ensurePattern(planet, false) || [] : plainPattern(planet.size, false);
+                for (let py = 0; py < planetPattern.length; py++) {
+                    for (let px = 0; px < planetPattern[py].line.length; px++) {
                         const worldX = planetLeft + px;
                         const worldY = planetTop + py;
                         
@@ -951,22 +1958,18 @@ HTML_CONTENT = r"""
                         
                         if (screenX >= 0 && screenX < viewportCols && 
                             screenY >= 0 && screenY < viewportRows) {
-                            const char = planet.pattern[py].line[px];
+                            const char = planetPattern[py].line[px];
                             if (char !== ' ') {
-                                const colors = planet.pattern[py].colors.split('|');
+                                const colors = planetPattern[py].colors.split('|');
                                 const color = colors[px] || '#FFFFFF';
-                                grid[screenY][screenX] = `<span style="color:${color}">${char}</span>`;
+                                gridCells[screenY * viewportCols + screenX] = char + color;
                             }
                         }
                     }
                 }
 
                 for (const moon of planet.moons) {
-                    const moonOrbitSpeed = 0.0005; 
-                    const animatedAngle = moon.orbitAngle + (Date.now() * moonOrbitSpeed);
-
-                    const moonWorldX = planet.x + moon.orbitRadius * Math.cos(animatedAngle);
-                    const moonWorldY = planet.y + moon.orbitRadius * Math.sin(animatedAngle);
+                    const { x: moonWorldX, y: moonWorldY } = moonPosition(planet, moon, frameTime);
 
                     const moonLeft = moonWorldX - moon.size / 2;
                     const moonTop = moonWorldY - moon.size / 2;
@@ -977,9 +1980,12 @@ HTML_CONTENT = r"""
                         moonBottom < viewportTop || moonTop > viewportTop + viewportRows) {
                         continue;
                     }
+                    drawnMoons.push([planet, moon, Math.floor(moonLeft - viewportLeft), Math.floor(moonTop - viewportTop)]);
+                    fastestOrbit = Math.max(fastestOrbit, moon.orbitRadius);
 
-                    for (let my = 0; my < moon.pattern.length; my++) {
-                        for (let mx = 0; mx < moon.pattern[my].line.length; mx++) {
+                    const moonPattern = quality.patterns > 1 ? ensurePattern(moon, true) || [] : plainPattern(moon.size, true);
+                    for (let my = 0; my < moonPattern.length; my++) {
+                        for (let mx = 0; mx < moonPattern[my].line.length; mx++) {
                             const worldX = moonLeft + mx;
                             const worldY = moonTop + my;
 
@@ -988,43 +1994,72 @@ HTML_CONTENT = r"""
 
                             if (screenX >= 0 && screenX < viewportCols &&
                                 screenY >= 0 && screenY < viewportRows) {
-                                const char = moon.pattern[my].line[mx];
+                                const char = moonPattern[my].line[mx];
                                 if (char !== ' ') {
-                                    const colors = moon.pattern[my].colors.split('|');
+                                    const colors = moonPattern[my].colors.split('|');
                                     const color = colors[mx] || '#FFFFFF';
-                                    grid[screenY][screenX] = `<span style="color:${color}">${char}</span>`;
+                                    gridCells[screenY * viewportCols + screenX] = char + color;
                                 }
                             }
                         }
                     }
                 }
             }
+            // Parked, tick as often as the fastest moon drawn can cross a cell
+            idleTickMs = fastestOrbit ? Math.min(IDLE_TICK_MS, Math.max(quality.moonStep, 1 / (MOON_ORBIT_SPEED * fastestOrbit))) : IDLE_TICK_MS;
             
-            for (let y = 0; y < viewportRows; y++) {
-                const line = document.createElement('div');
-                line.innerHTML = grid[y].join('');
-                gameElement.appendChild(line);
+            if (RENDERER === 'canvas') {
+                drawCells();
+            } else {
+                gameElement.innerHTML = '';
+                for (let y = 0; y < viewportRows; y++) {
+                    let html = '';
+                    for (let x = 0; x < viewportCols; x++) {
+                        const key = gridCells[y * viewportCols + x];
+                        html += key === null ? ' ' : glyphHtml(key);
+                    }
+                    const line = document.createElement('div');
+                    line.innerHTML = html;
+                    gameElement.appendChild(line);
+                }
             }
 
-            for (let i = 0; i < trail.length; i++) {
-                const segment = trail[i];
-                const age = (Date.now() - segment.time) / (TRAIL_LENGTH * 100);
+            // Reuse the pooled trail spans instead of creating new ones every frame
+            const trailNow = Date.now();
+            for (let i = 0; i < TRAIL_CAPACITY; i++) {
+                const trailSpan = trailSpans[i];
+                if (i >= trailCount) {
+                    trailSpan.style.display = 'none';
+                    continue;
+                }
+
+                const slot = (trailHead + i) % TRAIL_CAPACITY;
+                const age = (trailNow - trailTime[slot]) / (quality.trail * 100);
                 const opacity = 0.3 * (1 - age);
                 
                 if (opacity > 0) {
-                    const pixelX = (segment.x - viewportLeft) * currentEffectiveCellWidth;
-                    const pixelY = (segment.y - viewportTop) * currentEffectiveCellHeight;
-
-                    const trailSpan = document.createElement('span');
-                    trailSpan.className = 'trail-segment';
-                    trailSpan.textContent = '■';
+                    const pixelX = (trailX[slot] - viewportLeft) * currentEffectiveCellWidth;
+                    const pixelY = (trailY[slot] - viewportTop) * currentEffectiveCellHeight;
+
+                    if (RENDERER === 'canvas') {
+                        // Same glyph and placement as the span, drawn over the cells
+                        trailSpan.style.display = 'none';
+                        gameContext.globalAlpha = opacity;
+                        gameContext.font = `${16 * (zoomLevel / 100) * canvasScale}px monospace`;
+                        gameContext.fillStyle = 'rgba(0, 255, 255, 0.3)';
+                        gameContext.fillText('■', (pixelX - currentEffectiveCellWidth / 2) * canvasScale,
+                                             (pixelY - currentEffectiveCellHeight / 2) * canvasScale);
+                        gameContext.globalAlpha = 1;
+                        continue;
+                    }
+                    trailSpan.style.display = '';
                     trailSpan.style.left = `${pixelX - (currentEffectiveCellWidth / 2)}px`;
                     trailSpan.style.top = `${pixelY - (currentEffectiveCellHeight / 2)}px`;
                     trailSpan.style.opacity = opacity;
                     trailSpan.style.fontSize = `${16 * (zoomLevel / 100)}px`;
                     trailSpan.style.letterSpacing = `${0.5 * (zoomLevel / 100)}px`;
-
-                    trailContainer.appendChild(trailSpan);
+                } else {
+                    trailSpan.style.display = 'none';
                 }
             }
             
@@ -1040,8 +2075,12 @@ HTML_CONTENT = r"""
                 playerElement.classList.remove('autopilot-outline');
             }
 
+            // updateScanning() clears the scan elements whenever the target changes, so the ones in
+            // activeScanElements always belong to closestScannablePlanet and its moons. Each element
+            // remembers what it last showed, and the DOM is only written when that changes.
             if (isScanning && closestScannablePlanet) {
                 const entitiesToScan = [closestScannablePlanet, ...closestScannablePlanet.moons];
+                const scanProgress = Math.min(1, scanTimer / SCAN_DURATION);
 
                 entitiesToScan.forEach(entity => {
                     const isMoon = !!entity.orbitRadius;
@@ -1053,7 +2092,12 @@ HTML_CONTENT = r"""
                             outline: document.createElement('div'),
                             loadingBarContainer: document.createElement('div'),
                             loadingBar: document.createElement('div'),
-                            details: document.createElement('div')
+                            details: document.createElement('div'),
+                            left: NaN, // outline position, size and bar progress last written, in pixels
+                            top: NaN,
+                            diameter: NaN,
+                            progress: NaN,
+                            detailsShown: false
                         };
 
                         existingElements.outline.className = 'scan-outline';
@@ -1065,6 +2109,7 @@ HTML_CONTENT = r"""
                         existingElements.outline.appendChild(existingElements.loadingBarContainer);
                         existingElements.outline.style.position = 'absolute';
                         existingElements.details.style.position = 'absolute';
+                        existingElements.loadingBarContainer.style.display = 'block';
 
                         scanContainer.appendChild(existingElements.outline);
                         scanContainer.appendChild(existingElements.details);
@@ -1073,10 +2118,9 @@ HTML_CONTENT = r"""
 
                     let entityWorldX, entityWorldY, entitySize;
                     if (isMoon) {
-                        const moonOrbitSpeed = 0.0005;
-                        const animatedAngle = entity.orbitAngle + (Date.now() * moonOrbitSpeed);
-                        entityWorldX = closestScannablePlanet.x + entity.orbitRadius * Math.cos(animatedAngle);
-                        entityWorldY = closestScannablePlanet.y + entity.orbitRadius * Math.sin(animatedAngle);
+                        const position = moonPosition(closestScannablePlanet, entity, frameTime); // Usually drawn this frame already
+                        entityWorldX = position.x;
+                        entityWorldY = position.y;
                         entitySize = entity.size;
                     } else {
                         entityWorldX = entity.x;
@@ -1089,40 +2133,54 @@ HTML_CONTENT = r"""
 
                     const radiusPixels = entitySize / 2 * currentEffectiveCellWidth;
                     const diameterPixels = radiusPixels * 2;
+                    const left = screenPixelX - radiusPixels - 1;
+                    const top = screenPixelY - radiusPixels - 1;
+
+                    if (diameterPixels !== existingElements.diameter) {
+                        existingElements.outline.style.width = `${diameterPixels}px`;
+                        existingElements.outline.style.height = `${diameterPixels}px`;
+                    }
+                    if (left !== existingElements.left || top !== existingElements.top || diameterPixels !== existingElements.diameter) {
+                        existingElements.outline.style.left = `${left}px`;
+                        existingElements.outline.style.top = `${top}px`;
+                        if (existingElements.detailsShown) {
+                            existingElements.details.style.left = `${screenPixelX + radiusPixels + SCAN_DETAIL_OFFSET_X}px`;
+                            existingElements.details.style.top = `${screenPixelY - radiusPixels}px`;
+                        }
+                        existingElements.left = left;
+                        existingElements.top = top;
+                        existingElements.diameter = diameterPixels;
+                    }
+
+                    // A moon's outline moves with the moon, which redraws when it changes cell
+                    if (existingElements.detailsShown) return;
+                    // The bar fills, or the details are not in yet, so the next frame is needed too
+                    animating = true;
 
-                    existingElements.outline.style.width = `${diameterPixels}px`;
-                    existingElements.outline.style.height = `${diameterPixels}px`;
-                    existingElements.outline.style.left = `${screenPixelX - radiusPixels - 1}px`;
-                    existingElements.outline.style.top = `${screenPixelY - radiusPixels - 1}px`;
+                    if (scanProgress !== existingElements.progress) {
+                        existingElements.loadingBar.style.width = `${scanProgress * 100}%`;
+                        existingElements.progress = scanProgress;
+                    }
 
-                    const scanProgress = Math.min(1, scanTimer / SCAN_DURATION);
-                    existingElements.loadingBar.style.width = `${scanProgress * 100}%`;
+                    let dataSeed;
+                    let dataSpecificName = null;
+
+                    // Only apply the specific name if this entity is the autopilot target planet itself.
+                    // Moons of the target planet, and all other planets, get randomized names.
+                    if (!isMoon && closestScannablePlanet === entity && autopilotTargetPlanetName && entity.id === `planet-${autopilotTargetPlanetName}`) {
+                        dataSeed = hashString(autopilotTargetPlanetName);
+                        dataSpecificName = autopilotTargetPlanetName;
+                    } else {
+                        // For all other planets/moons, use their unique ID as a seed for random data.
+                        dataSeed = hashString(id); 
+                    }
+                    // Requested while the bar fills, so the details are ready when it completes
+                    const data = requestScanData(entity, dataSeed, isMoon, dataSpecificName);
 
-                    if (scanProgress >= 1) {
+                    if (scanProgress >= 1 && data) {
                         existingElements.loadingBarContainer.style.display = 'none';
                         existingElements.details.classList.add('visible');
                         
-                        let data;
-                        let dataSeed;
-                        let dataSpecificName = null;
-
-                        // Only apply the specific name if this entity is the autopilot target planet itself.
-                        // Moons of the target planet, and all other planets, get randomized names.
-                        if (!isMoon && closestScannablePlanet === entity && autopilotTargetPlanetName && entity.id === `planet-${autopilotTargetPlanetName}`) {
-                            dataSeed = hashString(autopilotTargetPlanetName);
-                            dataSpecificName = autopilotTargetPlanetName;
-                        } else {
-                            // For all other planets/moons, use their unique ID as a seed for random data.
-                            dataSeed = hashString(id); 
-                        }
-
-                        if (!entity.scanData || entity.scanData.seed !== dataSeed || entity.scanData.specificName !== dataSpecificName) { // Check specificName too
-                            entity.scanData = generatePlanetData(dataSeed, isMoon, dataSpecificName);
-                            entity.scanData.seed = dataSeed;
-                            entity.scanData.specificName = dataSpecificName; // Store for comparison
-                        }
-                        data = entity.scanData;
-                        
                         let detailsHtml = `Code: ${data.name}<br>Life form: ${data.lifeForm}<br>Species: ${data.species}<br>Population: ${data.population}<br>Temperature: ${data.temperature}<br>Age: ${data.age}`;
                         if (!isMoon) {
                             detailsHtml += `<br>Number of Moons: ${closestScannablePlanet.moons.length}`;
@@ -1131,21 +2189,10 @@ HTML_CONTENT = r"""
 
                         existingElements.details.style.left = `${screenPixelX + radiusPixels + SCAN_DETAIL_OFFSET_X}px`;
                         existingElements.details.style.top = `${screenPixelY - radiusPixels}px`;
-                    } else {
-                        existingElements.loadingBarContainer.style.display = 'block';
-                        existingElements.details.classList.remove('visible');
+                        existingElements.detailsShown = true;
                     }
                 });
-
-                const currentScanTargetIds = new Set(entitiesToScan.map(e => e.id));
-                for (const [id, elements] of activeScanElements.entries()) {
-                    if (!currentScanTargetIds.has(id)) {
-                        elements.outline.remove();
-                        elements.details.remove();
-                        activeScanElements.delete(id);
-                    }
-                }
-            } else {
+            } else if (activeScanElements.size) {
                 clearScanElements();
             }
         }
@@ -1171,14 +2218,13 @@ HTML_CONTENT = r"""
             autopilotActive = true;
             autopilotTargetX = targetX;
             autopilotTargetY = targetY;
-            
-            stars = [];
-            planets = [];
-            generatedChunks.clear();
 
-            // Teleport player near the target system, not exactly on it
-            playerX = targetX - (Math.random() - 0.5) * CHUNK_SIZE * 0.5;
-            playerY = targetY - (Math.random() - 0.5) * CHUNK_SIZE * 0.5;
+            // Fly there instead of teleporting, while /route streams the chunks on the way ahead of the ship
+            const distance = Math.hypot(targetX - playerX, targetY - playerY);
+            autopilotRoute = { startX: playerX, startY: playerY, duration: Math.max(ROUTE_MIN_MS, distance / ROUTE_SPEED), elapsed: 0 };
+            arrivalStart = 0;
+            requestRoute(playerX, playerY, targetX, targetY);
+            seededPlanets = seededPlanets.filter(planet => planet.id !== `planet-${targetPlanetName}`); // Earlier ones stay until out of range
             
             // Generate the specific seeded planet at the target coordinates
             const mainPlanetSeed = hashString(targetPlanetName);
@@ -1189,10 +2235,12 @@ HTML_CONTENT = r"""
             if (targetPlanetName.toLowerCase() === 'ollivia') {
                 hasMoonsForOllivia = true; // Ensure Ollivia has moons
             }
+            let mainPlanetDraws = 2;
             
             const moons = [];
             if (hasMoonsForOllivia) {
                 const numMoons = Math.floor(mainPlanetRand() * 3) + 1;
+                mainPlanetDraws++;
                 for (let m = 0; m < numMoons; m++) {
                     const moonSeed = hashString(`${mainPlanetSeed}-${m}`);
                     const moonRand = mulberry32(moonSeed);
@@ -1204,7 +2252,10 @@ HTML_CONTENT = r"""
                         size: moonSize,
                         orbitRadius: orbitRadius,
                         orbitAngle: orbitAngle,
-                        pattern: generatePlanetPattern(moonSize, true, targetPlanetName.toLowerCase() === 'ollivia' ? 'ollivia' : null, moonRand) 
+                        ephemerisPhase: orbitAngle * EPHEMERIS_SAMPLES / (2 * Math.PI),
+                        pattern: null,
+                        patternState: mulberry32State(moonSeed, 3),
+                        patternName: targetPlanetName.toLowerCase() === 'ollivia' ? 'ollivia' : null
                     });
                 }
             }
@@ -1215,26 +2266,13 @@ HTML_CONTENT = r"""
                 x: targetX,
                 y: targetY,
                 size: mainPlanetSize,
-                pattern: generatePlanetPattern(mainPlanetSize, false, targetPlanetName, mainPlanetRand), // Pass targetName and rand for pattern
+                pattern: null,
+                patternState: mulberry32State(mainPlanetSeed, mainPlanetDraws),
+                patternName: targetPlanetName,
                 moons: moons
             };
-            planets.push(seededPlanet); // Add the main planet
-
-            // Generate surrounding chunks using a generic random seed for other celestial bodies
-            const targetChunkX = Math.floor(targetX / CHUNK_SIZE);
-            const targetChunkY = Math.floor(targetY / CHUNK_SIZE);
-
-            for (let y = -1; y <= 1; y++) {
-                for (let x = -1; x <= 1; x++) {
-                    const cx = targetChunkX + x;
-                    const cy = targetChunkY + y;
-                    const chunkKey = `${cx},${cy}`;
-                    if (!generatedChunks.has(chunkKey)) { 
-                        generateChunk(cx, cy); // Use original generateChunk for surrounding random elements
-                        generatedChunks.add(chunkKey);
-                    }
-                }
-            }
+            seededPlanets.push(seededPlanet); // Add the main planet
+            rebuildResidentLists();
             
             isScanning = false;
             scanTimer = 0;
@@ -1250,6 +2288,7 @@ HTML_CONTENT = r"""
             const distance = Math.sqrt(dx * dx + dy * dy);
 
             if (distance < autopilotArrivalThreshold) {
+                arrivalStart = performance.now();
                 stopAutopilot();
                 playerX = autopilotTargetX;
                 playerY = autopilotTargetY;
@@ -1280,18 +2319,87 @@ HTML_CONTENT = r"""
                 return;
             }
 
-            const directionX = dx / distance;
-            const directionY = dy / distance;
+            // Smoothstep along the straight line, as autopilot.py plans it; the velocity
+            // is whatever moves the ship onto this frame's point of the flight
+            const route = autopilotRoute;
+            route.elapsed += deltaTime;
+            const t = Math.min(route.elapsed / route.duration, 1);
+            const progress = t * t * (3 - 2 * t);
+            const scale = 100 / zoomLevel;
+            velocityX = (route.startX + (autopilotTargetX - route.startX) * progress - playerX) / scale;
+            velocityY = (route.startY + (autopilotTargetY - route.startY) * progress - playerY) / scale;
+        }
+
+        // Stream the chunks the flight passes through, in the order the ship reaches them.
+        // Anything the stream has not delivered by then is generated here as usual.
+        function requestRoute(fromX, fromY, toX, toY) {
+            cancelRoute();
+            const id = `route-${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 8)}`;
+            routeId = id;
+            routeDensity = quality.stars;
+            fetch(`/route?from=${fromX},${fromY}&to=${toX},${toY}&id=${id}&patterns=0&density=${routeDensity}`)
+                .then(response => {
+                    if (!response.ok || !response.body) return;
+                    return readLines(response.body.getReader(), new TextDecoder(), '', (line) => {
+                        if (routeId !== id) return false;
+                        const data = JSON.parse(line);
+                        // The first line is the plan and the last one the status; only chunks carry stars
+                        if (data.stars) {
+                            const chunkKey = `${data.cx},${data.cy}`;
+                            if (!residentChunks.has(chunkKey)) routeChunks.set(chunkKey, data);
+                        }
+                        return true;
+                    });
+                })
+                .catch(() => {})
+                .then(() => {
+                    if (routeId === id) routeId = null;
+                });
+        }
+
+        // Feed each complete line of an ndjson body to onLine, until it returns false
+        function readLines(reader, decoder, buffered, onLine) {
+            return reader.read().then(({ done, value }) => {
+                buffered += decoder.decode(value || new Uint8Array(0), { stream: !done });
+                let newline;
+                while ((newline = buffered.indexOf('\n')) >= 0) {
+                    const line = buffered.slice(0, newline);
+                    buffered = buffered.slice(newline + 1);
+                    if (line && onLine(line) === false) return reader.cancel();
+                }
+                if (!done) return readLines(reader, decoder, buffered, onLine);
+            });
+        }
+
+        function cancelRoute() {
+            if (routeId !== null) {
+                fetch(`/chunks/cancel?id=${routeId}`, { method: 'POST' }).catch(() => {});
+                routeId = null;
+            }
+            routeChunks.clear();
+        }
 
-            const autoSpeed = PLAYER_SPEED * AUTOPILOT_SPEED_MULTIPLIER * (deltaTime / 16);
-            velocityX = directionX * autoSpeed;
-            velocityY = directionY * autoSpeed;
+        // A chunk as /chunks and /route serve it, in the packed form hydrateChunk() takes
+        function chunkFromPayload(data, density) {
+            const stars = data.stars;
+            const starData = new Float64Array(stars.x.length * STAR_FIELDS);
+            for (let i = 0, o = 0; i < stars.x.length; i++, o += STAR_FIELDS) {
+                starData[o] = stars.x[i];
+                starData[o + 1] = stars.y[i];
+                starData[o + 2] = stars.brightness[i];
+                starData[o + 3] = stars.chars.charCodeAt(i);
+                starData[o + 4] = stars.blinkSpeed[i];
+                starData[o + 5] = stars.blinkOffset[i];
+            }
+            return hydrateChunk({ density, starData, planets: data.planets });
         }
 
         function stopAutopilot() {
             autopilotActive = false;
+            autopilotRoute = null;
             velocityX = 0;
             velocityY = 0;
+            if (arrivalStart === 0) cancelRoute(); // Taken over mid-flight; on arrival the stream has nothing left to send
             playerElement.classList.remove('autopilot-outline');
             // Do NOT clear autopilotTargetPlanetName here, it's needed for scan info
         }
@@ -1302,21 +2410,1111 @@ HTML_CONTENT = r"""
 </html>
 """
 
+# The worker script is immutable per version, so the page asks for it by content hash
+WORKER_VERSION = hashlib.sha1(WORKER_JS.encode("utf-8")).hexdigest()[:12]
+HTML_CONTENT = HTML_CONTENT.replace("__WORKER_VERSION__", WORKER_VERSION)
+WORKER_CACHE_SECONDS = 7 * 24 * 3600
+
+CHUNK_CACHE = chunks.ChunkCache()
+DESCRIPTOR_CACHE = chunks.ChunkCache(patterns=False)
+# Thinned chunks for the page's low quality tiers, by (patterns, density); kept per process
+REDUCED_CACHES = {(patterns, density): chunks.ChunkCache(chunks.REDUCED_CACHE_CHUNKS, patterns, density)
+                  for patterns in (True, False) for density in galaxy.DENSITY_TIERS if density < 1}
+PATTERN_CACHE = chunks.PatternCache()
+DICTIONARY = None  # built by serve() and route(); without it clients get gzip or identity
+COMPRESSED_CACHE = compression.CompressedCache()
+TILE_CACHE = tiles.TileCache()
+SCAN_CARDS = chunks.ScanCardCache()
+TELEMETRY = metrics.REGISTRY.register(telemetry.TelemetryStore())
+PROFILE_MAX_SECONDS = 60
+
+# /chunks batches: at most a 5x5 block per request, and whatever is not sent
+# by the deadline is listed as skipped so the client can ask again
+BATCH_MAX_KEYS = 25
+BATCH_SECONDS = 10
+BATCHES = {}  # batch id -> threading.Event set by /chunks/cancel
+BATCHES_LOCK = threading.Lock()
+
+# Supervised restarts (serve --supervise): the old server snapshots its caches,
+# the new one restores them and reports ready on a pipe, then the old one
+# stops accepting and drains. Both accept on the same inherited socket meanwhile
+DRAINING = threading.Event()
+CONNECTIONS = set()  # MyHandler instances with an open connection
+CONNECTIONS_LOCK = threading.Lock()
+DRAIN_SECONDS = 15  # longer than a /chunks batch (BATCH_SECONDS)
+SNAPSHOT_WAIT_SECONDS = 30
+READY_WAIT_SECONDS = 120
+
+# /ephemeris: a planet's moons over a time window, by default one orbit from now
+EPHEMERIS_STEP_MS = 100
+EPHEMERIS_MAX_SAMPLES = 6000
+ORBIT_MS = 2 * math.pi / galaxy.MOON_ORBIT_SPEED
+
+
+def parse_chunk_keys(text):
+    """'cx,cy;cx,cy;...' as a list of (cx, cy) without duplicates, in request order."""
+    keys = []
+    for part in filter(None, text.split(';')):
+        cx, cy = (int(value) for value in part.split(','))
+        if not seeds.valid_coordinates(cx, cy):
+            raise ValueError(f"chunk {cx},{cy} is outside the 32-bit range")
+        if (cx, cy) not in keys:
+            keys.append((cx, cy))
+    return keys
+
+
+def parse_density(query):
+    """density= as one of galaxy.DENSITY_TIERS, 1 when absent."""
+    density = float(query.get('density', ['1'])[0])
+    if density not in galaxy.DENSITY_TIERS:
+        raise ValueError(f"density must be one of {', '.join(map(str, galaxy.DENSITY_TIERS))}")
+    return density
+
+
+def chunk_cache(patterns, density=1.0):
+    if density < 1:
+        return REDUCED_CACHES[patterns, density]
+    return CHUNK_CACHE if patterns else DESCRIPTOR_CACHE
+
+
 class MyHandler(http.server.SimpleHTTPRequestHandler):
+    # Keep-alive, and chunked transfer encoding for /chunks. Headers and body
+    # are separate writes, so without TCP_NODELAY each keep-alive response
+    # can wait on the client's delayed ACK
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    # Set from --profile; sampling the whole process is only allowed when asked for
+    profiling_enabled = False
+    # Set from --access-log; otherwise only responses outside 2xx are logged,
+    # since a line per request costs more than the metrics and /metrics has the counts
+    access_log = False
+
+    busy = False
+
+    def setup(self):
+        super().setup()
+        with CONNECTIONS_LOCK:
+            CONNECTIONS.add(self)
+
+    def finish(self):
+        with CONNECTIONS_LOCK:
+            CONNECTIONS.discard(self)
+        super().finish()
+
     def do_GET(self):
-        if self.path == '/' or self.path == '/index.html':
+        self.dispatch(self.routes)
+
+    def do_POST(self):
+        self.dispatch(self.post_routes)
+
+    def dispatch(self, routes):
+        start = time.perf_counter()
+        url = urllib.parse.urlsplit(self.path)
+        # A trailing-slash route such as '/tiles/' also takes every path below it
+        prefix = '/' + url.path.split('/')[1] + '/'
+        route = routes.get(url.path) or routes.get(prefix)
+        self.route_label = (url.path if url.path in routes else prefix) if route else 'other'
+        self.status = 200
+        self.busy = True
+        try:
+            if route:
+                route(self, urllib.parse.parse_qs(url.query))
+            else:
+                # For any other requested paths, respond with 404 Not Found
+                self.send_error(404, "File Not Found: %s" % self.path)
+        finally:
+            self.busy = False
+            if DRAINING.is_set():
+                self.close_connection = True
+            metrics.requests_total.inc(self.route_label, str(self.status))
+            metrics.request_seconds.observe(time.perf_counter() - start, self.route_label)
+
+    def send_response(self, code, message=None):
+        self.status = code
+        super().send_response(code, message)
+        if DRAINING.is_set():
+            # Tell keep-alive clients to reconnect, which lands them on the new server
+            self.send_header("Connection", "close")
+
+    def send_body(self, body, content_type, status=200, headers=()):
+        self.send_response(status)
+        self.send_header("Content-type", content_type)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        metrics.response_bytes.inc(self.route_label, amount=len(body))
+
+    def send_payload(self, payload, content_type, key=None, headers=()):
+        """send_body, compressed with the preset dictionary or gzip when the client accepts it.
+
+        `key` names the payload in COMPRESSED_CACHE; leave it out for payloads
+        that are cheap to compress each time.
+        """
+        encoding = compression.negotiate(self.headers.get('Accept-Encoding'),
+                                         self.headers.get('Available-Dictionary'), DICTIONARY)
+        headers = list(headers) + [("Vary", "Accept-Encoding, Available-Dictionary")]
+        if DICTIONARY is not None:
+            headers.append(("Link", f'</dict/{DICTIONARY.version}>; rel="compression-dictionary"'))
+        if encoding:
+            if key is None:
+                payload = compression.encode(payload, encoding, DICTIONARY)
+            else:
+                payload = COMPRESSED_CACHE.fetch(key, payload, encoding, DICTIONARY)
+            headers.append(("Content-Encoding", encoding))
+        self.send_body(payload, content_type, headers=headers)
+
+    def log_request(self, code='-', size='-'):
+        if self.access_log or not (isinstance(code, int) and 200 <= code < 300):
+            super().log_request(code, size)
+
+    def handle_index(self, query):
+        self.send_body(HTML_CONTENT.encode("utf-8"), "text/html")
+
+    def handle_worker(self, query):
+        etag = f'"{WORKER_VERSION}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        headers = [("ETag", etag), ("Cache-Control", f"public, max-age={WORKER_CACHE_SECONDS}")]
+        self.send_body(WORKER_JS.encode("utf-8"), "application/javascript", headers=headers)
+
+    def handle_chunk(self, query):
+        try:
+            cx = int(query['x'][0])
+            cy = int(query['y'][0])
+        except (KeyError, ValueError):
+            self.send_error(400, "Expected integer x and y chunk coordinates")
+            return
+        if not seeds.valid_coordinates(cx, cy):
+            self.send_error(400, "Chunk coordinates must fit in 32 bits")
+            return
+        try:
+            density = parse_density(query)
+        except ValueError as e:
+            self.send_error(400, str(e))
+            return
+        # patterns=0 sends descriptors only; patterns then come from /pattern as bodies come into view
+        patterns = query.get('patterns', ['1'])[0] != '0'
+        payload, hit = chunk_cache(patterns, density).fetch(cx, cy)
+        self.send_payload(payload, "application/json", key=(patterns, density, seeds.pack_key(cx, cy)),
+                          headers=[("X-Cache", "hit" if hit else "miss")])
+
+    def handle_scans(self, query):
+        try:
+            cx = int(query['x'][0])
+            cy = int(query['y'][0])
+        except (KeyError, ValueError):
+            self.send_error(400, "Expected integer x and y chunk coordinates")
+            return
+        if not seeds.valid_coordinates(cx, cy):
+            self.send_error(400, "Chunk coordinates must fit in 32 bits")
+            return
+        # The generator is deterministic, so a chunk's cards never change
+        self.send_payload(SCAN_CARDS.fetch(cx, cy), "application/json", key=('scans', seeds.pack_key(cx, cy)),
+                          headers=[("Cache-Control", "public, max-age=31536000, immutable")])
+
+    def batch_payload(self, cx, cy, patterns, density):
+        return chunk_cache(patterns, density).fetch(cx, cy)[0]
+
+    def write_chunk(self, data):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        metrics.response_bytes.inc(self.route_label, amount=len(data))
+
+    def handle_chunks(self, query):
+        """Stream several chunks as newline-delimited JSON, nearest to the player first.
+
+        px/py give the player's world position (default: the middle of the
+        requested chunks). The last line reports which keys were skipped,
+        because of /chunks/cancel?id= or the BATCH_SECONDS deadline.
+        """
+        try:
+            keys = parse_chunk_keys(query.get('keys', [''])[0])
+            if 'px' in query and 'py' in query:
+                px, py = float(query['px'][0]), float(query['py'][0])
+            else:
+                px = (sum(cx for cx, _ in keys) / len(keys) + 0.5) * galaxy.CHUNK_SIZE if keys else 0.0
+                py = (sum(cy for _, cy in keys) / len(keys) + 0.5) * galaxy.CHUNK_SIZE if keys else 0.0
+        except ValueError as e:
+            self.send_error(400, f"Expected keys=cx,cy;cx,cy;... ({e})")
+            return
+        if not keys:
+            self.send_error(400, "No chunk keys given")
+            return
+        if len(keys) > BATCH_MAX_KEYS:
+            self.send_error(413, f"At most {BATCH_MAX_KEYS} chunks per batch")
+            return
+        half = galaxy.CHUNK_SIZE / 2
+        keys.sort(key=lambda key: (key[0] * galaxy.CHUNK_SIZE + half - px) ** 2 + (key[1] * galaxy.CHUNK_SIZE + half - py) ** 2)
+        self.stream_chunks(keys, query)
+
+    def stream_chunks(self, keys, query, preamble=None, seconds=BATCH_SECONDS):
+        """Send `keys` in order as ndjson chunk lines, after the `preamble` line if given, then the status line.
+
+        query's id= registers the stream for /chunks/cancel, patterns=0
+        sends descriptors only and density= thins the stars as for /chunk.
+        Keys not sent within `seconds` are skipped.
+        """
+        try:
+            density = parse_density(query)
+        except ValueError as e:
+            self.send_error(400, str(e))
+            return
+        batch_id = query.get('id', [None])[0]
+        cancelled = threading.Event()
+        if batch_id:
+            with BATCHES_LOCK:
+                if batch_id in BATCHES:
+                    self.send_error(409, "A batch with this id is already running")
+                    return
+                BATCHES[batch_id] = cancelled
+
+        patterns = query.get('patterns', ['1'])[0] != '0'
+        deadline = time.monotonic() + seconds
+        sent = 0
+        try:
             self.send_response(200)
-            self.send_header("Content-type", "text/html")
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.send_header("Cache-Control", "no-store")
             self.end_headers()
-            self.wfile.write(HTML_CONTENT.encode("utf-8"))
+            if preamble is not None:
+                self.write_chunk(json.dumps(preamble, separators=(',', ':')).encode("utf-8") + b"\n")
+            reason = None
+            for cx, cy in keys:
+                if cancelled.is_set():
+                    reason = 'cancelled'
+                    break
+                if time.monotonic() > deadline:
+                    reason = 'deadline'
+                    break
+                try:
+                    payload = self.batch_payload(cx, cy, patterns, density)
+                except (LookupError, OSError):
+                    # Only a router gets here, when the chunk's node cannot answer
+                    reason = 'unavailable'
+                    break
+                self.write_chunk(payload + b"\n")
+                sent += 1
+            status = {'done': reason is None, 'sent': sent, 'skipped': keys[sent:], 'reason': reason}
+            self.write_chunk(json.dumps(status, separators=(',', ':')).encode("utf-8") + b"\n")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client went away; stop generating for it
+            self.close_connection = True
+        finally:
+            if batch_id:
+                with BATCHES_LOCK:
+                    BATCHES.pop(batch_id, None)
+
+    def handle_route(self, query):
+        """Plan the autopilot flight from=x,y to=x,y and stream its chunks in the order the ship reaches them.
+
+        The first line is the plan: flight time and each chunk's ETA, in ms
+        after departure. Then come the chunks and status line as for /chunks,
+        with id= and patterns= as there. Chunks still unsent when the ship
+        would have landed plus BATCH_SECONDS are skipped.
+        """
+        try:
+            x0, y0 = (float(value) for value in query['from'][0].split(','))
+            x1, y1 = (float(value) for value in query['to'][0].split(','))
+        except (KeyError, ValueError):
+            self.send_error(400, "Expected from=x,y&to=x,y in world units")
+            return
+        if not (autopilot.block_in_range(x0, y0) and autopilot.block_in_range(x1, y1)):
+            self.send_error(400, "Route ends must lie inside the 32-bit chunk range")
+            return
+        # Checked before planning, so an absurd request costs nothing
+        if math.hypot(x1 - x0, y1 - y0) > autopilot.ROUTE_MAX_CHUNKS * galaxy.CHUNK_SIZE:
+            self.send_error(413, "Route too long")
+            return
+        duration, route = autopilot.plan(x0, y0, x1, y1)
+        if len(route) > autopilot.ROUTE_MAX_CHUNKS:
+            self.send_error(413, f"Route crosses more than {autopilot.ROUTE_MAX_CHUNKS} chunks")
+            return
+        plan = {'duration': duration, 'chunks': [[cx, cy, round(eta)] for cx, cy, eta in route]}
+        self.stream_chunks([(cx, cy) for cx, cy, _ in route], query, plan, duration / 1000 + BATCH_SECONDS)
+
+    def handle_chunks_cancel(self, query):
+        with BATCHES_LOCK:
+            cancelled = BATCHES.get(query.get('id', [''])[0])
+        if cancelled is None:
+            self.send_error(404, "No running batch with this id")
+            return
+        cancelled.set()
+        self.send_response(204)
+        self.end_headers()
+
+    def handle_pattern(self, query):
+        payload = PATTERN_CACHE.fetch(query.get('id', [''])[0])
+        if payload is None:
+            self.send_error(404, "Unknown planet or moon id")
+            return
+        self.send_payload(payload, "application/json")
+
+    def handle_ephemeris(self, query):
+        """Moon positions of planet= every step= ms from t0= to t1=, times in ms since the epoch like Date.now()."""
+        planet = galaxy.descriptor_for_id(query.get('planet', [''])[0])
+        if planet is None or 'moons' not in planet:
+            self.send_error(404, "Unknown planet id")
+            return
+        try:
+            t0 = float(query['t0'][0]) if 't0' in query else time.time() * 1000
+            t1 = float(query['t1'][0]) if 't1' in query else t0 + ORBIT_MS
+            step = float(query.get('step', [EPHEMERIS_STEP_MS])[0])
+        except ValueError as e:
+            self.send_error(400, f"Expected numeric t0, t1 and step ({e})")
+            return
+        if not (math.isfinite(t0) and math.isfinite(t1) and step > 0 and t1 >= t0):
+            self.send_error(400, "Expected t0 <= t1 and step > 0")
+            return
+        count = math.floor((t1 - t0) / step) + 1
+        if count > EPHEMERIS_MAX_SAMPLES:
+            self.send_error(413, f"At most {EPHEMERIS_MAX_SAMPLES} samples per request")
+            return
+        times = [t0 + k * step for k in range(count)]
+        state = {
+            'planet': planet['id'],
+            'x': planet['x'],
+            'y': planet['y'],
+            't0': t0,
+            'step': step,
+            'count': count,
+            'moons': [{'id': moon['id'], 'orbitRadius': moon['orbitRadius'], 'x': xs.tolist(), 'y': ys.tolist()}
+                      for moon, xs, ys in galaxy.system_ephemeris(planet, times)],
+        }
+        self.send_payload(json.dumps(state, separators=(',', ':')).encode("utf-8"), "application/json")
+
+    def handle_tile(self, query):
+        try:
+            z, x, y = (int(part) for part in urllib.parse.urlsplit(self.path).path.split('/')[2:])
+        except ValueError:
+            self.send_error(400, "Expected /tiles/{z}/{x}/{y}")
+            return
+        if not tiles.valid_tile(z, x, y):
+            self.send_error(404, f"No tile {z}/{x}/{y}; levels run from 0 to {tiles.MAX_LEVEL}")
+            return
+        try:
+            payload = TILE_CACHE.encode(z, x, y)
+        except tiles.TileBusy:
+            # The page asks again when the minimap next moves
+            self.send_body(b"Tile builds are busy; try again shortly\n", "text/plain", status=503,
+                           headers=[("Retry-After", "1")])
+            return
+        # The generator is deterministic, so a tile never changes
+        self.send_payload(payload, "application/json",
+                          headers=[("Cache-Control", "public, max-age=31536000, immutable")])
+
+    def handle_dict_current(self, query):
+        if DICTIONARY is None:
+            self.send_error(404, "No compression dictionary on this server")
+            return
+        state = {'version': DICTIONARY.version, 'bytes': len(DICTIONARY.data), 'samples': DICTIONARY.samples,
+                 'url': f"/dict/{DICTIONARY.version}", 'encoding': compression.ENCODING}
+        self.send_body(json.dumps(state).encode("utf-8"), "application/json", headers=[("Cache-Control", "no-cache")])
+
+    def handle_dict(self, query):
+        # A version never changes its bytes, so each one can be cached for good
+        version = urllib.parse.urlsplit(self.path).path.rsplit('/', 1)[1]
+        if DICTIONARY is None or version != DICTIONARY.version:
+            self.send_error(404, "Unknown dictionary version; see /dict for the current one")
+            return
+        headers = [("ETag", f'"{version}"'), ("Cache-Control", "public, max-age=31536000, immutable")]
+        self.send_body(DICTIONARY.data, "application/octet-stream", headers=headers)
+
+    def handle_metrics(self, query):
+        self.send_body(metrics.REGISTRY.expose().encode("utf-8"), "text/plain; version=0.0.4")
+
+    def handle_profile(self, query):
+        if not self.profiling_enabled:
+            self.send_error(404, "Profiling is disabled; start the server with --profile")
+            return
+        try:
+            seconds = float(query.get('seconds', ['10'])[0])
+        except ValueError:
+            self.send_error(400, "seconds must be a number")
+            return
+        seconds = max(0.1, min(seconds, PROFILE_MAX_SECONDS))
+        self.send_body(metrics.sample_profile(seconds).encode("utf-8"), "text/plain")
+
+    def handle_telemetry(self, query):
+        self.send_body(json.dumps(TELEMETRY.summary()).encode("utf-8"), "application/json")
+
+    def handle_telemetry_post(self, query):
+        header = self.headers.get('Content-Length')
+        if not header:
+            self.send_error(411, "Telemetry batch needs a Content-Length")
+            return
+        try:
+            length = int(header)
+            if length < 0:
+                raise ValueError(length)
+        except ValueError:
+            self.send_error(400, "Bad Content-Length")
+            return
+        if length == 0 or length > telemetry.MAX_BODY_BYTES:
+            self.send_error(413 if length else 411, "Telemetry batch missing or too large")
+            return
+        try:
+            TELEMETRY.ingest(self.rfile.read(length))
+        except (ValueError, TypeError, AttributeError):
+            self.send_error(400, "Malformed telemetry batch")
+            return
+        self.send_response(204)
+        self.end_headers()
+
+    routes = {
+        '/': handle_index,
+        '/index.html': handle_index,
+        '/worker.js': handle_worker,
+        '/chunk': handle_chunk,
+        '/chunks': handle_chunks,
+        '/route': handle_route,
+        '/pattern': handle_pattern,
+        '/scans': handle_scans,
+        '/ephemeris': handle_ephemeris,
+        '/tiles/': handle_tile,
+        '/dict': handle_dict_current,
+        '/dict/': handle_dict,
+        '/metrics': handle_metrics,
+        '/debug/profile': handle_profile,
+        '/telemetry': handle_telemetry,
+    }
+    post_routes = {
+        '/telemetry': handle_telemetry_post,
+        '/chunks/cancel': handle_chunks_cancel,
+    }
+
+
+class RouterHandler(MyHandler):
+    """Front for a set of xeil.py nodes: chunk and pattern requests go to the chunk's owner on the ring."""
+    ring = cluster.HashRing()
+    forward_timeout = 60
+
+    def forward(self, node):
+        target = urllib.parse.urlsplit(node)
+        connection = http.client.HTTPConnection(target.hostname, target.port, timeout=self.forward_timeout)
+        # Nodes build the same dictionary as the router, so compression is negotiated end to end
+        request_headers = {name: self.headers[name] for name in ("Accept-Encoding", "Available-Dictionary")
+                           if self.headers.get(name)}
+        try:
+            connection.request("GET", self.path, headers=request_headers)
+            response = connection.getresponse()
+            body = response.read()
+        except OSError as e:
+            metrics.forward_errors.inc(node)
+            self.send_error(502, f"Node {node} unavailable: {e}")
+            return
+        finally:
+            connection.close()
+        headers = [("X-Node", node)]
+        for name in ("X-Cache", "Content-Encoding", "Vary", "Link"):
+            if response.getheader(name):
+                headers.append((name, response.getheader(name)))
+        self.send_body(body, response.getheader("Content-Type", "application/octet-stream"), response.status, headers)
+
+    def batch_payload(self, cx, cy, patterns, density):
+        node = self.ring.node_for(cx, cy)
+        target = urllib.parse.urlsplit(node)
+        connection = http.client.HTTPConnection(target.hostname, target.port, timeout=self.forward_timeout)
+        try:
+            connection.request("GET", f"/chunk?x={cx}&y={cy}&patterns={int(patterns)}&density={density}")
+            response = connection.getresponse()
+            body = response.read()
+        except OSError:
+            metrics.forward_errors.inc(node)
+            raise
+        finally:
+            connection.close()
+        if response.status != 200:
+            raise LookupError(f"{node} answered {response.status} for chunk {cx},{cy}")
+        return body
+
+    def owner(self, lookup, *key):
+        try:
+            return lookup(*key)
+        except LookupError:
+            self.send_error(503, "No nodes in the cluster")
+            return None
+
+    def handle_chunk(self, query):
+        try:
+            cx = int(query['x'][0])
+            cy = int(query['y'][0])
+        except (KeyError, ValueError):
+            self.send_error(400, "Expected integer x and y chunk coordinates")
+            return
+        if not seeds.valid_coordinates(cx, cy):
+            self.send_error(400, "Chunk coordinates must fit in 32 bits")
+            return
+        node = self.owner(self.ring.node_for, cx, cy)
+        if node:
+            self.forward(node)
+
+    def handle_pattern(self, query):
+        # Patterns live with their chunk, so the node that generated it can reuse its descriptors
+        body_id = query.get('id', [''])[0]
+        match = galaxy.BODY_ID.match(body_id)
+        if match:
+            node = self.owner(self.ring.node_for, int(match.group(2)), int(match.group(3)))
         else:
-            # For any other requested paths, respond with 404 Not Found
-            self.send_error(404, "File Not Found: %s" % self.path)
-
-with socketserver.TCPServer(("", PORT), MyHandler) as httpd:
-    print(f"Serving ASCII Space Explorer at http://localhost:{PORT}/")
-    print("Press Ctrl+C to stop the server.")
+            node = self.owner(self.ring.node_for_key, body_id)
+        if node:
+            self.forward(node)
+
+    def handle_ephemeris(self, query):
+        match = galaxy.BODY_ID.match(query.get('planet', [''])[0])
+        if not match:
+            self.send_error(404, "Unknown planet id")
+            return
+        node = self.owner(self.ring.node_for, int(match.group(2)), int(match.group(3)))
+        if node:
+            self.forward(node)
+
+    def handle_cluster(self, query):
+        shares = self.ring.shares()
+        state = {'vnodes': self.ring.vnodes, 'nodes': [{'node': node, 'share': round(shares[node], 4)} for node in self.ring.nodes]}
+        self.send_body(json.dumps(state).encode("utf-8"), "application/json")
+
+    def handle_cluster_change(self, query):
+        if not cluster.is_loopback(self.client_address[0]):
+            self.send_error(403, "Nodes join and leave from this machine only")
+            return
+        try:
+            node = cluster.parse_node(query.get('node', [''])[0])
+        except ValueError as e:
+            self.send_error(400, str(e))
+            return
+        changed = self.ring.add(node) if self.path.startswith('/cluster/join') else self.ring.remove(node)
+        self.send_body(json.dumps({'node': node, 'changed': changed, 'nodes': self.ring.nodes}).encode("utf-8"),
+                       "application/json")
+
+    routes = dict(MyHandler.routes, **{
+        '/chunk': handle_chunk,
+        '/pattern': handle_pattern,
+        '/scans': handle_chunk,  # same x and y, and the cards live with their chunk
+        '/ephemeris': handle_ephemeris,
+        '/cluster': handle_cluster,
+    })
+    post_routes = dict(MyHandler.post_routes, **{
+        '/cluster/join': handle_cluster_change,
+        '/cluster/leave': handle_cluster_change,
+    })
+
+
+def route(port, nodes):
+    global DICTIONARY
+    DICTIONARY = compression.Dictionary.build()
+    for node in nodes:
+        RouterHandler.ring.add(node)
+    with http.server.ThreadingHTTPServer(("", port), RouterHandler) as httpd:
+        print(f"Routing for {len(RouterHandler.ring)} nodes at http://localhost:{port}/")
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            print("\nRouter stopped.")
+
+
+def serve(port=PORT, profile=False, workers=1, shared_cache=True, data=None, listen_fd=None, ready_fd=None,
+          snapshot_path=None):
+    """Serve the game on `port`, or on the listening socket `listen_fd` when supervise() passes one down.
+
+    With `snapshot_path` the caches are restored from it at startup and saved
+    to it on SIGUSR1. `ready_fd` is written once the server accepts. SIGTERM
+    stops accepting and drains requests in flight before exiting.
+    """
+    global CHUNK_CACHE, DESCRIPTOR_CACHE, DICTIONARY
+    MyHandler.profiling_enabled = profile
+    if listen_fd is not None:
+        # Ctrl+C reaches the whole process group; the supervisor drains us instead
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if data:
+        # Mapped before forking; workers share the page cache behind the read-only maps
+        chunks.SOURCE = export.Region(data)
+        print(f"Reading chunks {chunks.SOURCE.x0},{chunks.SOURCE.y0} to {chunks.SOURCE.x1},{chunks.SOURCE.y1} from {data}")
+    shared = []
+    if workers > 1 and shared_cache:
+        # Created before forking so every worker maps the same segments and locks
+        CHUNK_CACHE = shmcache.SharedChunkCache()
+        DESCRIPTOR_CACHE = shmcache.SharedChunkCache(slot_bytes=shmcache.DESCRIPTOR_SLOT_BYTES, patterns=False)
+        shared = [CHUNK_CACHE, DESCRIPTOR_CACHE]
+        metrics.REGISTRY.register(shmcache.SharedCacheStats(shared))
+    saved = None
+    if snapshot_path:
+        saved, restored, seconds = snapshot.timed_restore(snapshot_path, cache_set())
+        if saved is not None:
+            print(f"Restored {restored} cache entries from {snapshot_path} in {seconds:.2f}s")
+    DICTIONARY = snapshot.dictionary(saved) or compression.Dictionary.build()
+    try:
+        with (inherited_server(listen_fd) if listen_fd is not None else
+              http.server.ThreadingHTTPServer(("", port), MyHandler)) as httpd:
+            print(f"Serving ASCII Space Explorer at http://localhost:{httpd.server_port}/")
+            print("Press Ctrl+C to stop the server.", flush=True)
+            signal.signal(signal.SIGTERM, lambda signum, frame: stop_accepting(httpd))
+            if snapshot_path:
+                signal.signal(signal.SIGUSR1, lambda signum, frame: threading.Thread(
+                    target=save_snapshot, args=(snapshot_path,), daemon=True).start())
+            if ready_fd is not None:
+                os.write(ready_fd, b"ready\n")
+                os.close(ready_fd)
+            try:
+                if workers > 1:
+                    prefork(httpd, workers, shared)
+                else:
+                    httpd.serve_forever()
+                    if DRAINING.is_set():
+                        cut = drain()
+                        print(f"Drained{f', cutting {cut} connections' if cut else ''}.", flush=True)
+            except KeyboardInterrupt:
+                print("\nServer stopped.")
+    finally:
+        for cache in shared:
+            cache.close(unlink=True)
+
+
+def inherited_server(fd):
+    """A ThreadingHTTPServer accepting on an already listening socket, such as one supervise() passes down."""
+    httpd = http.server.ThreadingHTTPServer(("", 0), MyHandler, bind_and_activate=False)
+    httpd.socket.close()
+    httpd.socket = socket.socket(fileno=fd)
+    httpd.server_address = httpd.socket.getsockname()
+    httpd.server_name, httpd.server_port = httpd.server_address[:2]
+    return httpd
+
+
+def cache_set():
+    """Every cache a snapshot covers, by name; with --workers only the shared ones hold anything in the parent."""
+    caches = {'chunks': CHUNK_CACHE, 'descriptors': DESCRIPTOR_CACHE, 'patterns': PATTERN_CACHE,
+              'compressed': COMPRESSED_CACHE, 'tiles': TILE_CACHE, 'cards': SCAN_CARDS}
+    for (patterns, density), cache in REDUCED_CACHES.items():
+        caches[f"reduced-{int(patterns)}-{density}"] = cache
+    return caches
+
+
+def save_snapshot(path):
+    start = time.perf_counter()
+    count = snapshot.save(path, cache_set(), DICTIONARY)
+    print(f"Saved {count} cache entries to {path} in {time.perf_counter() - start:.2f}s", flush=True)
+
+
+def stop_accepting(httpd):
+    """SIGTERM: leave serve_forever(); called from a signal handler, so shutdown() needs its own thread."""
+    DRAINING.set()
+    threading.Thread(target=httpd.shutdown, daemon=True).start()
+
+
+def drain(seconds=DRAIN_SECONDS):
+    """Close idle keep-alive connections and wait for requests in flight; returns how many were cut off."""
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        with CONNECTIONS_LOCK:
+            handlers = list(CONNECTIONS)
+        if not handlers:
+            return 0
+        for handler in handlers:
+            if not handler.busy:
+                try:
+                    # Its next readline() sees EOF, so the handler finishes
+                    handler.connection.shutdown(socket.SHUT_RD)
+                except OSError:
+                    pass
+        time.sleep(0.05)
+    with CONNECTIONS_LOCK:
+        return len(CONNECTIONS)
+
+
+def prefork(httpd, workers, shared_caches):
+    """Fork `workers` processes accepting on httpd's socket; the parent only waits for them."""
+    children = []
+    for index in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, lambda signum, frame: stop_accepting(httpd))
+            signal.signal(signal.SIGUSR1, signal.SIG_IGN)  # snapshots are the parent's job
+            for cache in shared_caches:
+                cache.attach_worker(index)
+            try:
+                httpd.serve_forever()
+                if DRAINING.is_set():
+                    drain()
+            except KeyboardInterrupt:
+                pass
+            finally:
+                os._exit(0)
+        children.append(pid)
+
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        for pid in children:
+            os.waitpid(pid, 0)
+    finally:
+        # All at once, so the workers drain side by side
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in children:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+
+
+def supervise(port, serve_args, snapshot_path=None):
+    """Own the listening socket and keep a `serve` process on it, restarting it without dropping connections.
+
+    The socket is bound once with SO_REUSEADDR (and SO_REUSEPORT where the
+    platform has it), so neither a restart nor a new supervisor waits out
+    TIME_WAIT. On SIGHUP the running server saves a cache snapshot, a fresh
+    xeil.py from disk is started on the same inherited socket and restores
+    it, and only once it reports ready is the old one sent SIGTERM to drain.
+    A server that fails to come up is killed and the old one kept. SIGTERM or
+    Ctrl+C snapshots, drains and stops.
+    """
+    listener = socket.create_server(("", port), backlog=128, reuse_port=hasattr(socket, 'SO_REUSEPORT'))
+    listen_fd = listener.fileno()
+    pending = collections.deque()
+    for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda signum, frame: pending.append(signum))
+
+    def start():
+        """(process, ready) for a new server on the listening socket."""
+        read_end, write_end = os.pipe()
+        command = [sys.executable, os.path.abspath(__file__), 'serve', '--listen-fd', str(listen_fd),
+                   '--ready-fd', str(write_end)] + serve_args
+        if snapshot_path:
+            command += ['--snapshot', snapshot_path]
+        process = subprocess.Popen(command, pass_fds=(listen_fd, write_end))
+        os.close(write_end)
+        try:
+            # EOF instead of the line means it exited first
+            ready = bool(select.select([read_end], [], [], READY_WAIT_SECONDS)[0]) and os.read(read_end, 16) == b"ready\n"
+        finally:
+            os.close(read_end)
+        if not ready:
+            process.kill()
+            process.wait()
+        return process, ready
+
+    def take_snapshot(process):
+        """Ask `process` for a snapshot and wait until the file has been replaced."""
+        if not snapshot_path or process.poll() is not None:
+            return
+
+        def identity():
+            try:
+                stat = os.stat(snapshot_path)
+                return stat.st_ino, stat.st_mtime_ns
+            except FileNotFoundError:
+                return None
+
+        before = identity()
+        process.send_signal(signal.SIGUSR1)
+        deadline = time.monotonic() + SNAPSHOT_WAIT_SECONDS
+        while identity() == before and process.poll() is None and time.monotonic() < deadline:
+            time.sleep(0.02)
+
+    server, ready = start()
+    if not ready:
+        print(f"Server failed to start on port {port}", flush=True)
+        return 1
+    print(f"Supervisor {os.getpid()}: server {server.pid} ready on port {port}", flush=True)
+    retiring = []
+    try:
+        while True:
+            retiring = [process for process in retiring if process.poll() is None]
+            if pending:
+                if pending.popleft() != signal.SIGHUP:
+                    break
+                take_snapshot(server)
+                start_time = time.perf_counter()
+                replacement, ready = start()
+                if ready:
+                    server.terminate()
+                    retiring.append(server)
+                    print(f"Restarted: server {replacement.pid} ready in {time.perf_counter() - start_time:.2f}s, "
+                          f"{server.pid} draining", flush=True)
+                    server = replacement
+                else:
+                    print(f"Restart failed: server {replacement.pid} exited or hung; keeping {server.pid}", flush=True)
+            elif server.poll() is not None:
+                print(f"Server {server.pid} exited with status {server.returncode}; starting another", flush=True)
+                server, ready = start()
+                if not ready:
+                    return 1
+            else:
+                time.sleep(0.1)
+    finally:
+        take_snapshot(server)
+        server.terminate()
+        for process in retiring + [server]:
+            process.wait()
+        listener.close()
+        print("Supervisor stopped.", flush=True)
+    return 0
+
+
+def print_replay(result):
+    print(f"{result['name']:<14} {result['frames']:>6} frames {result['sim_seconds']:>7.1f}s sim "
+          f"{result['wall_seconds']:>7.2f}s wall {result['realtime_factor']:>7.1f}x realtime | "
+          f"{result['chunks_generated']:>3} chunks {result['generation_seconds']:.2f}s gen "
+          f"{result['render_seconds']:.2f}s render | prefetch {result['prefetch_hits']}/"
+          f"{result['prefetch_hits'] + result['prefetch_misses']} hits, {result['chunks_restored']} restored | "
+          f"{result['bytes']} bytes -> {result['final_position']}")
+
+
+def print_soak(result):
+    for minutes, traced, resident, evicted in result['samples']:
+        print(f"{minutes:>7.1f} min  {traced / 1e6:>8.2f} MB traced  {resident:>3} resident  {evicted:>3} evicted")
+    verdict = "flat" if result['growth'] <= replay.SOAK_MAX_GROWTH else "GROWING"
+    print(f"{result['chunks_generated']} chunks generated, {result['chunks_evicted']} evicted, "
+          f"{result['chunks_restored']} restored in {result['wall_seconds']:.1f}s; "
+          f"second-half peak {result['growth']:+.1%} vs first half: {verdict}")
+    return result['growth'] <= replay.SOAK_MAX_GROWTH
+
+
+def print_analytics(stats, seconds):
+    bodies = stats.planets + stats.moons
+    print(f"{stats.chunks} chunks, {stats.planets} planets, {stats.moons} moons ({seconds:.1f}s this run)")
+    print(f"life on {stats.life / max(bodies, 1):.1%} of bodies, total population {stats.population:,}")
+    peak = max(stats.temperatures) or 1
+    for k, count in enumerate(stats.temperatures):
+        if count:
+            low = analytics.TEMPERATURE_MIN + k * analytics.TEMPERATURE_BIN
+            print(f"{low:>5} to {low + analytics.TEMPERATURE_BIN:>4}°C {count:>12}  {'#' * round(40 * count / peak)}")
+    for population, body_id in sorted(stats.populous, reverse=True):
+        print(f"{population:>16,}  {body_id}")
+
+
+def parse_region(text):
+    """(x0, y0, x1, y1) from 'X0,Y0,X1,Y1', or None unless it is a non-empty rectangle."""
     try:
-        httpd.serve_forever()
-    except KeyboardInterrupt:
-        print("\nServer stopped.")
+        region = tuple(int(value) for value in text.split(','))
+    except ValueError:
+        return None
+    if len(region) != 4 or region[2] <= region[0] or region[3] <= region[1]:
+        return None
+    return region
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ASCII Space Explorer server and simulation tools.")
+    commands = parser.add_subparsers(dest='command')
+
+    serve_parser = commands.add_parser('serve', help="serve the game (default)")
+    serve_parser.add_argument('--port', type=int, default=PORT)
+    serve_parser.add_argument('--profile', action='store_true', help="enable /debug/profile?seconds=N")
+    serve_parser.add_argument('--access-log', action='store_true', help="log every request, not only those outside 2xx")
+    serve_parser.add_argument('--workers', type=int, default=1, help="pre-forked worker processes")
+    serve_parser.add_argument('--private-cache', action='store_true',
+                              help="give each worker its own chunk cache instead of the shared one")
+    serve_parser.add_argument('--supervise', action='store_true',
+                              help="own the socket and restart the server on SIGHUP without dropping connections")
+    serve_parser.add_argument('--snapshot', metavar='PATH',
+                              help="restore caches from PATH at startup and save them there on SIGUSR1; "
+                                   "--supervise defaults to one in $XDG_RUNTIME_DIR or a private temp directory")
+    serve_parser.add_argument('--no-snapshot', action='store_true', help="supervise without cache snapshots")
+    serve_parser.add_argument('--listen-fd', type=int, help=argparse.SUPPRESS)
+    serve_parser.add_argument('--ready-fd', type=int, help=argparse.SUPPRESS)
+    serve_parser.add_argument('--data', metavar='DIR', help="serve the chunks of an `export` directory from its files")
+
+    replay_parser = commands.add_parser('replay', help="replay recorded input logs as fast as possible")
+    replay_parser.add_argument('logs', nargs='+')
+    replay_parser.add_argument('--no-render', action='store_true')
+    replay_parser.add_argument('--prefetch', type=float, default=sim.PREFETCH_LOOKAHEAD, metavar='MS',
+                               help="prefetch lookahead in ms of projected flight (0 disables)")
+
+    bench_parser = commands.add_parser('bench', help="replay the bundled session corpus and report throughput")
+    bench_parser.add_argument('--no-render', action='store_true')
+    bench_parser.add_argument('--prefetch', type=float, default=sim.PREFETCH_LOOKAHEAD, metavar='MS')
+    bench_parser.add_argument('--rebuild', action='store_true', help="re-record the corpus first")
+
+    soak_parser = commands.add_parser('soak', help="fly a long synthetic session and check memory stays flat")
+    soak_parser.add_argument('--hours', type=float, default=2.0, help="simulated hours of flight")
+    soak_parser.add_argument('--sample', type=float, default=5.0, metavar='MINUTES')
+    soak_parser.add_argument('--render', action='store_true')
+
+    park_bench_parser = commands.add_parser('park-bench', help="compare the always-render and on-demand loops on a parked ship")
+    park_bench_parser.add_argument('--seconds', type=float, default=60.0, help="simulated seconds parked")
+
+    route_parser = commands.add_parser('route', help="route chunk requests to nodes by consistent hashing")
+    route_parser.add_argument('--port', type=int, default=PORT)
+    route_parser.add_argument('nodes', nargs='*', metavar='NODE', help="local node base URL, e.g. http://127.0.0.1:8001")
+
+    cluster_bench_parser = commands.add_parser('cluster-bench', help="start N nodes behind a router and add them one by one")
+    cluster_bench_parser.add_argument('--nodes', type=int, default=4)
+    cluster_bench_parser.add_argument('--requests', type=int, default=200, help="unseen chunks requested at each size")
+    cluster_bench_parser.add_argument('--clients', type=int, default=8)
+
+    star_bench_parser = commands.add_parser('star-bench', help="time random-access star generation against full chunks")
+    star_bench_parser.add_argument('--chunks', type=int, default=20)
+    star_bench_parser.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+
+    check_seeds_parser = commands.add_parser('check-seeds', help="check integer seeds against hashing the formatted strings")
+    check_seeds_parser.add_argument('--grid', type=int, default=300, help="check every chunk within this many of the origin")
+    check_seeds_parser.add_argument('--samples', type=int, default=200000, help="random coordinates over the int32 range")
+
+    seed_bench_parser = commands.add_parser('seed-bench', help="time string against integer seeds and chunk keys")
+    seed_bench_parser.add_argument('--count', type=int, default=100000)
+
+    batch_bench_parser = commands.add_parser('batch-bench', help="time a teleport's nine chunks as single GETs against one /chunks batch")
+    batch_bench_parser.add_argument('--rtt', type=float, default=50, help="emulated round trip in milliseconds")
+    batch_bench_parser.add_argument('--teleports', type=int, default=5)
+
+    route_bench_parser = commands.add_parser('route-bench', help="compare the wait at a Code button destination, teleport against /route flight")
+    route_bench_parser.add_argument('--rtt', type=float, default=50, help="emulated round trip in milliseconds")
+    route_bench_parser.add_argument('--flights', type=int, default=5)
+    route_bench_parser.add_argument('--distance', type=float, default=9600, help="world units flown, 5x a 1920 px window by default")
+
+    dict_bench_parser = commands.add_parser('dict-bench', help="compare preset-dictionary compression with gzip and zlib")
+    dict_bench_parser.add_argument('--chunks', type=int, default=4, help="full chunks to compress")
+    dict_bench_parser.add_argument('--pattern-chunks', type=int, default=8, help="chunks whose planet and moon patterns to compress")
+
+    cache_bench_parser = commands.add_parser('cache-bench', help="compare chunk cache hit rate and memory across worker counts")
+    cache_bench_parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 16])
+    cache_bench_parser.add_argument('--requests', type=int, default=1000)
+    cache_bench_parser.add_argument('--clients', type=int, default=8)
+    cache_bench_parser.add_argument('--no-private', action='store_true', help="skip the per-worker cache baseline")
+
+    restart_bench_parser = commands.add_parser('restart-bench', help="restart a supervised server under load, cold and from a snapshot")
+    restart_bench_parser.add_argument('--requests', type=int, default=300, help="hot-spot requests the working set is drawn from")
+    restart_bench_parser.add_argument('--clients', type=int, default=4)
+
+    analytics_parser = commands.add_parser('analytics', help="scan statistics over a region of chunks, in flat memory")
+    analytics_parser.add_argument('--region', required=True, metavar='X0,Y0,X1,Y1', help="chunk rectangle, end exclusive; write --region=-8,... when it starts negative")
+    analytics_parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    analytics_parser.add_argument('--checkpoint', metavar='PATH', help="save the running total here and resume from it")
+    analytics_parser.add_argument('--top', type=int, default=analytics.TOP_K, help="most populous bodies to list")
+
+    export_parser = commands.add_parser('export', help="write a region's stars, bodies and scans as .npy columns")
+    export_parser.add_argument('--region', required=True, metavar='X0,Y0,X1,Y1', help="chunk rectangle, end exclusive; write --region=-8,... when it starts negative")
+    export_parser.add_argument('--out', required=True, metavar='DIR')
+
+    poster_parser = commands.add_parser('poster', help="render a rectangle of the galaxy to an ASCII or PPM image")
+    poster_parser.add_argument('--region', required=True, metavar='X0,Y0,X1,Y1', help="world rectangle, end exclusive; write --region=-8,... when it starts negative")
+    poster_parser.add_argument('--scale', type=int, default=1, help=f"world units per cell side; divides {galaxy.CHUNK_SIZE} or is a multiple of it")
+    poster_parser.add_argument('--out', required=True, metavar='PATH')
+    poster_parser.add_argument('--format', choices=poster.FORMATS, help="default: ppm for a .ppm path, else ascii")
+    poster_parser.add_argument('--time', type=float, default=0.0, metavar='MS', help="where moons are in their orbits")
+    poster_parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+
+    args = parser.parse_args(argv)
+
+    if args.command in (None, 'serve') and getattr(args, 'supervise', False):
+        serve_args = ['--workers', str(args.workers)]
+        serve_args += ['--profile'] if args.profile else []
+        serve_args += ['--access-log'] if args.access_log else []
+        serve_args += ['--private-cache'] if args.private_cache else []
+        serve_args += ['--data', args.data] if args.data else []
+        try:
+            snapshot_path = None if args.no_snapshot else args.snapshot or snapshot.default_path(args.port)
+        except (OSError, ValueError) as e:
+            parser.error(f"no private directory for the cache snapshot: {e}")
+        return supervise(args.port, serve_args, snapshot_path)
+    elif args.command in (None, 'serve'):
+        MyHandler.access_log = getattr(args, 'access_log', False)
+        serve(getattr(args, 'port', PORT), getattr(args, 'profile', False),
+              getattr(args, 'workers', 1), not getattr(args, 'private_cache', False), getattr(args, 'data', None),
+              getattr(args, 'listen_fd', None), getattr(args, 'ready_fd', None), getattr(args, 'snapshot', None))
+    elif args.command == 'replay':
+        for path in args.logs:
+            print_replay(replay.replay(path, not args.no_render, args.prefetch))
+    elif args.command == 'bench':
+        if args.rebuild:
+            replay.build_corpus()
+        results = [replay.replay(path, not args.no_render, args.prefetch) for path in replay.corpus_paths()]
+        for result in results:
+            print_replay(result)
+        sim_seconds = sum(r['sim_seconds'] for r in results)
+        wall_seconds = sum(r['wall_seconds'] for r in results)
+        print(f"total: {sim_seconds:.1f}s of play in {wall_seconds:.2f}s ({sim_seconds / wall_seconds:.1f}x realtime)")
+    elif args.command == 'route':
+        try:
+            nodes = [cluster.parse_node(node) for node in args.nodes]
+        except ValueError as e:
+            parser.error(str(e))
+        route(args.port, nodes)
+    elif args.command == 'cluster-bench':
+        for result in bench.cluster_bench(args.nodes, args.requests, args.clients):
+            bench.print_cluster_bench(result)
+    elif args.command == 'star-bench':
+        bench.print_star_bench(bench.star_bench(args.chunks, args.processes))
+    elif args.command == 'check-seeds':
+        if not bench.print_check_seeds(*bench.check_seeds(args.grid, args.samples)):
+            return 1
+    elif args.command == 'seed-bench':
+        bench.print_seed_bench(*bench.seed_bench(args.count))
+    elif args.command == 'batch-bench':
+        bench.print_batch_bench(bench.batch_bench(args.rtt / 1000, args.teleports))
+    elif args.command == 'route-bench':
+        bench.print_route_bench(bench.route_bench(args.rtt / 1000, args.flights, args.distance))
+    elif args.command == 'dict-bench':
+        bench.print_dict_bench(*bench.dict_bench(args.chunks, args.pattern_chunks))
+    elif args.command == 'cache-bench':
+        for workers in args.workers:
+            bench.print_cache_bench(bench.cache_bench(workers, args.requests, args.clients))
+            if workers > 1 and not args.no_private:
+                bench.print_cache_bench(bench.cache_bench(workers, args.requests, args.clients, shared_cache=False))
+    elif args.command == 'restart-bench':
+        bench.print_restart_bench(*bench.restart_bench(args.requests, args.clients))
+    elif args.command == 'soak':
+        if not print_soak(replay.soak(args.hours, args.sample, args.render)):
+            return 1
+    elif args.command == 'park-bench':
+        for beside_planet in (False, True):
+            results = [replay.park(args.seconds, mode, beside_planet) for mode in replay.LOOP_MODES]
+            for result in results:
+                print(f"{result['scene']:<16} {result['mode']:<10} {result['ticks']:>6} ticks {result['renders']:>6} renders "
+                      f"{result['cpu_seconds']:7.2f}s CPU for {result['sim_seconds']:.0f}s parked "
+                      f"({result['cpu_seconds'] / results[0]['cpu_seconds']:.0%} of always)")
+    elif args.command == 'analytics':
+        region = parse_region(args.region)
+        if region is None:
+            parser.error("--region takes X0,Y0,X1,Y1 chunk coordinates with X1 > X0 and Y1 > Y0")
+
+        def progress(done, total, stats):
+            print(f"\r{done}/{total} tasks, {stats.chunks} chunks", end='', file=sys.stderr, flush=True)
+
+        start = time.perf_counter()
+        stats = analytics.analyze(region, args.workers, args.checkpoint, top=args.top, progress=progress)
+        print(file=sys.stderr)
+        print_analytics(stats, time.perf_counter() - start)
+    elif args.command == 'export':
+        region = parse_region(args.region)
+        if region is None:
+            parser.error("--region takes X0,Y0,X1,Y1 chunk coordinates with X1 > X0 and Y1 > Y0")
+        start = time.perf_counter()
+        export.export(region, args.out, lambda done, total: print(f"\r{done}/{total} chunk rows", end='',
+                                                                 file=sys.stderr, flush=True))
+        print(file=sys.stderr)
+        with open(os.path.join(args.out, 'manifest.json')) as f:
+            manifest = json.load(f)
+        for table, entry in manifest['tables'].items():
+            print(f"{table:<8} {entry['rows']:>10} rows  {len(entry['columns'])} columns")
+        print(f"{manifest['chunksWritten']} chunks in {time.perf_counter() - start:.1f}s")
+    elif args.command == 'poster':
+        region = parse_region(args.region)
+        if region is None:
+            parser.error("--region takes X0,Y0,X1,Y1 world coordinates with X1 > X0 and Y1 > Y0")
+        try:
+            poster.check_scale(args.scale)
+        except ValueError as e:
+            parser.error(str(e))
+        fmt = args.format or ('ppm' if args.out.lower().endswith('.ppm') else 'ascii')
+        start = time.perf_counter()
+        width, height = poster.render(region, args.scale, args.out, fmt, args.time, args.workers,
+                                      lambda done, total: print(f"\r{done}/{total} tiles", end='', file=sys.stderr, flush=True))
+        print(file=sys.stderr)
+        seconds = time.perf_counter() - start
+        print(f"{width} x {height} {fmt} cells to {args.out} in {seconds:.1f}s ({width * height / seconds / 1e6:.2f} Mcells/s)")
+
+
+if __name__ == "__main__":
+    sys.exit(main())